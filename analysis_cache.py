@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'analysis.sqlite')
+
+
+def analysis_cache_key(prompt, model, temperature, brand_context, max_tokens=None):
+    """Content hash of everything that determines an analysis response"""
+    brands = sorted(brand_context) if isinstance(brand_context, list) else [brand_context]
+    payload = json.dumps(
+        {'prompt': prompt, 'model': model, 'temperature': temperature,
+         'brands': brands, 'max_tokens': max_tokens},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Disk-backed analysis cache
+class AnalysisCache:
+    """SQLite cache of parsed LLM analyses with TTL and LRU eviction.
+
+    The file is shared by every session and process that opens the same
+    path and survives restarts. Entries older than `ttl` seconds are treated
+    as misses; once the table exceeds `max_entries` rows or `max_bytes` of
+    JSON, the least recently used entries are evicted. Hit and miss counts
+    are stored alongside the entries.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, max_entries=500, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn, name):
+        conn.execute('UPDATE stats SET value = value + 1 WHERE name = ?', (name,))
+
+    def get(self, key):
+        """Cached analysis for `key`, or None on a miss / expired entry"""
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            row = conn.execute('SELECT value, created FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._count(conn, 'misses')
+                return None
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+            self._count(conn, 'hits')
+            return json.loads(row[0])
+
+    def put(self, key, value):
+        """Store an analysis and evict least recently used entries past the limits"""
+        data = json.dumps(value)
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                (key, data, len(data), now, now),
+            )
+            conn.execute('DELETE FROM entries WHERE created < ?', (now - self.ttl,))
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                for old_key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed').fetchall():
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    conn.execute('DELETE FROM entries WHERE key = ?', (old_key,))
+                    count -= 1
+                    total -= size
+
+    def stats(self):
+        """Hit/miss counters plus current entry count and size"""
+        with self._connect() as conn:
+            counters = dict(conn.execute('SELECT name, value FROM stats').fetchall())
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return {'hits': counters.get('hits', 0), 'misses': counters.get('misses', 0),
+                'entries': count, 'bytes': total}
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self.lock, self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+            conn.execute('UPDATE stats SET value = 0')
@@ -1,18 +1,19 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from collections import Counter
 import json
-import re
-from datetime import datetime
-import requests
-from groq import Groq
 import time
-from bs4 import BeautifulSoup
-import random
 import os
+from llm import filter_analysis_for_brands
+from analysis_cache import AnalysisCache
+from sample_data import generate_sample_data, generate_sample_analysis
+from jobs import CANCELLED, QUEUED, JobQueue
+from snapshots import (ANALYSIS_FIELDS, Snapshot, SnapshotRefresher, build_snapshot, data_key, flavor_views,
+                       run_analysis, snapshot_config, snapshot_key)
+from tracing import Tracer, current_tracer, span, traced, use_tracer
+
+# Scraping (requests, lxml), plotting (plotly, wordcloud)
+# and the Groq SDK are imported inside the functions that use them, so the
+# sample-data path paints without loading them.
+
 for proxy_var in ["HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy"]:
     os.environ.pop(proxy_var, None)
     
@@ -169,648 +170,370 @@ if 'data_loaded' not in st.session_state:
 if 'analysis_complete' not in st.session_state:
     st.session_state.analysis_complete = False
 
-# Real Amazon Reviews Scraper with BeautifulSoup
-@st.cache_data(ttl=3600)
-def scrape_amazon_reviews_live(search_terms, max_per_term=15):
-    """Actually scrape real Amazon India reviews using BeautifulSoup"""
-    all_data = []
-    
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    ]
-    
-    for term in search_terms:
+# Card markup shared by the streamed preview and the final results
+def brand_badge_class(brand):
+    """CSS class for a brand badge"""
+    if 'HK Vitals' in brand:
+        return 'brand-hkvitals'
+    elif 'TrueBasics' in brand:
+        return 'brand-truebasics'
+    return 'brand-muscleblaze'
+
+def golden_card_html(golden):
+    """HTML for the Golden Candidate card"""
+    brand = golden.get('brand', 'N/A')
+    brand_class = brand_badge_class(brand)
+    return f"""
+    <div class="golden-card">
+        <div style="text-align:center; font-size:3rem; margin-bottom:1rem;"></div>
+        <h1 style="margin:0; color:white; text-align:center; font-size:2.5rem;">{golden.get('flavor', 'N/A')}</h1>
+        <div style="text-align:center; margin:1rem 0;">
+            <span class="brand-badge {brand_class}" style="font-size:1rem;">{brand}</span>
+        </div>
+        <h3 style="margin:0.5rem 0; color:#ffe6e6; text-align:center; font-weight:400;">
+            {golden.get('product_type', 'N/A')}
+        </h3>
+        <hr style="border:none; border-top:2px solid rgba(255,255,255,0.3); margin:1.5rem 0;">
+        <p style="font-size:1.2rem; margin:1rem 0; color:white; line-height:1.6;">
+            <strong>Why This Works:</strong><br/>
+            {golden.get('why', 'N/A')}
+        </p>
+        <p style="font-size:1rem; color:#ffe6e6; line-height:1.6; margin-top:1.5rem;">
+            <strong>Market Opportunity:</strong><br/>
+            {golden.get('market_opportunity', 'Strong consumer demand')}
+        </p>
+    </div>
+    """
+
+def recommendation_card_html(idx, rec):
+    """HTML for one Selected Ideas card"""
+    confidence = rec.get('confidence', 'Medium')
+    confidence_class = f"confidence-{confidence.lower()}"
+    brand = rec.get('brand', 'N/A')
+    brand_class = brand_badge_class(brand)
+    return f"""
+    <div class="recommendation-box">
+        <h3 style="margin-top:0;">{idx}. {rec.get('flavor', 'N/A')} 
+            <span class="confidence-badge {confidence_class}">{confidence}</span>
+        </h3>
+        <div>
+            <span class="brand-badge {brand_class}">🏷️ {brand}</span>
+            <span style="color:#666; font-weight:500;">For: {rec.get('product_type', 'N/A')}</span>
+        </div>
+        <p style="margin:1rem 0;"><strong>Why:</strong> {rec.get('why', 'N/A')}</p>
+        <p style="color:#666; font-size:0.9rem; margin:0.5rem 0;">
+            <strong>Solves:</strong> {rec.get('user_pain_point', 'Consumer need')}
+        </p>
+    </div>
+    """
+
+# Route scraper status messages to the sidebar
+def sidebar_notify(level, message):
+    """Show a scraper status message with st.sidebar.info/success/warning/error"""
+    getattr(st.sidebar, level)(message)
+
+# Persistent store of everything scraped so far
+@st.cache_resource
+def get_review_store():
+    """One ReviewStore per server process; the SQLite file outlives restarts"""
+    from review_store import ReviewStore
+    
+    return ReviewStore()
+
+# Combined scraping function (runs inside a background job)
+@traced('app.scrape_live_data')
+def scrape_live_data(job, data_sources, amazon_terms=None, reddit_subs=None, post_limit=20, force_refresh=False,
+                     store=None, batch_size=200, fallback_sources=None):
+    """Stream new items from real data sources through the review store into a DataFrame.
+
+    Not st.cache_data'd: the review store already skips sources refreshed
+    within the hour. Near-duplicates (e.g. fallback templates repeated per
+    term) are dropped, and rows and running flavor counts go to the job's
+    stage as batches arrive instead of after the whole scrape. Records go
+    straight into the columnar ReviewTable; no list of them is kept.
+    Sources that got canned fallback reviews are added to `fallback_sources`.
+    """
+    from pipeline import stream_reviews
+    from flavors import count_flavors
+    from records import ReviewTable, batched
+    from dedup import DuplicateFilter
+    
+    duplicates = DuplicateFilter()
+    flavor_counts = {}
+    
+    def counted(reviews):
+        loaded = 0
+        for batch in batched(duplicates.filter(reviews), batch_size):
+            loaded += len(batch)
+            for flavor, count in count_flavors(review.text for review in batch).items():
+                flavor_counts[flavor] = flavor_counts.get(flavor, 0) + count
+            top = ", ".join(sorted(flavor_counts, key=flavor_counts.get, reverse=True)[:5])
+            job.set_stage(f"Loaded {loaded} items" + (f" · top flavors so far: {top}" if top else ""))
+            yield from batch
+    
+    stream = stream_reviews(data_sources, amazon_terms, reddit_subs, post_limit, store=store,
+                            force_refresh=force_refresh, notify=job.notify, fallback_sources=fallback_sources)
+    table = ReviewTable.from_reviews(counted(stream))
+    job.notify('caption', f"🧹 {duplicates.summary()}")
+    with span('frame.build', rows=len(table)):
+        return table.to_frame()
+
+# Shared on-disk cache of Groq analyses
+@st.cache_resource
+def get_analysis_cache():
+    """One AnalysisCache per server process, backed by a file shared across sessions"""
+    return AnalysisCache()
+
+# Shared model router (latency histograms persist across reruns)
+@st.cache_resource
+def get_model_router(api_key):
+    """One ModelRouter per server process over the configured Groq models"""
+    from router import build_router
+    
+    return build_router(api_key)
+
+# Background jobs shared by every session
+@st.cache_resource
+def get_job_queue():
+    """One JobQueue per server process; sessions keep the ids of their jobs"""
+    return JobQueue()
+
+# Precomputed analysis snapshots, rebuilt in the background when stale
+@st.cache_resource
+def get_snapshot_refresher():
+    """One SnapshotRefresher per server process, building on the shared job queue"""
+    return SnapshotRefresher(queue=get_job_queue())
+
+def refresh_snapshot(config):
+    """Queue a background rebuild of the snapshot for `config`"""
+    client = get_model_router(GROQ_API_KEY)
+    cache = get_analysis_cache()
+    review_store = get_review_store() if config['source'] == 'live' else None
+    get_snapshot_refresher().refresh(config, lambda: build_snapshot(config, client, cache, review_store))
+
+# Show a Groq failure in the UI
+def report_groq_error(error):
+    """Translate Groq/JSON exceptions into a user-facing error message"""
+    if isinstance(error, json.JSONDecodeError):
+        st.error(f"Failed to parse AI response: {str(error)}")
+        return
+    error_msg = str(error)
+    if "authentication" in error_msg.lower() or "api key" in error_msg.lower():
+        st.error("❌ Invalid API key. Please update GROQ_API_KEY at line 16 in app.py")
+    elif "rate limit" in error_msg.lower():
+        st.error("⏱️ Rate limit exceeded. Please wait a minute and try again.")
+    else:
+        st.error(f"Groq API Error: {error_msg}")
+
+# Job: collect the data for a configuration
+def load_data_job(job, config, force_refresh, review_store):
+    """Scrape (or generate) the reviews for `config` and build its flavor views.
+
+    Returns config, df, views and `fallback`: True when a live
+    configuration got sample or canned fallback data in place of scraped
+    reviews, so the result must not be saved as its snapshot.
+    """
+    df = None
+    fallback = False
+    if config['source'] == 'live':
+        job.set_stage("Gathering market intelligence...")
+        fallback_sources = set()
+        df = scrape_live_data(job, config['data_sources'], config['amazon_terms'], config['reddit_subs'],
+                              config['post_limit'] or 10, force_refresh, store=review_store,
+                              fallback_sources=fallback_sources)
+        fallback = bool(fallback_sources)
+        if len(df) == 0:
+            job.notify('warning', "⚠️ No live data collected. Using sample data.")
+            df = None
+            fallback = True
+    if df is None:
+        df = generate_sample_data()
+    job.set_stage(f"Counting flavors in {len(df)} comments...")
+    return {'config': config, 'df': df, 'views': flavor_views(df, config['discover']), 'fallback': fallback}
+
+# Job: Groq analysis of the loaded data
+def analysis_job(job, config, df, views, client, cache, store):
+    """Analyze `df` and save the result as a snapshot; returns analysis, word-cloud PNG and response time.
+
+    Raises on Groq/JSON errors; the analysis is None when the response
+    held nothing usable. Nothing is saved when `store` is None (e.g. for
+    fallback data).
+    """
+    import visuals
+    
+    job.set_stage("AI is analyzing trends...")
+    analysis = run_analysis(config, df, client, cache, on_item=job.add_item, on_stage=job.set_stage)
+    seconds = job.elapsed()
+    if not analysis:
+        return {'analysis': None, 'word_cloud_png': None, 'seconds': seconds}
+    analysis = filter_analysis_for_brands(analysis, config['brands'])
+    
+    # Save the fresh result so the next page load with this configuration is instant
+    job.set_stage("Rendering the word cloud...")
+    png = visuals.word_cloud_png(df['text'].tolist())
+    if store is not None:
         try:
-            # Random user agent to avoid blocking
-            headers = {
-                'User-Agent': random.choice(user_agents),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            # Amazon India search URL
-            search_url = f"https://www.amazon.in/s?k={term.replace(' ', '+')}"
-            
-            st.sidebar.info(f"Searching Amazon for '{term}'...")
-            
-            response = requests.get(search_url, headers=headers, timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Find product listings
-                products = soup.find_all('div', {'data-component-type': 's-search-result'})
-                
-                if len(products) == 0:
-                    st.sidebar.warning(f"⚠️ No products found for '{term}'. Using fallback data.")
-                    # Generate fallback data
-                    fallback_reviews = generate_fallback_amazon_data(term, 10)
-                    all_data.extend(fallback_reviews)
-                    continue
-                
-                st.sidebar.success(f"✅ Found {len(products)} products for '{term}'")
-                
-                # Get first few product ASINs
-                product_count = 0
-                for product in products[:3]:  # Check first 3 products
-                    try:
-                        # Get ASIN
-                        asin = product.get('data-asin')
-                        if not asin:
-                            continue
-                        
-                        # Get product reviews page
-                        reviews_url = f"https://www.amazon.in/product-reviews/{asin}/"
-                        
-                        time.sleep(2)  # Rate limiting
-                        
-                        review_response = requests.get(reviews_url, headers=headers, timeout=15)
-                        
-                        if review_response.status_code == 200:
-                            review_soup = BeautifulSoup(review_response.content, 'html.parser')
-                            
-                            # Extract reviews
-                            review_divs = review_soup.find_all('div', {'data-hook': 'review'})
-                            
-                            for review_div in review_divs[:5]:  # Get 5 reviews per product
-                                try:
-                                    # Extract review text
-                                    review_body = review_div.find('span', {'data-hook': 'review-body'})
-                                    if review_body:
-                                        review_text = review_body.get_text(strip=True)
-                                        
-                                        # Extract rating
-                                        rating = review_div.find('i', {'data-hook': 'review-star-rating'})
-                                        rating_text = rating.get_text(strip=True) if rating else "5.0 out of 5 stars"
-                                        rating_value = float(rating_text.split()[0])
-                                        
-                                        all_data.append({
-                                            'text': review_text,
-                                            'source': f'Amazon ({term})',
-                                            'score': int(rating_value),
-                                            'comments': 0,
-                                            'created': datetime.now()
-                                        })
-                                        
-                                        product_count += 1
-                                        if product_count >= max_per_term:
-                                            break
-                                            
-                                except Exception as e:
-                                    continue
-                            
-                            if product_count >= max_per_term:
-                                break
-                                
-                    except Exception as e:
-                        continue
-                
-                if product_count > 0:
-                    st.sidebar.success(f"✅ Scraped {product_count} reviews for '{term}'")
-                else:
-                    st.sidebar.warning(f"⚠️ Could not access reviews for '{term}'. Using fallback.")
-                    fallback_reviews = generate_fallback_amazon_data(term, 10)
-                    all_data.extend(fallback_reviews)
-                    
-            elif response.status_code == 503:
-                st.sidebar.warning(f"⚠️ Amazon temporarily unavailable for '{term}'")
-                fallback_reviews = generate_fallback_amazon_data(term, 10)
-                all_data.extend(fallback_reviews)
-            else:
-                st.sidebar.warning(f"⚠️ Status {response.status_code} from Amazon. Using fallback.")
-                fallback_reviews = generate_fallback_amazon_data(term, 10)
-                all_data.extend(fallback_reviews)
-            
-            time.sleep(3)  # Longer delay between terms
-            
-        except Exception as e:
-            st.sidebar.error(f"⚠️ Error scraping '{term}': {str(e)[:100]}")
-            fallback_reviews = generate_fallback_amazon_data(term, 10)
-            all_data.extend(fallback_reviews)
-    
-    return all_data
-
-# Fallback data generator
-def generate_fallback_amazon_data(term, count=10):
-    """Generate realistic Amazon-style reviews as fallback"""
-    templates = [
-        f"Good {term} but the flavor options are very limited. Only chocolate and vanilla.",
-        f"Quality of this {term} is excellent but taste could be better. Too artificial.",
-        f"Been using this {term} for 2 months. Works great but gets boring with same flavors.",
-        f"Effective {term}. Wish they had more Indian flavors like mango or kesar pista.",
-        f"The {term} is too sweet for my liking. Need less sugar or natural sweeteners.",
-        f"Value for money is good but chocolate flavor is repetitive. Need variety.",
-        f"Mixability is perfect but I'm tired of vanilla. Want something innovative.",
-        f"Results are good with this {term} but fruit flavors taste very artificial.",
-        f"Decent {term} but vanilla is too plain. Vanilla honey would be much better.",
-        f"Works well but competitors have better flavor range. Need to innovate!",
+            store.save(Snapshot(config, df, analysis, png, *views))
+        except OSError as e:
+            job.notify('caption', f"⚠️ Could not save snapshot: {e}")
+    return {'analysis': analysis, 'word_cloud_png': png, 'seconds': seconds}
+
+# This session's job in one phase (load / analysis)
+def session_job(slot, fn, *args, name=None, key=None, reuse_for=0):
+    """The job whose id is in st.session_state[slot], submitting fn(job, *args) if there is none.
+
+    Sessions submitting the same `key` share one job (see JobQueue), so
+    simultaneous identical requests cost one scrape or Groq call and share
+    one result in memory.
+    """
+    queue = get_job_queue()
+    job = queue.get(st.session_state.get(slot))
+    if job is None or job.status == CANCELLED:
+        job = queue.submit(fn, *args, name=name, key=key, reuse_for=reuse_for)
+        st.session_state[slot] = job.id
+    return job
+
+def finish_job(slot, job):
+    """Forget a finished job: its messages go to the sidebar and its spans into this run's trace"""
+    st.session_state.pop(slot, None)
+    for level, message in job.messages:
+        sidebar_notify(level, message)
+    tracer = current_tracer()
+    if tracer is not None:
+        tracer.merge(job.tracer)
+
+def cancel_session_jobs():
+    """Drop this session's queued jobs (running ones finish, unread)"""
+    for slot in ('load_job', 'analysis_job'):
+        get_job_queue().cancel(st.session_state.pop(slot, None))
+
+# Cards from the objects an analysis job has streamed so far
+def streamed_cards(items, brand_filter):
+    """(seconds, section, item) for the streamed objects that become cards for `brand_filter`"""
+    return [
+        (seconds, section, item) for seconds, section, item in items
+        if section != 'rejected' and any(brand.lower() in str(item.get('brand', '')).lower() for brand in brand_filter)
     ]
-    
-    reviews = []
-    for i in range(min(count, len(templates))):
-        reviews.append({
-            'text': templates[i],
-            'source': f'Amazon ({term})',
-            'score': 4 + (i % 2),
-            'comments': 0,
-            'created': datetime.now()
-        })
-    
-    return reviews
 
-# Scrape Amazon Reviews
-@st.cache_data(ttl=3600)
-def scrape_amazon_reviews(search_terms, max_per_term=20):
-    """Scrape Amazon product reviews for supplement products"""
-    all_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-    }
-    
-    for term in search_terms:
-        try:
-            # Amazon India search URL
-            search_url = f"https://www.amazon.in/s?k={term.replace(' ', '+')}"
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                st.sidebar.success(f"✅ Accessed Amazon for '{term}'")
-                # Note: Full scraping would require parsing HTML with BeautifulSoup
-                # For now, we'll use realistic generated data based on actual Amazon patterns
-                
-                # Generate realistic Amazon-style reviews
-                review_templates = [
-                    f"Great {term} but wish it came in more flavors. Only chocolate and vanilla available.",
-                    f"The {term} quality is good but the taste is too artificial. Need natural flavors.",
-                    f"Been using this {term} for 3 months. Works well but flavor options are limited.",
-                    f"Excellent product! Hope they launch Indian flavors like kesar badam or mango.",
-                    f"Taste is okay but too sweet. Would prefer less sugar or natural sweeteners.",
-                    f"Good value for money but the chocolate flavor gets boring. Need variety!",
-                    f"Mixability is great but I'm tired of the same old flavors. Want something new.",
-                    f"Effective supplement but please add fruit-based flavors like berry or tropical.",
-                    f"The vanilla taste is too plain. Vanilla honey or vanilla bean would be better.",
-                    f"Solid product but competitors have better flavor variety. Step it up!",
-                ]
-                
-                for i in range(min(max_per_term, len(review_templates))):
-                    all_data.append({
-                        'text': review_templates[i],
-                        'source': f'Amazon ({term})',
-                        'score': 4 + (i % 2),  # 4-5 star ratings
-                        'comments': i + 1,
-                        'created': datetime.now()
-                    })
-                
-            elif response.status_code == 503:
-                st.sidebar.warning(f"⚠️ Amazon temporarily unavailable for '{term}'")
-            else:
-                st.sidebar.warning(f"⚠️ Status {response.status_code} from Amazon")
-            
-            time.sleep(2)  # Rate limiting
-            
-        except Exception as e:
-            st.sidebar.warning(f"⚠️ Error fetching '{term}': {str(e)[:50]}")
-    
-    return pd.DataFrame(all_data)
-
-# Scrape Competitor Product Reviews
-@st.cache_data(ttl=3600)
-def scrape_competitor_reviews(max_reviews=30):
-    """Generate realistic reviews from competitor analysis"""
-    
-    competitor_reviews = [
-        # Optimum Nutrition reviews
-        "ON Gold Standard is great but Double Rich Chocolate is getting boring",
-        "Why don't Indian brands make flavors like ON's Cake Batter?",
-        "ON has 20+ flavors, Indian brands need to step up",
-        "Rocky Road flavor from ON is amazing, wish desi brands had this",
-        
-        # MyProtein reviews  
-        "MyProtein's Salted Caramel is too sweet, need better options",
-        "They have Sticky Toffee Pudding flavor! Indian brands are so basic",
-        "MyProtein flavors are innovative, ours are stuck in chocolate-vanilla",
-        
-        # Dymatize reviews
-        "Dymatize ISO 100 has Gourmet Chocolate, way better than regular chocolate",
-        "Birthday Cake flavor is so good, why don't we have fun flavors?",
-        
-        # Indian market feedback
-        "All Indian protein brands taste the same - chocolate, vanilla, strawberry",
-        "Missing authentic Indian flavors in supplements",
-        "Would love to see masala chai or kesar pista protein",
-        "Tired of artificial fruity flavors, want real fruit extracts",
-        "Every brand has the same boring flavors, no innovation",
+# Poll a running job without re-running the page
+@st.fragment(run_every=0.5)
+def job_progress(job_id, brand_filter):
+    """Show a job's stage, messages and streamed cards; rerun the whole page once it has finished"""
+    job = get_job_queue().get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    stage = "Waiting for a free worker..." if job.status == QUEUED else job.stage or "Starting..."
+    st.info(f"⏳ {stage} ({job.elapsed():.0f}s)")
+    for level, message in job.messages[-3:]:
+        st.caption(message)
+    cards = streamed_cards(job.items, brand_filter)
+    for _, section, item in cards:
+        if section == 'golden_candidate':
+            st.markdown(golden_card_html(item), unsafe_allow_html=True)
+    count = 0
+    for _, section, item in cards:
+        if section != 'golden_candidate':
+            count += 1
+            st.markdown(recommendation_card_html(count, item), unsafe_allow_html=True)
+
+# Trend Wall (word cloud + flavor frequency)
+@traced('trendwall.render')
+def render_trend_wall(df):
+    """Render the word cloud, keyword-frequency and momentum tabs for the loaded data"""
+    st.markdown("## Trend Wall")
+    
+    tab1, tab2, tab3 = st.tabs(["Word Cloud", "Keyword Frequency", "Momentum"])
+    
+    # Plotting libraries are only imported once results are on screen
+    import visuals
+    
+    with tab1:
+        if 'word_cloud_png' not in st.session_state:
+            st.session_state.word_cloud_png = visuals.word_cloud_png(df['text'].tolist())
+        
+        if st.session_state.word_cloud_png is not None:
+            st.image(st.session_state.word_cloud_png, width='stretch')
+    
+    with tab2:
+        # Demand weighs each mention by request/praise/complaint cues, engagement and source
+        demand = st.session_state.demand
+        col1, col2 = st.columns(2)
+        with col1:
+            rank_by = st.radio("Rank by", ["Demand score", "Mentions"], horizontal=True, key="flavor_rank_by")
+        with col2:
+            brand = st.selectbox("Mentioned with", ["Any brand"] + demand.by_brand.columns.tolist(),
+                                 key="flavor_rank_brand", disabled=rank_by == "Mentions")
         
-        # Specific complaints
-        "Chocolate is too sweet in all Indian brands",
-        "Vanilla is bland and artificial tasting",
-        "Coffee flavor needs upgrade - try mocha or cappuccino",
-        "Mango flavor tastes like candy, not real mango",
-        "Strawberry milkshake is too artificial",
+        if rank_by == "Mentions":
+            flavor_counts = st.session_state.flavor_index.top(15)
+            chart = visuals.flavor_bar_chart(flavor_counts) if flavor_counts else None
+        else:
+            flavor_counts = demand.top(15) if brand == "Any brand" else demand.for_brand(brand, 15)
+            chart = visuals.flavor_bar_chart(flavor_counts, title='Flavor Demand (sentiment and engagement weighted)',
+                                             label='Demand') if flavor_counts else None
         
-        # Desires
-        "Want premium dessert flavors like tiramisu or cheesecake",
-        "Natural sweeteners would be great, stevia or monk fruit",
-        "Coconut flavors are underrated in India",
-        "Peanut butter banana combo would be perfect",
-        "Dark chocolate with less sweetness please",
-        "Seasonal flavors would be exciting - mango in summer would be very refreshing and cooling",
-        "Buttercotch toffee would be a hit",
-        "Rose or gulkand for traditional Indian taste",
-        "Kulfi flavor would be unique and Indian",
-        "Filter coffee for South Indian audience",
-    ]
-    
-    data = []
-    for i, review in enumerate(competitor_reviews[:max_reviews]):
-        data.append({
-            'text': review,
-            'source': 'Market Research',
-            'score': 3 + (i % 3),  # 3-5 stars
-            'comments': (i % 5) + 1,
-            'created': datetime.now()
-        })
-    
-    return pd.DataFrame(data)
-
-# Combined scraping function
-@st.cache_data(ttl=3600)
-def scrape_live_data(data_sources, amazon_terms=None, reddit_subs=None, post_limit=20):
-    """Scrape from multiple real data sources"""
-    all_data = []
-    
-    if 'Amazon Reviews' in data_sources and amazon_terms:
-        with st.spinner("Scraping real Amazon reviews with BeautifulSoup..."):
-            amazon_reviews = scrape_amazon_reviews_live(amazon_terms, max_per_term=15)
-            all_data.extend(amazon_reviews)
-    
-    if 'Competitor Analysis' in data_sources:
-        with st.spinner("Gathering competitor insights..."):
-            competitor_data = scrape_competitor_reviews(max_reviews=30)
-            all_data.extend(competitor_data.to_dict('records'))
-    
-    if 'Reddit' in data_sources and reddit_subs:
-        with st.spinner("Scraping Reddit..."):
-            reddit_df = scrape_reddit_data(reddit_subs, post_limit)
-            if len(reddit_df) > 0:
-                all_data.extend(reddit_df.to_dict('records'))
-    
-    return pd.DataFrame(all_data)
+        if chart is not None:
+            st.plotly_chart(chart, width='stretch')
+        else:
+            st.info("No flavor keywords detected in the data.")
+    
+    with tab3:
+        # Ranked by how fast mentions grow week over week, not by raw frequency
+        trends = st.session_state.trends
+        rising = trends.momentum(window=7, n=10)
+        
+        if len(trends) > 1 and len(rising):
+            top = rising.index[:5].tolist()
+            st.plotly_chart(visuals.flavor_momentum_chart(trends.rolling(window=7)[top]), width='stretch')
+            rows = "\n".join(
+                f"| {flavor.title()} | {row.current} | {row.previous} | {row.velocity:+d} | {row.acceleration:+d} | {row.momentum:.2f} |"
+                for flavor, row in zip(rising.index, rising.itertuples())
+            )
+            st.markdown("| Flavor | Last 7 days | Previous 7 | Velocity | Acceleration | Momentum |\n"
+                        "|---|---:|---:|---:|---:|---:|\n" + rows)
+        else:
+            st.info("Not enough dated mentions yet to measure momentum.")
 
-# Scrape Reddit data
-@st.cache_data(ttl=3600)
-def scrape_reddit_data(subreddits, limit=50):
-    """Scrape Reddit posts using web scraping"""
-    all_data = []
+# Sidebar Performance panel for the current run
+def render_performance_panel(tracer):
+    """Per-stage timings, trace download and profiler switch"""
+    import importlib.util
     
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    ]
-    
-    for idx, subreddit in enumerate(subreddits):
-        try:
-            url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit={limit}"
-            headers = {
-                'User-Agent': user_agents[idx % len(user_agents)],
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=False)
-            
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    posts = data.get('data', {}).get('children', [])
-                    
-                    for post in posts:
-                        post_data = post.get('data', {})
-                        text = post_data.get('title', '') + ' ' + post_data.get('selftext', '')
-                        
-                        if text.strip():
-                            all_data.append({
-                                'text': text.strip(),
-                                'source': f"r/{subreddit}",
-                                'score': post_data.get('score', 0),
-                                'comments': post_data.get('num_comments', 0),
-                                'created': datetime.fromtimestamp(post_data.get('created_utc', time.time()))
-                            })
-                    
-                    st.sidebar.success(f"✅ Fetched {len(posts)} posts from r/{subreddit}")
-                except json.JSONDecodeError:
-                    st.sidebar.warning(f"⚠️ Could not parse data from r/{subreddit}")
-            elif response.status_code == 403:
-                st.sidebar.error(f"🚫 Access forbidden to r/{subreddit}. Reddit may be blocking requests.")
-            elif response.status_code == 429:
-                st.sidebar.warning(f"⏱️ Rate limited on r/{subreddit}. Using cached data.")
+    with st.sidebar:
+        with st.expander("Performance"):
+            summary = tracer.summary()
+            if summary:
+                rows = "\n".join(
+                    f"| {name} | {stats['count']} | {stats['total'] * 1000:.1f} | {stats['max'] * 1000:.1f} |"
+                    for name, stats in summary.items()
+                )
+                st.markdown("| Stage | Calls | Total ms | Max ms |\n|---|---:|---:|---:|\n" + rows)
             else:
-                st.sidebar.warning(f"⚠️ Status {response.status_code} from r/{subreddit}")
-            
-            time.sleep(2)  # Longer delay to avoid 403 errors
-            
-        except requests.exceptions.Timeout:
-            st.sidebar.warning(f"⏱️ Timeout fetching r/{subreddit}")
-        except Exception as e:
-            st.sidebar.warning(f"⚠️ Error from r/{subreddit}: {str(e)[:50]}")
-    
-    if len(all_data) == 0:
-        st.sidebar.warning("⚠️ No data collected from Reddit. Using sample data.")
-    
-    return pd.DataFrame(all_data)
-
-# Generate sample data
-def generate_sample_data():
-    """Generate realistic sample data"""
-    sample_comments = [
-        "I wish MuscleBlaze had a Kesar Pista protein flavor! Would buy instantly.",
-        "Why don't we have Dark Chocolate whey without the sweetness overload?",
-        "Mango Lassi flavor for summer would be amazing for post-workout",
-        "Blueberry gummies are trending but most brands make them too artificial",
-        "Coffee flavored protein is so boring, we need Masala Chai innovation",
-        "Watermelon electrolytes sound refreshing, perfect for Indian summers",
-        "Coconut Water flavor for hydration supplements please!",
-        "Rose Gulkand protein would be unique and very Indian",
-        "Chocolate mint is overdone, give us Chocolate Orange",
-        "Peanut Butter Banana combo for mass gainers would sell like crazy",
-        "Green Apple pre-workout tastes chemical, need natural alternatives",
-        "Litchi flavor is underrated for supplements",
-        "Strawberry Milkshake whey but make it less sweet",
-        "Salted Caramel is played out, try Butterscotch Toffee",
-        "Jeera flavor for digestive supplements would be authentic",
-        "Black Currant antioxidant gummies are missing from market",
-        "Vanilla is too plain, Vanilla Honey would add depth",
-        "Cranberry Orange for vitamin C supplements",
-        "Pistachio Almond for nut-based proteins",
-        "Tropical Punch with real fruit extracts not artificial",
-        "Cardamom Coffee for a desi twist on regular coffee protein",
-        "Alphonso Mango is superior to regular mango flavor during summer",
-        "Tender Coconut Water for authentic taste",
-        "Dark Chocolate with Sea Salt would be game-changing",
-        "Gulab Jamun flavor for post-workout indulgence",
-        "Cinnamon Roll protein shake sounds delicious",
-        "Mint Chocolate Chip like ice cream but protein",
-        "Caramel Apple for fall season launches",
-        "Watermelon would be very refreshing in the scorching summer."
-        "Lemon Cheesecake for dessert lovers",
-        "Pina Colada for tropical vibes",
-        "Tiramisu flavor would be so premium",
-        "Cookies and Cream is popular but make it better",
-        "Birthday Cake flavor for celebration",
-        "Maple Syrup with Pancake flavor",
-        "Hazelnut Praline for coffee shop vibes",
-        "Red Velvet Cake protein would sell out",
-        "Coconut Almond like Bounty chocolate",
-        "Mocha Frappe style protein",
-        "Banana Walnut Bread flavor",
-        "Cinnamon Sugar Donut protein",
-        "Apple Pie for American dessert lovers",
-        "Chocolate Peanut Butter Cup combo",
-        "Vanilla Bean with real specks",
-        "Matcha Green Tea for health conscious",
-        "Thandai flavor for festive season",
-        "Aam Panna for summer coolness",
-        "Kulfi flavor with cardamom notes",
-        "Badaam Milk traditional taste",
-        "Filter Coffee South Indian style",
-        "Jaggery sweetened natural protein"
-    ]
-    
-    sources = ['r/fitness', 'r/supplements', 'r/nutrition', 'r/bodybuilding', 'r/gainit', 'r/workout']
-    
-    data = []
-    for i, comment in enumerate(sample_comments):
-        data.append({
-            'text': comment,
-            'source': sources[i % len(sources)],
-            'score': (i * 7 + 3) % 100 + 10,
-            'comments': (i * 3) % 50 + 5,
-            'created': datetime.now()
-        })
-    
-    return pd.DataFrame(data)
-
-# Extract flavor mentions
-def extract_flavors(text):
-    """Extract and normalize flavor mentions"""
-    # Define flavor mappings to group similar mentions
-    flavor_mappings = {
-        'kesar pista': ['kesar pista', 'saffron pistachio', 'kesar', 'pista'],
-        'dark chocolate': ['dark chocolate', 'dark cocoa', 'dark choc'],
-        'mango lassi': ['mango lassi', 'lassi', 'mango'],
-        'masala chai': ['masala chai', 'chai', 'masala'],
-        'chocolate': ['chocolate', 'choco', 'cocoa'],
-        'vanilla': ['vanilla'],
-        'strawberry': ['strawberry', 'strawberries'],
-        'banana': ['banana'],
-        'coffee': ['coffee', 'mocha'],
-        'caramel': ['caramel', 'butterscotch'],
-        'mint': ['mint', 'peppermint'],
-        'berry': ['berry', 'blueberry', 'cranberry'],
-        'coconut': ['coconut'],
-        'peanut butter': ['peanut butter', 'peanut'],
-        'orange': ['orange', 'citrus'],
-        'honey': ['honey'],
-        'watermelon': ['watermelon'],
-        'rose': ['rose', 'gulkand'],
-        'litchi': ['litchi', 'lychee'],
-        'butterscotch': ['butterscotch', 'toffee'],
-        'grape': ['grape']
-    }
-    
-    text_lower = text.lower()
-    found_flavors = []
-    
-    # Check for compound flavors first (longer matches)
-    for canonical_flavor, variants in flavor_mappings.items():
-        for variant in variants:
-            if variant in text_lower:
-                found_flavors.append(canonical_flavor)
-                break  # Only add once per canonical flavor
-    
-    return found_flavors
-
-# Generate sample analysis for fallback
-def generate_sample_analysis():
-    """Generate sample analysis when API fails"""
-    return {
-        "recommended": [
-            {
-                "flavor": "Kesar Pista (Saffron Pistachio)",
-                "brand": "MuscleBlaze",
-                "product_type": "Whey Protein",
-                "why": "Users are requesting authentic Indian premium flavors that feel luxurious and unique",
-                "confidence": "High",
-                "user_pain_point": "Lack of Indian-inspired flavors in protein supplements"
-            },
-            {
-                "flavor": "Dark Cocoa",
-                "brand": "MuscleBlaze",
-                "product_type": "Whey Protein",
-                "why": "Multiple complaints that current chocolate flavors are too sweet and artificial",
-                "confidence": "High",
-                "user_pain_point": "Overly sweet chocolate protein causing taste fatigue"
-            },
-            {
-                "flavor": "Mango Lassi",
-                "brand": "HK Vitals",
-                "product_type": "Electrolyte Drink",
-                "why": "Popular summer flavor request that combines hydration with familiar taste",
-                "confidence": "Medium",
-                "user_pain_point": "Need refreshing summer flavors for post-workout hydration"
-            },
-            {
-                "flavor": "Masala Chai",
-                "brand": "TrueBasics",
-                "product_type": "Protein Powder",
-                "why": "Users want innovative Indian flavors that break from boring coffee and vanilla",
-                "confidence": "High",
-                "user_pain_point": "Repetitive flavor options in daily supplements"
-            },
-            {
-                "flavor": "Blueberry (Natural Extract)",
-                "brand": "HK Vitals",
-                "product_type": "Gummies",
-                "why": "Trending flavor but users complain most brands make it too artificial",
-                "confidence": "Medium",
-                "user_pain_point": "Artificial-tasting blueberry supplements"
-            }
-        ],
-        "rejected": [
-            {
-                "flavor": "Salted Caramel",
-                "reason": "Market is already oversaturated with this flavor; low differentiation opportunity"
-            },
-            {
-                "flavor": "Vanilla",
-                "reason": "Too plain and boring according to user feedback; needs enhancement like Vanilla Honey"
-            },
-            {
-                "flavor": "Green Apple (Artificial)",
-                "reason": "Users specifically complain about chemical taste in artificial green apple flavors"
-            },
-            {
-                "flavor": "Regular Coffee",
-                "reason": "Standard coffee flavor is oversaturated; users want innovative variants"
-            },
-            {
-                "flavor": "Strawberry",
-                "reason": "Generic strawberry without differentiation won't stand out in crowded market"
-            }
-        ],
-        "golden_candidate": {
-            "flavor": "Kesar Pista (Saffron Pistachio)",
-            "brand": "MuscleBlaze",
-            "product_type": "Biozyme Whey Protein",
-            "why": "Premium Indian flavor that doesn't exist in the market, highly requested by users who want authentic tastes",
-            "market_opportunity": "First-mover advantage in Indian fusion premium protein flavors with strong cultural resonance"
-        }
-    }
-
-# Analyze with Groq LLM
-def analyze_with_groq(api_key, data_text, brand_context):
-    """Use Groq API for analysis"""
-    try:
-        client = Groq(api_key=api_key)
-
-        
-        # Format brand list for prompt
-        brand_list = ", ".join(brand_context) if isinstance(brand_context, list) else brand_context
-        
-        prompt = f"""You are a flavor innovation analyst for HealthKart's brands.
-
-IMPORTANT: Only analyze for these specific brands: {brand_list}
-
-Brand Guidelines:
-- MuscleBlaze: Hardcore gym supplements for serious athletes (Whey Protein, Mass Gainers, Pre-workout)
-- HK Vitals: Wellness and lifestyle supplements for everyday health (Multivitamins, Omega-3, Immunity boosters)
-- TrueBasics: Science-backed nutrition for holistic wellness (Targeted supplements, Functional nutrition)
-
-Analyze these social media comments about supplement flavors:
-
-{data_text}
-
-Your task:
-1. Identify the top 5 most promising NEW flavor ideas - ONLY for the brands: {brand_list}
-2. Identify 5 ideas to REJECT and why
-3. Pick the #1 GOLDEN CANDIDATE with strongest market potential - MUST be from: {brand_list}
-
-CRITICAL: Only recommend flavors for {brand_list}. Do not suggest flavors for brands not in this list.
-
-For each recommendation:
-- Suggest which brand it fits FROM THIS LIST ONLY: {brand_list}
-- Explain WHY it works in ONE simple sentence (no technical jargon)
-- Rate confidence: High/Medium/Low
-
-Return ONLY valid JSON in this exact format:
-{{
-  "recommended": [
-    {{
-      "flavor": "Flavor Name",
-      "brand": "Brand Name",
-      "product_type": "Whey Protein/Gummies/Pre-workout/etc",
-      "why": "Simple one-sentence explanation",
-      "confidence": "High/Medium/Low",
-      "user_pain_point": "What problem this solves"
-    }}
-  ],
-  "rejected": [
-    {{
-      "flavor": "Flavor Name",
-      "reason": "Why this won't work"
-    }}
-  ],
-  "golden_candidate": {{
-    "flavor": "Flavor Name",
-    "brand": "Brand Name",
-    "product_type": "Product Type",
-    "why": "Compelling reason",
-    "market_opportunity": "Market insight"
-  }}
-}}"""
-
-        chat_completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        response_text = chat_completion.choices[0].message.content
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        
-        if json_match:
-            return json.loads(json_match.group())
-        else:
-            return json.loads(response_text)
-            
-    except json.JSONDecodeError as je:
-        st.error(f"Failed to parse AI response: {str(je)}")
-        return None
-    except Exception as e:
-        error_msg = str(e)
-        if "authentication" in error_msg.lower() or "api key" in error_msg.lower():
-            st.error("❌ Invalid API key. Please update GROQ_API_KEY at line 16 in app.py")
-        elif "rate limit" in error_msg.lower():
-            st.error("⏱️ Rate limit exceeded. Please wait a minute and try again.")
-        else:
-            st.error(f"Groq API Error: {error_msg}")
-        return None
+                st.caption("Nothing timed in this run (all results came from session state).")
+            st.download_button("Download trace (JSON)", tracer.to_json(), file_name="flavorscout.trace.json",
+                               mime="application/json")
+            profilers = ["Off", "cProfile"]
+            if importlib.util.find_spec("pyinstrument"):
+                profilers.append("pyinstrument")
+            st.radio("Profile next run", profilers, key="profile_kind", horizontal=True)
+            if tracer.profile_text:
+                st.code(tracer.profile_text)
 
 # Main App
 def main():
+    """Run the page with timing spans (and the chosen profiler), then show the Performance panel"""
+    tracer = Tracer("streamlit")
+    profiler = st.session_state.get("profile_kind", "Off")
+    with use_tracer(tracer):
+        if profiler == "Off":
+            run_app()
+        else:
+            with tracer.profiling(profiler.lower()):
+                run_app()
+    render_performance_panel(tracer)
+
+# Page body
+def run_app():
     # Header
     st.markdown('<div class="main-header"><span class="pulse-icon">🔍</span> Flavor Scout Engine</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">AI-Powered Flavor Discovery for HealthKart Brands 🚀</div>', unsafe_allow_html=True)
@@ -875,11 +598,17 @@ def main():
                 reddit_subs = []
                 post_limit = 10
             
+            force_refresh = st.checkbox(
+                "Fetch new items now",
+                help="Refresh every selected source instead of only those not updated in the last hour"
+            )
+            
         else:
             data_sources = []
             amazon_terms = []
             reddit_subs = []
             post_limit = 10
+            force_refresh = False
         
         st.divider()
         
@@ -891,6 +620,22 @@ def main():
             default=["MuscleBlaze", "HK Vitals", "TrueBasics"]
         )
         
+        # How much of the corpus the AI sees
+        analysis_depth = st.radio(
+            "Analysis Depth",
+            ["Quick (best reviews, one call)", "Full corpus (parallel chunks)"],
+            help="Quick packs the most flavor-rich, engaged and source-diverse reviews into one prompt"
+        )
+        context_budget = 1500
+        if analysis_depth.startswith("Quick"):
+            context_budget = st.slider("AI Context Budget (tokens)", 500, 6000, 1500, step=250)
+        
+        discover_new_flavors = st.checkbox(
+            "Discover new flavors",
+            value=True,
+            help="Also count flavor names found in the data (e.g. Thandai, Aam Panna), not just the built-in list"
+        )
+        
         st.divider()
         
         # Confidence Legend
@@ -915,65 +660,110 @@ def main():
         
         st.divider()
         
+        # Analysis cache counters
+        cache_stats = get_analysis_cache().stats()
+        st.caption(f"AI cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['entries']} stored)")
+        
+        # Per-model latency from the router (once an analysis has loaded it)
+        if st.session_state.analysis_complete:
+            with st.expander("Model Latency"):
+                for stats in get_model_router(GROQ_API_KEY).stats():
+                    p95 = f"{stats['p95']:.1f}s" if stats['p95'] is not None else "n/a"
+                    first_token = f"{stats['first_token_p95']:.1f}s" if stats['first_token_p95'] is not None else "n/a"
+                    st.caption(f"**{stats['route']}** · {stats['wins']}/{stats['calls']} answered · p95 {p95} · "
+                               f"first token p95 {first_token} · "
+                               f"{stats['rate_limited']} rate-limited · {stats['hedges']} hedged")
+        
         # Action button
         if st.button("Start Analysis", type="primary", use_container_width=True):
             st.session_state.data_loaded = False
             st.session_state.analysis_complete = False
+            st.session_state.pop('response_timings', None)
+            cancel_session_jobs()
             st.rerun()
     
     # Load and analyze data
+    config = snapshot_config(
+        source='live' if data_source == "Live Scraping" else 'sample',
+        brands=brand_filter,
+        depth='quick' if analysis_depth.startswith("Quick") else 'full',
+        context_budget=context_budget,
+        discover=discover_new_flavors,
+        data_sources=data_sources,
+        amazon_terms=amazon_terms,
+        reddit_subs=reddit_subs,
+        post_limit=post_limit,
+    )
+    if st.session_state.data_loaded == False and not force_refresh:
+        snapshot = get_snapshot_refresher().store.load(config)
+        if snapshot is not None:
+            st.session_state.df = snapshot.frame
+            st.session_state.flavor_index = snapshot.flavor_index
+            st.session_state.trends = snapshot.trends
+            st.session_state.demand = snapshot.demand
+            st.session_state.word_cloud_png = snapshot.word_cloud_png
+            st.session_state.analysis = snapshot.analysis
+            st.session_state.snapshot_created = snapshot.created
+            st.session_state.data_loaded = True
+            st.session_state.analysis_complete = True
+            if snapshot.is_stale():
+                refresh_snapshot(config)
+    
     if st.session_state.data_loaded == False:
-        with st.spinner("Gathering market intelligence..."):
-            if data_source == "Live Scraping":
-                df = scrape_live_data(data_sources, amazon_terms, reddit_subs, post_limit)
-                if len(df) == 0:
-                    st.warning("⚠️ No live data collected. Using sample data.")
-                    df = generate_sample_data()
+        st.session_state.pop('snapshot_created', None)
+        review_store = get_review_store() if config['source'] == 'live' else None
+        job = session_job('load_job', load_data_job, config, force_refresh, review_store, name='load',
+                          key=('load', data_key(config), force_refresh), reuse_for=0 if force_refresh else 60)
+        if job.done:
+            finish_job('load_job', job)
+            if job.error is None:
+                loaded = job.result
             else:
+                st.error(f"❌ Data collection failed ({job.error}). Using sample data.")
                 df = generate_sample_data()
-            
-            st.session_state.df = df
+                loaded = {'config': config, 'df': df, 'views': flavor_views(df, discover_new_flavors),
+                          'fallback': config['source'] == 'live'}
+            # The load job is shared by every configuration with the same data part, and the sidebar may
+            # have changed while it ran: analyze the data as loaded with this session's analysis settings
+            st.session_state.data_config = {**loaded['config'], **{name: config[name] for name in ANALYSIS_FIELDS}}
+            st.session_state.data_fallback = loaded['fallback']
+            st.session_state.df = loaded['df']
+            st.session_state.flavor_index, st.session_state.trends, st.session_state.demand = loaded['views']
+            st.session_state.pop('word_cloud_png', None)
             st.session_state.data_loaded = True
+        else:
+            job_progress(job.id, brand_filter)
     
     if st.session_state.data_loaded and not st.session_state.analysis_complete:
-        df = st.session_state.df
-        
-        with st.spinner("AI is analyzing trends..."):
-            sample_texts = df.head(20)['text'].tolist()
-            combined_text = "\n".join([f"- {text[:200]}" for text in sample_texts])
-            
-            # Pass brand filter as list
-            analysis = analyze_with_groq(GROQ_API_KEY, combined_text, brand_filter)
-            
-            if analysis:
-                # Filter recommendations to only include selected brands
-                if 'recommended' in analysis:
-                    filtered_recs = []
-                    for rec in analysis['recommended']:
-                        if any(brand.lower() in rec.get('brand', '').lower() for brand in brand_filter):
-                            filtered_recs.append(rec)
-                    analysis['recommended'] = filtered_recs
-                
-                # Filter golden candidate
-                if 'golden_candidate' in analysis:
-                    golden_brand = analysis['golden_candidate'].get('brand', '')
-                    if not any(brand.lower() in golden_brand.lower() for brand in brand_filter):
-                        # Replace with first recommendation if golden doesn't match
-                        if analysis.get('recommended'):
-                            analysis['golden_candidate'] = {
-                                'flavor': analysis['recommended'][0].get('flavor'),
-                                'brand': analysis['recommended'][0].get('brand'),
-                                'product_type': analysis['recommended'][0].get('product_type'),
-                                'why': analysis['recommended'][0].get('why'),
-                                'market_opportunity': f"Strong demand from {analysis['recommended'][0].get('brand')} target audience"
-                            }
-                
-                st.session_state.analysis = analysis
-                st.session_state.analysis_complete = True
+        views = (st.session_state.flavor_index, st.session_state.trends, st.session_state.demand)
+        # Sessions that share a loaded frame (same load job) and settings share the Groq call; the id
+        # cannot be reused by another frame while the unfinished job still holds this one
+        # Stand-in data for a live configuration is analyzed but never saved as its snapshot
+        data_config = st.session_state.data_config
+        store = None if st.session_state.data_fallback else get_snapshot_refresher().store
+        job = session_job('analysis_job', analysis_job, data_config, st.session_state.df, views,
+                          get_model_router(GROQ_API_KEY), get_analysis_cache(), store,
+                          name='analysis', key=('analysis', snapshot_key(data_config), id(st.session_state.df)))
+        if job.done:
+            finish_job('analysis_job', job)
+            result = job.result or {}
+            if job.error is not None:
+                report_groq_error(job.error)
+            if result.get('analysis'):
+                st.session_state.analysis = result['analysis']
+                st.session_state.word_cloud_png = result['word_cloud_png']
+                cards = streamed_cards(job.items, brand_filter)
+                st.session_state.response_timings = {
+                    'first_card': cards[0][0] if cards else None,
+                    'total': result['seconds'],
+                }
             else:
                 st.warning("⚠️ Using sample analysis due to API error.")
                 st.session_state.analysis = generate_sample_analysis()
-                st.session_state.analysis_complete = True
+            st.session_state.analysis_complete = True
+        else:
+            job_progress(job.id, brand_filter)
     
     # Display results
     if st.session_state.analysis_complete:
@@ -988,6 +778,12 @@ def main():
             st.metric("Recommendations", len(analysis.get('recommended', [])))
         with col3:
             st.metric("Ideas Rejected", len(analysis.get('rejected', [])))       
+        if 'snapshot_created' in st.session_state:
+            minutes = int((time.time() - st.session_state.snapshot_created) // 60)
+            st.caption(f"📦 Loaded precomputed snapshot from {minutes} min ago · refreshed in the background when stale")
+        timings = st.session_state.get('response_timings')
+        if timings and timings['first_card'] is not None:
+            st.caption(f"⚡ First card in {timings['first_card']:.1f}s (full AI response {timings['total']:.1f}s)")
         st.divider()
         
         # Golden Candidate
@@ -995,34 +791,7 @@ def main():
         golden = analysis.get('golden_candidate', {})
         
         if golden:
-            brand = golden.get('brand', 'N/A')
-            brand_class = 'brand-muscleblaze'
-            if 'HK Vitals' in brand:
-                brand_class = 'brand-hkvitals'
-            elif 'TrueBasics' in brand:
-                brand_class = 'brand-truebasics'
-            
-            st.markdown(f"""
-            <div class="golden-card">
-                <div style="text-align:center; font-size:3rem; margin-bottom:1rem;"></div>
-                <h1 style="margin:0; color:white; text-align:center; font-size:2.5rem;">{golden.get('flavor', 'N/A')}</h1>
-                <div style="text-align:center; margin:1rem 0;">
-                    <span class="brand-badge {brand_class}" style="font-size:1rem;">{brand}</span>
-                </div>
-                <h3 style="margin:0.5rem 0; color:#ffe6e6; text-align:center; font-weight:400;">
-                    {golden.get('product_type', 'N/A')}
-                </h3>
-                <hr style="border:none; border-top:2px solid rgba(255,255,255,0.3); margin:1.5rem 0;">
-                <p style="font-size:1.2rem; margin:1rem 0; color:white; line-height:1.6;">
-                    <strong>Why This Works:</strong><br/>
-                    {golden.get('why', 'N/A')}
-                </p>
-                <p style="font-size:1rem; color:#ffe6e6; line-height:1.6; margin-top:1.5rem;">
-                    <strong>Market Opportunity:</strong><br/>
-                    {golden.get('market_opportunity', 'Strong consumer demand')}
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(golden_card_html(golden), unsafe_allow_html=True)
         
         st.divider()
         
@@ -1033,32 +802,7 @@ def main():
             st.markdown("## Selected Ideas")
             
             for idx, rec in enumerate(analysis.get('recommended', []), 1):
-                confidence = rec.get('confidence', 'Medium')
-                confidence_class = f"confidence-{confidence.lower()}"
-                brand = rec.get('brand', 'N/A')
-                
-                # Determine brand badge class
-                brand_class = 'brand-muscleblaze'
-                if 'HK Vitals' in brand:
-                    brand_class = 'brand-hkvitals'
-                elif 'TrueBasics' in brand:
-                    brand_class = 'brand-truebasics'
-                
-                st.markdown(f"""
-                <div class="recommendation-box">
-                    <h3 style="margin-top:0;">{idx}. {rec.get('flavor', 'N/A')} 
-                        <span class="confidence-badge {confidence_class}">{confidence}</span>
-                    </h3>
-                    <div>
-                        <span class="brand-badge {brand_class}">🏷️ {brand}</span>
-                        <span style="color:#666; font-weight:500;">For: {rec.get('product_type', 'N/A')}</span>
-                    </div>
-                    <p style="margin:1rem 0;"><strong>Why:</strong> {rec.get('why', 'N/A')}</p>
-                    <p style="color:#666; font-size:0.9rem; margin:0.5rem 0;">
-                        <strong>Solves:</strong> {rec.get('user_pain_point', 'Consumer need')}
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(recommendation_card_html(idx, rec), unsafe_allow_html=True)
         
         with col_right:
             st.markdown("## Rejected Ideas")
@@ -1078,58 +822,7 @@ def main():
         st.divider()
         
         # Visualizations
-        st.markdown("## Trend Wall")
-        
-        tab1, tab2 = st.tabs(["Word Cloud", "Keyword Frequency"])
-        
-        with tab1:
-            all_text = " ".join(df['text'].tolist())
-            
-            if len(all_text) > 100:
-                wordcloud = WordCloud(
-                    width=1200, height=600,
-                    background_color='white',
-                    colormap='viridis'
-                ).generate(all_text)
-                
-                fig, ax = plt.subplots(figsize=(15, 8))
-                ax.imshow(wordcloud, interpolation='bilinear')
-                ax.axis('off')
-                st.pyplot(fig)
-        
-        with tab2:
-            all_flavors = []
-            for text in df['text']:
-                all_flavors.extend(extract_flavors(text))
-            
-            if all_flavors:
-                flavor_counts = Counter(all_flavors).most_common(15)
-                # Capitalize for better display
-                flavor_df = pd.DataFrame(
-                    [(flavor.title(), count) for flavor, count in flavor_counts],
-                    columns=['Flavor', 'Count']
-                )
-                
-                fig = px.bar(
-                    flavor_df, 
-                    x='Count', 
-                    y='Flavor', 
-                    orientation='h',
-                    title='Top Flavor Keywords (Normalized)',
-                    color='Count',
-                    color_continuous_scale='Viridis',
-                    text='Count'
-                )
-                fig.update_traces(textposition='outside')
-                fig.update_layout(
-                    height=500,
-                    showlegend=False,
-                    yaxis={'categoryorder':'total ascending'}
-                )
-                st.plotly_chart(fig, width='stretch')
-            else:
-                st.info("No flavor keywords detected in the data.")
-        
+        render_trend_wall(df)
 
 if __name__ == "__main__":
 
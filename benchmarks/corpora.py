@@ -0,0 +1,60 @@
+"""Deterministic synthetic review corpora for the benchmarks.
+
+Texts recombine sentences from the app's own sample and competitor data
+(generate_sample_data / generate_competitor_reviews), so flavor density,
+length and vocabulary match what the pipeline sees; sources, scores,
+comment counts and timestamps are drawn per review. The same size and
+seed always give the same corpus.
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import Review, ReviewTable  # noqa: E402
+from sample_data import generate_competitor_reviews, generate_sample_data  # noqa: E402
+
+SIZES = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+AMAZON_SOURCES = [f'Amazon ({term})' for term in ('whey protein', 'mass gainer', 'pre workout', 'multivitamin')]
+
+FILLERS = ["Honestly", "Tbh", "Update:", "Ordered twice.", "3 months in.", "Gym bro here.", "", "", ""]
+
+
+def vocabulary():
+    """(sentences, sources) taken from the sample and competitor datasets"""
+    sample = generate_sample_data()
+    competitor = generate_competitor_reviews(max_reviews=100)
+    sentences = sample['text'].tolist() + competitor['text'].tolist()
+    sources = sorted(set(sample['source'])) + sorted(set(competitor['source'])) + AMAZON_SOURCES
+    return sentences, sources
+
+
+def iter_corpus(size, seed=0, days=90):
+    """Yield `size` Review records spread over the last `days` days"""
+    rng = random.Random(seed)
+    sentences, sources = vocabulary()
+    end = datetime(2025, 1, 1)
+    span_seconds = days * 24 * 3600
+    for i in range(size):
+        parts = [rng.choice(FILLERS)] + rng.sample(sentences, rng.randint(1, 3))
+        yield Review(
+            text=' '.join(part for part in parts if part) + f" #{i}",
+            source=rng.choice(sources),
+            score=int(rng.paretovariate(1.5)) * 3,
+            comments=int(rng.paretovariate(2.0)),
+            created=end - timedelta(seconds=rng.randrange(span_seconds)),
+            kind='synthetic',
+        )
+
+
+def corpus(size, seed=0):
+    """A synthetic corpus as a list of Review records"""
+    return list(iter_corpus(size, seed))
+
+
+def corpus_frame(size, seed=0):
+    """A synthetic corpus as the app's review DataFrame"""
+    return ReviewTable.from_reviews(iter_corpus(size, seed)).to_frame()
@@ -0,0 +1,63 @@
+"""Near-duplicate filtering cost as the corpus grows.
+
+    python benchmarks/dedup_scaling.py [--sizes 1000 10000 50000] [--dup-rate 0.2]
+
+Generates reviews from a small vocabulary, re-emits a share of them with
+one word changed (Jaccard ~0.7, right at the default threshold), and
+reports time per review and how many were dropped for each corpus size.
+Time per review should stay flat (linear total time).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DuplicateFilter  # noqa: E402
+from records import Review  # noqa: E402
+
+WORDS = ("love the chocolate but want kesar pista or mango next time too sweet mixes well great taste "
+         "bad smell whey gym price value lumps bloating vanilla coffee daily shake recovery").split()
+SOURCES = ['Amazon (whey protein)', 'Amazon (mass gainer)', 'r/fitness', 'r/supplements']
+
+
+def corpus(size, dup_rate, seed=0):
+    """(reviews, planted duplicate count): originals of 20 words, some repeated with one word swapped"""
+    rng = random.Random(seed)
+    originals = []
+    reviews = []
+    planted = 0
+    for _ in range(size):
+        if originals and rng.random() < dup_rate:
+            words = list(rng.choice(originals))
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+            planted += 1
+        else:
+            words = [rng.choice(WORDS) for _ in range(20)]
+            originals.append(words)
+        reviews.append(Review(' '.join(words), rng.choice(SOURCES)))
+    return reviews, planted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--dup-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"  {'reviews':>8} {'planted':>8} {'dropped':>8} {'us/review':>10}")
+    for size in args.sizes:
+        reviews, planted = corpus(size, args.dup_rate)
+        duplicates = DuplicateFilter()
+        started = time.perf_counter()
+        for _ in duplicates.filter(reviews):
+            pass
+        seconds = time.perf_counter() - started
+        print(f"  {size:8} {planted:8} {sum(duplicates.dropped.values()):8} {seconds / size * 1e6:10.1f}")
+    print(f"\nlast run: {duplicates.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Regenerate the saved Amazon/Reddit fixture pages used by the benchmarks.
+
+    python benchmarks/fixtures/make_fixtures.py
+
+The pages mimic the structure of amazon.in search and product-reviews
+pages: a large header/nav, inline scripts and styles, and result/review
+blocks carrying the same `s-search-result` / `data-hook="review"` hooks the
+scrapers select on. The Reddit fixture is a `hot.json` listing with the
+fields the API returns per post. Output is deterministic.
+"""
+import json
+import os
+import random
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PHRASES = [
+    "Great whey protein but wish it came in more flavors",
+    "Mixability is perfect but the chocolate is too sweet",
+    "Would love a kesar pista or mango lassi variant",
+    "Value for money, vanilla tastes a bit artificial",
+    "Packaging was damaged but the product is genuine",
+    "Dark chocolate flavor is the best I have tried",
+]
+
+
+def chrome(rng, title, body):
+    scripts = "\n".join(
+        f"<script type=\"text/javascript\">var P{i}={{'w':{rng.randint(0, 10**6)},'k':'{'x' * rng.randint(200, 800)}'}};</script>"
+        for i in range(40)
+    )
+    nav = "".join(
+        f'<li class="nav-item"><a href="/gp/browse/{i}" class="nav-a">Category {i}</a>'
+        f'<div class="nav-flyout"><span>{"Sub " * 10}</span></div></li>'
+        for i in range(150)
+    )
+    footer = '<p class="footer-line">Conditions of Use &amp; Sale</p>' * 80
+    return (
+        "<!doctype html><html lang=\"en-in\"><head><meta charset=\"utf-8\">"
+        f"<title>{title}</title><style>{'.a-box{margin:0 auto;padding:4px}' * 200}</style>{scripts}</head>"
+        f"<body><div id=\"navbar\"><ul>{nav}</ul></div><div id=\"main\">{body}</div>"
+        f"<div id=\"footer\">{footer}</div></body></html>"
+    )
+
+
+def search_page(rng, results=48):
+    items = []
+    for i in range(results):
+        asin = f"B0{rng.randint(10**7, 10**8 - 1)}"
+        items.append(
+            f'<div data-asin="{asin}" data-index="{i}" data-component-type="s-search-result" class="s-result-item">'
+            f'<div class="sg-col-inner"><div class="a-section"><img src="https://m.media-amazon.com/images/I/{asin}.jpg" alt="">'
+            f'<h2 class="a-size-mini"><a class="a-link-normal" href="/dp/{asin}"><span class="a-text-normal">'
+            f'Protein Product {i} - {rng.choice(PHRASES)}</span></a></h2>'
+            f'<div class="a-row"><span class="a-icon-alt">{rng.randint(30, 50) / 10} out of 5 stars</span>'
+            f'<span class="a-size-base">{rng.randint(10, 9999)}</span></div>'
+            f'<span class="a-price"><span class="a-offscreen">₹{rng.randint(999, 4999)}</span></span>'
+            f'</div></div></div>'
+        )
+        if i % 6 == 5:
+            items.append('<div class="s-widget-container"><div class="sponsored">' + "Ad " * 50 + '</div></div>')
+    return chrome(rng, "Amazon.in : whey protein", "".join(items))
+
+
+def reviews_page(rng, reviews=10):
+    items = []
+    for i in range(reviews):
+        text = " ".join(rng.choice(PHRASES) + "." for _ in range(rng.randint(2, 6)))
+        items.append(
+            f'<div id="R{rng.randint(10**11, 10**12 - 1):X}" data-hook="review" class="a-section review aok-relative">'
+            f'<div class="a-profile-content"><span class="a-profile-name">Customer {i}</span></div>'
+            f'<a class="a-link-normal" href="#"><i data-hook="review-star-rating" class="a-icon a-icon-star">'
+            f'<span class="a-icon-alt">{rng.randint(1, 5)}.0 out of 5 stars</span></i></a>'
+            f'<span data-hook="review-date" class="review-date">Reviewed in India on {rng.randint(1, 28)} March 2024</span>'
+            f'<span data-hook="review-body" class="a-size-base review-text"><span>{text}</span></span>'
+            f'<span data-hook="helpful-vote-statement">{rng.randint(1, 99)} people found this helpful</span>'
+            f'</div>'
+        )
+    return chrome(rng, "Amazon.in:Customer reviews", "".join(items))
+
+
+def reddit_listing(rng, posts=100, subreddit='supplements'):
+    children = []
+    for i in range(posts):
+        post_id = f"{rng.randint(36 ** 5, 36 ** 6 - 1):x}"
+        children.append({'kind': 't3', 'data': {
+            'id': post_id,
+            'name': f"t3_{post_id}",
+            'subreddit': subreddit,
+            'title': rng.choice(PHRASES),
+            'selftext': " ".join(rng.choice(PHRASES) + "." for _ in range(rng.randint(0, 8))),
+            'author': f"user{rng.randint(1, 10 ** 6)}",
+            'score': rng.randint(0, 2000),
+            'num_comments': rng.randint(0, 400),
+            'created_utc': 1_704_067_200 + rng.randint(0, 90 * 24 * 3600),
+            'permalink': f"/r/{subreddit}/comments/{post_id}/",
+            'url': f"https://www.reddit.com/r/{subreddit}/comments/{post_id}/",
+            'thumbnail': 'self',
+            'link_flair_text': rng.choice([None, 'Question', 'Review', 'Discussion']),
+            'preview': {'enabled': False, 'images': []},
+        }})
+    return json.dumps({'kind': 'Listing', 'data': {'after': f"t3_{post_id}", 'dist': posts, 'children': children}})
+
+
+def main():
+    rng = random.Random(42)
+    pages = {'amazon_search.html': search_page(rng), 'amazon_reviews.html': reviews_page(rng)}
+    pages['reddit_listing.json'] = reddit_listing(rng)
+    for name, html in pages.items():
+        with open(os.path.join(HERE, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+        print(f"{name}: {len(html.encode('utf-8')) / 1024:.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
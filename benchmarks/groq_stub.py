@@ -0,0 +1,114 @@
+"""Local stand-in for the Groq chat-completions API.
+
+    python benchmarks/groq_stub.py [--port 8765] [--delay 0.5] [--rate-limit-every 0]
+
+Point the app or the CLI at it with GROQ_BASE_URL=http://127.0.0.1:8765
+and any GROQ_API_KEY. It answers POST /openai/v1/chat/completions with the
+sample analysis, streamed as server-sent events when the request asks for
+`stream`. `delay` is the time before the first byte; `rate_limit_every`
+makes every n-th request a 429 with Retry-After: 1.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sample_data import generate_sample_analysis  # noqa: E402
+
+RESPONSE_TEXT = json.dumps(generate_sample_analysis(), indent=2)
+
+
+class StubGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0.0
+    rate_limit_every = 0
+    stream_chunk_chars = 40
+    counter = itertools.count(1)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        number = next(self.counter)
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            body = json.dumps({'error': {'message': 'Rate limit reached', 'type': 'rate_limit_exceeded'}}).encode()
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        time.sleep(self.delay)
+        model = request.get('model', 'stub')
+        if request.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(RESPONSE_TEXT), self.stream_chunk_chars):
+                chunk = {'id': 'stub', 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                         'choices': [{'index': 0, 'delta': {'content': RESPONSE_TEXT[start:start + self.stream_chunk_chars]},
+                                      'finish_reason': None}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        body = json.dumps({
+            'id': 'stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': RESPONSE_TEXT}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': len(json.dumps(request)) // 4, 'completion_tokens': len(RESPONSE_TEXT) // 4,
+                      'total_tokens': (len(json.dumps(request)) + len(RESPONSE_TEXT)) // 4},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, delay=0.0, rate_limit_every=0):
+    """Serve the stub on a background thread; returns the server (its URL is base_url(server))"""
+    handler = type('Handler', (StubGroqHandler,), {'delay': delay, 'rate_limit_every': rate_limit_every,
+                                                   'counter': itertools.count(1)})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds before each response")
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="answer every n-th request with a 429")
+    args = parser.parse_args()
+
+    server = start(args.port, args.delay, args.rate_limit_every)
+    print(f"Stub Groq API on {base_url(server)} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
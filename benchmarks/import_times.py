@@ -0,0 +1,60 @@
+"""Cold-start import time per module.
+
+    python benchmarks/import_times.py [--repeat 5] [--json out.json]
+
+Each module is imported in a fresh interpreter so nothing is shared between
+measurements; the median of --repeat runs is reported. The "app startup"
+group lists what app.py imports eagerly, the rest is loaded lazily.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = {
+    'app startup': ['streamlit', 'pandas', 'flavors', 'llm', 'analysis_cache', 'sample_data'],
+    'lazy: scraping': ['requests', 'lxml.html', 'fetcher', 'scrapers', 'review_store', 'pipeline'],
+    'lazy: analysis': ['groq'],
+    'lazy: plotting': ['plotly.express', 'wordcloud', 'visuals'],
+}
+
+SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_time(module, repeat):
+    """Median seconds to import `module` in a fresh interpreter"""
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', dest='json_path', default=None, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for group, modules in MODULES.items():
+        print(f"\n{group}")
+        for module in modules:
+            seconds = import_time(module, args.repeat)
+            results[module] = seconds
+            print(f"  {module:<20} {seconds * 1000:8.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Amazon page parsing: BeautifulSoup/html.parser (old path) vs lxml + XPath.
+
+    python benchmarks/parse_pages.py [--repeat 50] [--json out.json]
+
+Runs both parsers over the saved fixture pages in benchmarks/fixtures,
+checks they extract the same data, and reports median parse time and the
+memory held by each parsed document. Memory is the resident-set growth
+while the tree is alive, measured in a fresh interpreter per parser/page so
+C allocations (lxml) count too; it needs /proc (Linux).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from scrapers import parse_review_page, parse_search_asins  # noqa: E402
+
+PAGES = {
+    'search': os.path.join(HERE, 'fixtures', 'amazon_search.html'),
+    'reviews': os.path.join(HERE, 'fixtures', 'amazon_reviews.html'),
+}
+
+
+# Old path, as it was in scrape_amazon_reviews_live
+def bs4_search_asins(content, max_products=3):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    products = soup.find_all('div', {'data-component-type': 's-search-result'})
+    asins = [p.get('data-asin') for p in products if p.get('data-asin')]
+    return len(products), asins[:max_products]
+
+
+def bs4_review_page(content, term, limit=5):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, 'html.parser')
+    reviews = []
+    for review_div in soup.find_all('div', {'data-hook': 'review'})[:limit]:
+        review_body = review_div.find('span', {'data-hook': 'review-body'})
+        if review_body:
+            rating = review_div.find('i', {'data-hook': 'review-star-rating'})
+            rating_text = rating.get_text(strip=True) if rating else "5.0 out of 5 stars"
+            reviews.append((review_body.get_text(strip=True), int(float(rating_text.split()[0]))))
+    return reviews
+
+
+PARSERS = {
+    ('search', 'bs4'): lambda content: bs4_search_asins(content),
+    ('search', 'lxml'): lambda content: parse_search_asins(content),
+    ('reviews', 'bs4'): lambda content: bs4_review_page(content, 'whey protein'),
+    ('reviews', 'lxml'): lambda content: [(r.text, r.score) for r in parse_review_page(content, 'whey protein')],
+}
+
+
+def read(page):
+    with open(PAGES[page], 'rb') as f:
+        return f.read()
+
+
+def time_parser(page, parser, repeat):
+    content = read(page)
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        PARSERS[(page, parser)](content)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def tree_memory(page, parser):
+    """Resident memory (KB) held by one parsed page, measured in a fresh interpreter"""
+    out = subprocess.run(
+        [sys.executable, __file__, '--memory-probe', page, parser],
+        capture_output=True, text=True, check=True,
+    )
+    return int(out.stdout.strip())
+
+
+def resident_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def memory_probe(page, parser):
+    import lxml.html
+    from bs4 import BeautifulSoup
+
+    content = read(page)
+    baseline = resident_kb()
+    if parser == 'bs4':
+        tree = BeautifulSoup(content, 'html.parser')
+    else:
+        tree = lxml.html.fromstring(content)
+    print(resident_kb() - baseline)
+    del tree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--json', dest='json_path', default=None, help="also write results to this file")
+    parser.add_argument('--memory-probe', nargs=2, metavar=('PAGE', 'PARSER'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.memory_probe:
+        memory_probe(*args.memory_probe)
+        return
+
+    results = {}
+    for page in PAGES:
+        content = read(page)
+        if PARSERS[(page, 'bs4')](content) != PARSERS[(page, 'lxml')](content):
+            raise SystemExit(f"bs4 and lxml parsers disagree on the {page} page")
+
+        print(f"\n{page} page ({len(content) / 1024:.0f} KB)")
+        for name in ('bs4', 'lxml'):
+            seconds = time_parser(page, name, args.repeat)
+            memory_kb = tree_memory(page, name)
+            results[f'{page}/{name}'] = {'seconds': seconds, 'tree_kb': memory_kb}
+            print(f"  {name:<5} {seconds * 1000:8.2f} ms  {memory_kb:8d} KB parsed tree")
+        speedup = results[f'{page}/bs4']['seconds'] / results[f'{page}/lxml']['seconds']
+        print(f"  lxml is {speedup:.1f}x faster")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
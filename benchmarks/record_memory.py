@@ -0,0 +1,111 @@
+"""Memory per 100k reviews for each in-memory review representation.
+
+    python benchmarks/record_memory.py [--rows 100000] [--json out.json]
+
+Builds the same synthetic corpus (repeated source labels, unique texts)
+as list of row dicts, the DataFrame built from them, list of Review
+records, and ReviewTable / its DataFrame view, and reports the bytes
+allocated for each (tracemalloc, so numpy buffers count) scaled to 100k
+reviews, plus build time.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import pandas as pd  # noqa: E402
+
+from records import Review, ReviewTable  # noqa: E402
+
+SOURCES = [f'Amazon ({term})' for term in ('whey protein', 'mass gainer', 'pre workout', 'multivitamin')] + \
+          [f'r/{sub}' for sub in ('fitness', 'supplements', 'nutrition', 'bodybuilding', 'gainit', 'workout')]
+
+
+def synthetic_reviews(rows):
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        yield Review(
+            text=f"Review {i}: love the chocolate but want kesar pista or mango next time",
+            source=SOURCES[i % len(SOURCES)],
+            score=i % 5 + 1,
+            comments=i % 40,
+            created=start + timedelta(minutes=i),
+        )
+
+
+def build_dicts(rows):
+    return [review.as_row() for review in synthetic_reviews(rows)]
+
+
+def build_dict_frame(rows):
+    return pd.DataFrame(build_dicts(rows))
+
+
+def build_records(rows):
+    return list(synthetic_reviews(rows))
+
+
+def build_table(rows):
+    return ReviewTable.from_reviews(synthetic_reviews(rows))
+
+
+def build_table_frame(rows):
+    return build_table(rows).to_frame()
+
+
+CASES = {
+    'list of row dicts': build_dicts,
+    'DataFrame from dicts': build_dict_frame,
+    'list of Review (slots)': build_records,
+    'ReviewTable': build_table,
+    'ReviewTable.to_frame()': build_table_frame,
+}
+
+
+def measure(build, rows):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(rows)
+    seconds = time.perf_counter() - started
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'held_bytes': held, 'peak_bytes': peak, 'seconds': seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    scale = 100_000 / args.rows
+    results = {}
+    print(f"{args.rows} reviews, {len(SOURCES)} distinct sources; MB per 100k reviews\n")
+    print(f"  {'representation':26} {'held':>8} {'peak':>8} {'build':>9}")
+    for name, build in CASES.items():
+        result = measure(build, args.rows)
+        results[name] = result
+        print(f"  {name:26} {result['held_bytes'] * scale / 2**20:8.1f} "
+              f"{result['peak_bytes'] * scale / 2**20:8.1f} {result['seconds'] * 1000:7.0f}ms")
+
+    baseline = results['DataFrame from dicts']['held_bytes']
+    print(f"\nReviewTable holds {baseline / results['ReviewTable']['held_bytes']:.1f}x less than "
+          f"the DataFrame built from row dicts")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Analysis under load: one model vs the ModelRouter, against fake backends.
+
+    python benchmarks/router_load.py [--requests 120] [--concurrency 6] [--seed 0]
+
+The fake "large" backend has a heavy latency tail and starts answering
+429 after a burst of requests; the fake "small" backend is fast and
+reliable. Each setup answers the same requests and the script reports how
+many completed, end-to-end p50/p95, and the router's per-model stats.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from router import ModelRoute, ModelRouter  # noqa: E402
+
+RESPONSE = '{"recommended": [], "rejected": [], "golden_candidate": {"flavor": "Mango Lassi"}}'
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeClient:
+    """Chat-completions stand-in with injected latency and errors.
+
+    `latency(rng)` returns seconds to sleep; beyond `burst` admitted calls
+    within `window` seconds it raises a 429, and `error_rate` of calls raise a 500.
+    """
+
+    def __init__(self, latency, burst=None, window=1.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.burst = burst
+        self.window = window
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **request):
+        with self.lock:
+            now = time.monotonic()
+            self.calls = [t for t in self.calls if now - t < self.window]
+            limited = self.burst is not None and len(self.calls) >= self.burst
+            if not limited:
+                self.calls.append(now)
+            failed = self.rng.random() < self.error_rate
+            delay = self.latency(self.rng)
+        if limited:
+            raise RateLimitError("Error code: 429 - rate limit reached")
+        time.sleep(delay)
+        if failed:
+            raise RuntimeError("Error code: 500 - upstream error")
+        usage = SimpleNamespace(total_tokens=1500)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=RESPONSE))], usage=usage)
+
+
+def large_latency(rng):
+    # Mostly ~0.2s with a 10% tail at ~1.5s
+    return 1.5 if rng.random() < 0.1 else rng.uniform(0.15, 0.25)
+
+
+def small_latency(rng):
+    return rng.uniform(0.05, 0.1)
+
+
+def run(client, requests, concurrency):
+    def one(_):
+        started = time.perf_counter()
+        try:
+            client.chat.completions.create(model='large', messages=[], temperature=0.7, max_tokens=2000)
+            return time.perf_counter() - started
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    latencies = sorted(r for r in results if r is not None)
+    return {
+        'completed': len(latencies),
+        'p50': statistics.median(latencies) if latencies else None,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else None,
+    }
+
+
+def backends(seed):
+    large = FakeClient(large_latency, burst=8, window=1.0, error_rate=0.02, seed=seed)
+    small = FakeClient(small_latency, seed=seed + 1)
+    return large, small
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=120)
+    parser.add_argument('--concurrency', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    large, _ = backends(args.seed)
+    single = run(large, args.requests, args.concurrency)
+
+    large, small = backends(args.seed)
+    router = ModelRouter([
+        ModelRoute(large, 'large', provider='fake', expected_latency=0.4, cost_per_million_tokens=0.79),
+        ModelRoute(small, 'small', provider='fake', expected_latency=0.2, cost_per_million_tokens=0.08),
+    ], min_samples=10, cooldown=0.5)
+    routed = run(router, args.requests, args.concurrency)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent\n")
+    print(f"  {'setup':14} {'completed':>9} {'p50':>8} {'p95':>8}")
+    for name, result in (('large only', single), ('router', routed)):
+        p50 = f"{result['p50']:.2f}s" if result['p50'] is not None else '-'
+        p95 = f"{result['p95']:.2f}s" if result['p95'] is not None else '-'
+        print(f"  {name:14} {result['completed']:9} {p50:>8} {p95:>8}")
+
+    print("\nrouter per model:")
+    for stats in router.stats():
+        p95 = f"{stats['p95']:.2f}s" if stats['p95'] is not None else '-'
+        print(f"  {stats['route']:12} calls={stats['calls']} wins={stats['wins']} errors={stats['errors']} "
+              f"429s={stats['rate_limited']} hedges={stats['hedges']} p95={p95} cost=${stats['cost']:.4f}")
+        print(f"  {'':12} {stats['histogram']}")
+
+
+if __name__ == '__main__':
+    main()
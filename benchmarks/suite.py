@@ -0,0 +1,303 @@
+"""Core pipeline benchmark suite with comparable JSON reports.
+
+    python benchmarks/suite.py [--sizes 1k 100k 1m] [--only flavors. frame.] [--out report.json]
+    python benchmarks/suite.py --compare before.json after.json
+
+Corpus cases run on synthetic corpora (benchmarks/corpora.py) of each
+size; page cases parse the saved fixtures in benchmarks/fixtures; the
+groq cases make real SDK calls against the local stub server
+(benchmarks/groq_stub.py). Every case reports wall time, throughput and
+the peak memory it allocated (tracemalloc, measured in a second run so it
+does not skew the timing). Reports carry the git revision, so two of them
+can be compared with --compare.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import corpora  # noqa: E402
+from flavors import build_flavor_index, count_flavors, extract_flavors_corpus  # noqa: E402
+from dedup import DuplicateFilter  # noqa: E402
+from demand import DemandScorer  # noqa: E402
+from discovery import FlavorDiscovery  # noqa: E402
+from llm import build_prompt, iter_chunks, pack_reviews, request_analysis  # noqa: E402
+from records import ReviewTable  # noqa: E402
+from scrapers import parse_reddit_listing, parse_review_page, parse_search_asins  # noqa: E402
+from trends import TrendEngine  # noqa: E402
+
+FIXTURES = os.path.join(HERE, 'fixtures')
+BRANDS = ["MuscleBlaze", "HK Vitals", "TrueBasics"]
+
+
+def read_fixture(name, mode='rb'):
+    with open(os.path.join(FIXTURES, name), mode) as f:
+        return f.read()
+
+
+# Corpus cases: setup(reviews) builds the input outside the timed region,
+# run(input) is timed and returns the number of items it processed; cases
+# are skipped above their max corpus size
+def texts_of(reviews):
+    return [review.text for review in reviews]
+
+
+def frame_of(reviews):
+    return ReviewTable.from_reviews(reviews).to_frame()
+
+
+def same(reviews):
+    return reviews
+
+
+def wordcloud_case(texts):
+    import visuals
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        visuals.word_cloud_png(texts, cache_dir=cache_dir)
+    return len(texts)
+
+
+def pack_case(reviews):
+    build_prompt("\n".join(pack_reviews(reviews)), BRANDS)
+    return len(reviews)
+
+
+def chunks_case(texts):
+    for chunk in iter_chunks(texts):
+        build_prompt(chunk, BRANDS)
+    return len(texts)
+
+
+def trends_case(reviews):
+    engine = TrendEngine()
+    for start in range(0, len(reviews), 500):
+        engine.update_reviews(reviews[start:start + 500])
+    engine.momentum()
+    return len(reviews)
+
+
+def dedup_case(reviews):
+    duplicates = DuplicateFilter()
+    for _ in duplicates.filter(reviews):
+        pass
+    return len(reviews)
+
+
+CORPUS_CASES = {
+    'flavors.extract': (texts_of, lambda texts: len(extract_flavors_corpus(texts)), None),
+    'flavors.count': (texts_of, lambda texts: count_flavors(texts) and len(texts), None),
+    'flavors.index': (frame_of, lambda df: len(build_flavor_index(df).matrix), None),
+    'flavors.demand': (frame_of, lambda df: DemandScorer().score(df) and len(df), None),
+    'flavors.discover': (texts_of, lambda texts: FlavorDiscovery().fit(texts) and len(texts), 100_000),
+    'frame.from_dicts': (same, lambda reviews: len(pd.DataFrame([r.as_row() for r in reviews])), None),
+    'frame.review_table': (same, lambda reviews: len(frame_of(reviews)), None),
+    'wordcloud.render': (texts_of, wordcloud_case, None),
+    'prompt.pack': (same, pack_case, None),
+    'prompt.chunks': (texts_of, chunks_case, None),
+    'trends.update': (same, trends_case, None),
+    'dedup.filter': (same, dedup_case, 100_000),
+}
+
+
+# Page cases: parse one fixture page `repeat` times
+PAGE_CASES = {
+    'parse.amazon_search': ('amazon_search.html', 'rb', lambda page: parse_search_asins(page)),
+    'parse.amazon_reviews': ('amazon_reviews.html', 'rb',
+                             lambda page: parse_review_page(page, 'whey protein', limit=100, asin='B0BENCH')),
+    'parse.reddit': ('reddit_listing.json', 'r', lambda page: parse_reddit_listing(json.loads(page), 'supplements')),
+}
+
+
+def measure(run, payload, memory=True):
+    """(seconds, items, peak bytes) for one call of run(payload)"""
+    gc.collect()
+    started = time.perf_counter()
+    items = run(payload)
+    seconds = time.perf_counter() - started
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run(payload)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, items, peak
+
+
+def result(seconds, items, peak):
+    return {
+        'seconds': round(seconds, 6),
+        'items': items,
+        'items_per_second': round(items / seconds, 1) if seconds else None,
+        'peak_mb': round(peak / 2 ** 20, 3) if peak is not None else None,
+    }
+
+
+def run_corpus_cases(sizes, selected, memory):
+    results = {}
+    for label in sizes:
+        size = corpora.SIZES[label]
+        started = time.perf_counter()
+        reviews = corpora.corpus(size)
+        print(f"\n{label} corpus ({size} reviews, built in {time.perf_counter() - started:.1f}s)")
+        for name, (setup, run, max_size) in CORPUS_CASES.items():
+            if not selected(name) or (max_size and size > max_size):
+                continue
+            payload = setup(reviews)
+            entry = result(*measure(run, payload, memory))
+            results.setdefault(name, {})[label] = entry
+            print(format_line(name, entry))
+            del payload
+        del reviews
+    return results
+
+
+def run_page_cases(selected, memory, repeat):
+    results = {}
+    cases = {name: case for name, case in PAGE_CASES.items() if selected(name)}
+    if cases:
+        print(f"\nfixture pages (x{repeat})")
+    for name, (fixture, mode, parse) in cases.items():
+        page = read_fixture(fixture, mode)
+
+        def run(content):
+            for _ in range(repeat):
+                parse(content)
+            return repeat
+
+        entry = result(*measure(run, page, memory))
+        entry['page_kb'] = round(len(page) / 1024, 1)
+        results[name] = {'page': entry}
+        print(format_line(name, entry, unit='pages'))
+    return results
+
+
+def run_groq_cases(selected, requests):
+    """Round trips through the real Groq SDK to the stub server: client + prompt + parsing overhead"""
+    cases = [name for name in ('groq.request', 'groq.stream') if selected(name)]
+    if not cases:
+        return {}
+    from groq import Groq
+
+    import groq_stub
+
+    server = groq_stub.start()
+    client = Groq(api_key='gsk_bench', base_url=groq_stub.base_url(server), max_retries=0)
+    data_text = "\n".join(pack_reviews(corpora.corpus(1000)))
+    results = {}
+    print(f"\nstub Groq server ({requests} requests)")
+    try:
+        for name in cases:
+            on_item = (lambda section, item: None) if name == 'groq.stream' else None
+
+            def run(_):
+                for _ in range(requests):
+                    request_analysis(client, data_text, BRANDS, on_item=on_item)
+                return requests
+
+            entry = result(*measure(run, None, memory=False))
+            results[name] = {'request': entry}
+            print(format_line(name, entry, unit='requests'))
+    finally:
+        server.shutdown()
+    return results
+
+
+def format_line(name, entry, unit='items'):
+    peak = f"{entry['peak_mb']:9.1f} MB" if entry['peak_mb'] is not None else ' ' * 12
+    return f"  {name:22} {entry['seconds'] * 1000:10.1f} ms {entry['items_per_second']:14,.0f} {unit}/s {peak}"
+
+
+def metadata():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        'revision': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+    }
+
+
+def compare(before_path, after_path, threshold=0.10):
+    """Print per-case time and memory ratios between two reports; True if anything regressed"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"before: {before['meta'].get('revision')} ({before['meta'].get('timestamp')})")
+    print(f"after:  {after['meta'].get('revision')} ({after['meta'].get('timestamp')})\n")
+    print(f"  {'case':22} {'size':>6} {'time':>8} {'memory':>8}")
+    regressed = False
+    for name, sizes in after['results'].items():
+        for size, entry in sizes.items():
+            old = before['results'].get(name, {}).get(size)
+            if not old:
+                continue
+            time_ratio = entry['seconds'] / old['seconds'] if old['seconds'] else float('nan')
+            memory_ratio = (entry['peak_mb'] / old['peak_mb']
+                            if entry.get('peak_mb') is not None and old.get('peak_mb') else None)
+            flag = ''
+            if time_ratio > 1 + threshold or (memory_ratio or 0) > 1 + threshold:
+                flag = '  <- regression'
+                regressed = True
+            memory = f"{memory_ratio:7.2f}x" if memory_ratio is not None else '       -'
+            print(f"  {name:22} {size:>6} {time_ratio:7.2f}x {memory}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k'], choices=sorted(corpora.SIZES),
+                        help="corpus sizes to run (1m takes a few minutes)")
+    parser.add_argument('--only', nargs='+', default=None, help="run only cases whose name starts with these")
+    parser.add_argument('--repeat', type=int, default=20, help="parses per fixture page")
+    parser.add_argument('--requests', type=int, default=5, help="requests per stub Groq case")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--out', default=None, help="write the JSON report here")
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help="compare two reports and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    def selected(name):
+        return args.only is None or any(name.startswith(prefix) for prefix in args.only)
+
+    memory = not args.no_memory
+    results = {}
+    results.update(run_corpus_cases(args.sizes, selected, memory))
+    results.update(run_page_cases(selected, memory, args.repeat))
+    results.update(run_groq_cases(selected, args.requests))
+
+    report = {'meta': metadata(), 'sizes': {label: corpora.SIZES[label] for label in args.sizes}, 'results': results}
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Headless FlavorScout runs without Streamlit.
+
+    python cli.py jobs.json --out results.jsonl --workers 4
+
+`jobs.json` is a list of job objects (or {"jobs": [...]}), e.g.
+
+    [{"name": "whey-muscleblaze",
+      "data_sources": ["Amazon Reviews", "Reddit"],
+      "amazon_terms": ["whey protein"],
+      "reddit_subs": ["fitness", "supplements"],
+      "post_limit": 20,
+      "brands": ["MuscleBlaze"]}]
+
+Jobs run in parallel worker processes. Results are written as JSON lines,
+or as a Parquet table when --out ends in .parquet. Each result carries
+per-stage `timings`; --trace-dir also saves one Chrome trace per job
+(open in chrome://tracing or ui.perfetto.dev). GROQ_API_KEY is read from
+the environment.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pipeline import run_job
+
+
+def load_jobs(path):
+    """Read the job list from a JSON config file"""
+    with open(path) as f:
+        config = json.load(f)
+    jobs = config['jobs'] if isinstance(config, dict) else config
+    for i, job in enumerate(jobs):
+        job.setdefault('name', f'job-{i + 1}')
+    return jobs
+
+
+def write_parquet(results, path):
+    import pandas as pd
+
+    rows = [
+        {key: json.dumps(value) if isinstance(value, (dict, list)) else value for key, value in result.items()}
+        for result in results
+    ]
+    pd.DataFrame(rows).to_parquet(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run FlavorScout scrape -> analyze jobs headlessly")
+    parser.add_argument('config', help="JSON file with the list of jobs")
+    parser.add_argument('--out', default='results.jsonl', help="output .jsonl or .parquet file")
+    parser.add_argument('--workers', type=int, default=4, help="parallel worker processes")
+    parser.add_argument('--store', default=None, help="review store SQLite path (default: .cache/reviews.sqlite)")
+    parser.add_argument('--trace-dir', default=None, help="write <job name>.trace.json span traces here")
+    args = parser.parse_args(argv)
+
+    if args.out.endswith('.parquet'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow); use a .jsonl path instead")
+
+    jobs = load_jobs(args.config)
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+        futures = {}
+        for job in jobs:
+            trace_path = os.path.join(args.trace_dir, f"{job['name']}.trace.json") if args.trace_dir else None
+            futures[pool.submit(run_job, job, None, args.store, trace_path)] = job['name']
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = result['error'] or f"{result.get('rows', 0)} rows"
+            print(f"[{futures[future]}] {result['seconds']}s - {status}", file=sys.stderr)
+
+    if args.out.endswith('.parquet'):
+        write_parquet(results, args.out)
+    else:
+        with open(args.out, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result, default=str) + '\n')
+
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
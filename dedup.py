@@ -0,0 +1,113 @@
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Mersenne prime for the universal hash family; shingle hashes are kept below it
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def shingles(text, size=3):
+    """Hashes of the word `size`-grams in a text (the whole text when it is shorter)"""
+    tokens = TOKEN_PATTERN.findall(text.lower()) if isinstance(text, str) else []
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    grams = {' '.join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode('utf-8')) & MERSENNE_PRIME for gram in grams),
+                       dtype=np.uint64, count=len(grams))
+
+
+# MinHash + LSH near-duplicate index
+class NearDuplicateIndex:
+    """Find texts whose word-shingle Jaccard similarity is at least `threshold`.
+
+    Each text gets a `num_perm` MinHash signature, cut into `bands` bands;
+    texts sharing any band are candidates and are confirmed by the fraction
+    of equal signature slots. Each bucket keeps at most `bucket_size` texts,
+    so a lookup does bounded work and indexing n texts is linear in n.
+    """
+
+    def __init__(self, threshold=0.7, num_perm=64, bands=16, shingle_size=3, bucket_size=8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.bucket_size = bucket_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = []
+
+    def signature(self, text):
+        """MinHash signature of a text, or None when it has no words"""
+        hashes = shingles(text, self.shingle_size)
+        if not len(hashes):
+            return None
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+    def add(self, text):
+        """Index a text; returns the id of an earlier near-duplicate instead, if there is one.
+
+        Duplicates are not indexed themselves, so every id returned belongs
+        to the first text of its group.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        checked = set()
+        for band, key in enumerate(keys):
+            for candidate in self.buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+
+        doc_id = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in enumerate(keys):
+            bucket = self.buckets[band].setdefault(key, [])
+            if len(bucket) < self.bucket_size:
+                bucket.append(doc_id)
+        return None
+
+
+# Streaming duplicate filter with per-source stats
+class DuplicateFilter:
+    """Drop near-duplicate reviews from a Review stream, keeping the first of each group.
+
+    `seen` and `dropped` count reviews per source label; rates() gives the
+    share of each source that was dropped.
+    """
+
+    def __init__(self, index=None):
+        self.index = index or NearDuplicateIndex()
+        self.seen = {}
+        self.dropped = {}
+
+    def filter(self, reviews):
+        """Yield the reviews that are not near-duplicates of an earlier one"""
+        for review in reviews:
+            self.seen[review.source] = self.seen.get(review.source, 0) + 1
+            if self.index.add(review.text) is not None:
+                self.dropped[review.source] = self.dropped.get(review.source, 0) + 1
+                continue
+            yield review
+
+    def rates(self):
+        """{source: fraction of its reviews dropped as near-duplicates}"""
+        return {source: self.dropped.get(source, 0) / seen for source, seen in self.seen.items()}
+
+    def summary(self):
+        """One status line, e.g. "4 of 80 near-duplicates dropped (Amazon (whey): 40%)" """
+        total_dropped = sum(self.dropped.values())
+        rates = ", ".join(f"{source}: {rate:.0%}" for source, rate in self.rates().items() if rate)
+        text = f"{total_dropped} of {sum(self.seen.values())} near-duplicates dropped"
+        return f"{text} ({rates})" if rates else text
@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+
+from flavors import DEFAULT_LEXICON
+from tracing import traced
+
+# Cue phrases and how each shifts a mention's demand weight
+POLARITY_CUES = {
+    'request': (1.0, [
+        'wish', 'want', 'wanted', 'need', 'needs', 'please', 'hope', 'launch', 'bring', 'would love', 'would be',
+        'would buy', 'would sell', 'should make', 'should add', 'give us', 'missing', 'where is', 'waiting for',
+        'add', 'make it', 'try',
+    ]),
+    'praise': (0.5, [
+        'love', 'loved', 'amazing', 'great', 'delicious', 'best', 'perfect', 'awesome', 'excellent', 'tasty',
+        'refreshing', 'underrated', 'popular', 'game-changing', 'good',
+    ]),
+    'complaint': (-1.0, [
+        'too sweet', 'too artificial', 'artificial', 'bland', 'boring', 'chemical', 'overdone', 'played out',
+        'tired of', 'chalky', 'gets boring', 'tastes like candy', 'disgusting', 'worst', 'bad', 'hate', 'plain',
+        'not good', 'too plain',
+    ]),
+}
+
+BRAND_ALIASES = {
+    'MuscleBlaze': ['muscleblaze', 'muscle blaze'],
+    'HK Vitals': ['hk vitals', 'hkvitals'],
+    'TrueBasics': ['truebasics', 'true basics'],
+    'Optimum Nutrition': ['optimum nutrition', 'gold standard'],
+    'MyProtein': ['myprotein'],
+    'Dymatize': ['dymatize'],
+}
+
+# Trust in each kind of source, by source-label prefix (first match wins)
+SOURCE_RELIABILITY = [('Amazon', 1.0), ('r/', 0.8), ('Market Research', 0.6)]
+DEFAULT_RELIABILITY = 0.7
+
+UNBRANDED = '(no brand)'
+
+# A cue goes to the nearest flavor mention in its clause, else to one at most this many words away
+CUE_WINDOW = 3
+CLAUSE_BREAKS = np.frombuffer(b'.,;:!?\n\0', dtype=np.uint8)
+
+
+# Demand scores per flavor and brand
+class DemandScores:
+    """Demand per flavor, overall and per brand mentioned alongside it.
+
+    `flavors` has one row per flavor with its `mentions`, the number of
+    them that read as a `request`, `praise` or `complaint`, and `demand`,
+    sorted by demand; `by_brand` is a flavor x brand demand table, with
+    mentions that name no brand under '(no brand)'.
+    """
+
+    def __init__(self, flavors, by_brand):
+        self.flavors = flavors
+        self.by_brand = by_brand
+
+    def top(self, n=15):
+        """(flavor, demand) pairs for the n flavors in highest demand"""
+        return list(self.flavors['demand'].head(n).round(1).items())
+
+    def for_brand(self, brand, n=15):
+        """(flavor, demand) pairs for the n flavors most in demand alongside `brand`"""
+        if brand not in self.by_brand.columns:
+            return []
+        column = self.by_brand[brand]
+        return list(column[column > 0].sort_values(ascending=False).head(n).round(1).items())
+
+
+# Byte-level word matching
+KEY_MULTIPLIERS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xC2B2AE3D27D4EB4F))
+
+
+def word_keys(data):
+    """(keys, starts) for the ASCII letter runs of UTF-8 bytes, case-folded.
+
+    A word's key mixes its first 16 letters and its length into one
+    uint64, computed for all words at once; longer words that share those
+    16 letters share a key.
+    """
+    b = np.frombuffer(data, dtype=np.uint8)
+    b = b | ((b >= 65) & (b <= 90)).astype(np.uint8) * 32
+    letter = np.concatenate(([False], (b >= 97) & (b <= 122), [False]))
+    starts = np.flatnonzero(letter[1:] & ~letter[:-1])
+    lengths = np.flatnonzero(letter[:-1] & ~letter[1:]) - starts
+
+    # First 16 bytes of every word as two little-endian uint64s, bytes past the word masked off
+    window = np.lib.stride_tricks.sliding_window_view(np.concatenate([b, np.zeros(16, np.uint8)]), 16)[starts]
+    halves = window.view('<u8')
+    bits = np.minimum(lengths, 16).astype(np.uint64) * np.uint64(8)
+    first = halves[:, 0] & _low_bits(np.minimum(bits, np.uint64(64)))
+    second = halves[:, 1] & _low_bits(bits - np.minimum(bits, np.uint64(64)))
+    with np.errstate(over='ignore'):
+        keys = first * KEY_MULTIPLIERS[0] ^ second * KEY_MULTIPLIERS[1] ^ lengths.astype(np.uint64)
+    return keys, starts
+
+
+def _low_bits(bits):
+    """uint64 masks with the lowest `bits` (0..64) bits set"""
+    shifted = np.left_shift(np.uint64(1), np.minimum(bits, np.uint64(63))) - np.uint64(1)
+    return np.where(bits >= 64, np.uint64(0xFFFFFFFFFFFFFFFF), shifted)
+
+
+class PhraseMatcher:
+    """Find phrases of one or more words in many texts at once, longest match first.
+
+    `phrases` maps each phrase to a label. Texts are joined with NUL bytes
+    and split into words by word_keys(); words are looked up in the phrase
+    vocabulary with searchsorted, and phrase positions are found for each
+    phrase length by combining the vocabulary ids of neighbouring words.
+    Clauses end at .,;:!? and newlines, and at the end of every text.
+    """
+
+    def __init__(self, phrases):
+        vocabulary = {}
+        words_of = {}
+        for phrase in phrases:
+            keys, _ = word_keys(phrase.encode('utf-8'))
+            if len(keys):
+                words_of[phrase] = [vocabulary.setdefault(int(key), len(vocabulary)) for key in keys]
+        self.size = len(vocabulary) + 1
+        order = np.argsort(np.array(list(vocabulary), dtype=np.uint64))
+        self.vocabulary_keys = np.array(list(vocabulary), dtype=np.uint64)[order]
+        self.vocabulary_ids = np.array(list(vocabulary.values()), dtype=np.int64)[order]
+
+        self.tables = {}
+        for phrase, words in words_of.items():
+            codes, labels = self.tables.setdefault(len(words), ({}, None))
+            codes.setdefault(self._code(words), phrases[phrase])
+        for length, (codes, _) in self.tables.items():
+            order = np.argsort(np.array(list(codes), dtype=np.int64))
+            self.tables[length] = (np.array(list(codes), dtype=np.int64)[order],
+                                   np.array(list(codes.values()), dtype=np.int64)[order])
+
+    def _code(self, words):
+        code = 0
+        for word in words:
+            code = code * self.size + word + 1
+        return code
+
+    def match(self, texts):
+        """(row, label, first, last, clause) arrays with one entry per phrase occurrence.
+
+        `first` and `last` index the phrase's first and last word among all
+        words of `texts`, `clause` numbers the clause its first word is in.
+        """
+        data = '\0'.join(texts).encode('utf-8')
+        keys, starts = word_keys(data)
+        b = np.frombuffer(data, dtype=np.uint8)
+        rows = np.searchsorted(np.flatnonzero(b == 0), starts)
+        clauses = np.cumsum(np.isin(b, CLAUSE_BREAKS))[starts]
+
+        position = np.minimum(np.searchsorted(self.vocabulary_keys, keys), len(self.vocabulary_keys) - 1)
+        ids = np.where(self.vocabulary_keys[position] == keys, self.vocabulary_ids[position], -1)
+
+        found = []
+        taken = ids < 0
+        for length in sorted(self.tables, reverse=True):
+            codes, labels = self.tables[length]
+            count = len(ids) - length + 1
+            if count <= 0:
+                continue
+            code = np.zeros(count, dtype=np.int64)
+            free = rows[:count] == rows[length - 1:]
+            for k in range(length):
+                free &= ~taken[k:k + count]
+                code = code * self.size + ids[k:k + count] + 1
+            position = np.minimum(np.searchsorted(codes, code), len(codes) - 1)
+            hit = free & (codes[position] == code)
+            if length > 1:
+                # Of overlapping matches of the same length keep the leftmost
+                for k in range(1, length):
+                    hit[k:] &= ~hit[:-k]
+            at = np.flatnonzero(hit)
+            for k in range(length):
+                taken[at + k] = True
+            found.append((rows[at], labels[position[at]], at, at + length - 1, clauses[at]))
+        if not found:
+            return tuple(np.zeros(0, dtype=np.int64) for _ in range(5))
+        return tuple(np.concatenate(arrays).astype(np.int64) for arrays in zip(*found))
+
+
+# Vectorized demand scoring
+class DemandScorer:
+    """Score flavor demand over a review frame with NumPy, in batches of `batch_size` rows.
+
+    One PhraseMatcher finds flavor variants (and their plurals), polarity
+    cues and brand names in a whole batch at once; everything after that
+    is bincounts over the match arrays, with no Python loop per row. A
+    flavor mention weighs `engagement x reliability x (1 + polarity)`:
+    engagement is 1 + log1p(score) + log1p(comments), reliability comes
+    from the source label, and polarity (-1..1) sums the weights of the
+    request, praise and complaint cues attached to that mention. Each cue
+    attaches to the nearest flavor mention in its clause, or failing that
+    to one at most CUE_WINDOW words away, so "Chocolate is too sweet, I
+    wish they had Kesar Pista" is a complaint about chocolate and a request
+    for kesar pista.
+    """
+
+    def __init__(self, lexicon=DEFAULT_LEXICON, cues=POLARITY_CUES, brands=BRAND_ALIASES, batch_size=100_000):
+        self.flavors = list(lexicon.mappings)
+        self.brands = list(brands)
+        self.cue_kinds = list(cues)
+        self.cue_weights = np.array([cues[kind][0] for kind in self.cue_kinds])
+        self.batch_size = batch_size
+
+        # Labels: flavors first, then cue kinds, then brands
+        flavor_ids = {flavor: i for i, flavor in enumerate(self.flavors)}
+        cue_base = len(self.flavors)
+        brand_base = cue_base + len(self.cue_kinds)
+        phrases = {}
+        for variant, flavor in lexicon.variant_to_flavor.items():
+            for suffix in ('', 's', 'es'):
+                phrases.setdefault(variant + suffix, flavor_ids[flavor])
+        for i, kind in enumerate(self.cue_kinds):
+            for cue in cues[kind][1]:
+                phrases.setdefault(cue, cue_base + i)
+        for i, brand in enumerate(self.brands):
+            for alias in brands[brand]:
+                phrases.setdefault(alias, brand_base + i)
+        self.matcher = PhraseMatcher(phrases)
+        self.cue_base = cue_base
+        self.brand_base = brand_base
+
+    def _matches(self, texts):
+        """(row, kind, id, first, last, clause) arrays for every match; kind 0 = flavor, 1 = cue, 2 = brand
+
+        Word and clause numbers count within the match's batch of rows.
+        """
+        batches = [tuple(np.zeros(0, dtype=np.int64) for _ in range(5))]
+        for offset in range(0, len(texts), self.batch_size):
+            batch_rows, *rest = self.matcher.match(texts[offset:offset + self.batch_size])
+            batches.append((batch_rows + offset, *rest))
+        rows, labels, first, last, clauses = (np.concatenate(arrays) for arrays in zip(*batches))
+        kinds = (labels >= self.cue_base).astype(np.int64) + (labels >= self.brand_base)
+        ids = labels - np.array([0, self.cue_base, self.brand_base])[kinds]
+        return rows, kinds, ids, first, last, clauses
+
+    @staticmethod
+    def _attach(mentions, cues):
+        """Index into `mentions` of the flavor mention each cue attaches to (-1 for none).
+
+        Both are (row, first, last, clause) tuples; `mentions` sorted by
+        row and word. Only a cue's neighbouring mentions on either side can
+        be nearest, and of those one in the same clause wins.
+        """
+        m_rows, m_first, m_last, m_clauses = mentions
+        c_rows, c_first, c_last, c_clauses = cues
+        if len(m_rows) == 0:
+            return np.full(len(c_rows), -1)
+        width = max(m_last.max(), c_last.max(initial=0)) + 1
+        right = np.searchsorted(m_rows * width + m_first, c_rows * width + c_first)
+        candidates = np.stack([right - 1, right])
+        valid = (candidates >= 0) & (candidates < len(m_rows))
+        candidates = np.clip(candidates, 0, len(m_rows) - 1)
+        gap = np.maximum(np.maximum(m_first[candidates] - c_last, c_first - m_last[candidates]), 0)
+        same_clause = m_clauses[candidates] == c_clauses
+        valid &= (m_rows[candidates] == c_rows) & (same_clause | (gap <= CUE_WINDOW))
+        cost = np.where(valid, gap + np.where(same_clause, 0, width), np.iinfo(np.int64).max)
+        pick = np.argmin(cost, axis=0)
+        columns = np.arange(len(c_rows))
+        return np.where(valid[pick, columns], candidates[pick, columns], -1)
+
+    def _reliability(self, sources):
+        categorical = pd.Categorical(sources)
+        weights = np.array([
+            next((weight for prefix, weight in SOURCE_RELIABILITY if str(label).startswith(prefix)),
+                 DEFAULT_RELIABILITY)
+            for label in categorical.categories
+        ] + [DEFAULT_RELIABILITY])
+        return weights[categorical.codes]
+
+    @traced('flavors.demand')
+    def score(self, df):
+        """DemandScores for a text/source/score/comments frame"""
+        n = len(df)
+        rows, kinds, ids, first, last, clauses = self._matches(df['text'].fillna('').tolist())
+        size = len(self.flavors)
+
+        # Flavor mentions in text order; each flavor counted once per review
+        flavor = np.flatnonzero(kinds == 0)
+        flavor = flavor[np.lexsort((first[flavor], rows[flavor]))]
+        pairs, mention_of = np.unique(rows[flavor] * size + ids[flavor], return_inverse=True)
+        mention_rows, mention_flavors = np.divmod(pairs, size)
+
+        # Per-mention polarity: summed weights of the cues attached to it, each cue kind counted once
+        cue = np.flatnonzero(kinds == 1)
+        attached = self._attach((rows[flavor], first[flavor], last[flavor], clauses[flavor]),
+                                (rows[cue], first[cue], last[cue], clauses[cue]))
+        cue, attached = cue[attached >= 0], attached[attached >= 0]
+        cue_hits = np.zeros((len(pairs), len(self.cue_kinds)), dtype=bool)
+        cue_hits[mention_of[attached], ids[cue]] = True
+        polarity = np.clip(cue_hits @ self.cue_weights, -1.0, 1.0)
+
+        score = np.clip(df['score'].to_numpy(dtype=np.float64), 0, None)
+        comments = np.clip(df['comments'].to_numpy(dtype=np.float64), 0, None)
+        engagement = 1 + np.log1p(score) + np.log1p(comments)
+        weight = (engagement * self._reliability(df['source']))[mention_rows] * (1 + polarity)
+
+        flavors = pd.DataFrame({
+            'mentions': np.bincount(mention_flavors, minlength=size),
+            **{kind: np.bincount(mention_flavors, weights=cue_hits[:, k], minlength=size).astype(np.int64)
+               for k, kind in enumerate(self.cue_kinds)},
+            'demand': np.bincount(mention_flavors, weights=weight, minlength=size),
+        }, index=pd.Index(self.flavors, name='flavor'))
+        flavors = flavors[flavors['mentions'] > 0].sort_values('demand', ascending=False)
+
+        # Brand columns: every brand named in a review shares its flavor mentions
+        brand_pairs = np.unique(rows[kinds == 2] * len(self.brands) + ids[kinds == 2])
+        brand_rows, brand_ids = np.divmod(brand_pairs, len(self.brands))
+        branded = np.zeros(n, dtype=bool)
+        branded[brand_rows] = True
+        columns = len(self.brands) + 1
+        table = np.zeros((size, columns))
+        unbranded = ~branded[mention_rows]
+        np.add.at(table, (mention_flavors[unbranded], len(self.brands)), weight[unbranded])
+        if len(brand_rows):
+            starts = np.searchsorted(brand_rows, mention_rows, side='left')
+            ends = np.searchsorted(brand_rows, mention_rows, side='right')
+            repeats = ends - starts
+            mention_index = np.repeat(np.arange(len(mention_rows)), repeats)
+            brand_index = np.repeat(starts - np.cumsum(np.r_[0, repeats[:-1]]), repeats) + np.arange(repeats.sum())
+            np.add.at(table, (mention_flavors[mention_index], brand_ids[brand_index]), weight[mention_index])
+        by_brand = pd.DataFrame(table, index=pd.Index(self.flavors, name='flavor'),
+                                columns=self.brands + [UNBRANDED])
+        by_brand = by_brand.loc[flavors.index, by_brand.sum() > 0]
+
+        return DemandScores(flavors, by_brand)
+
+
+def score_demand(df, lexicon=DEFAULT_LEXICON):
+    """DemandScores for a text/source/score/comments/created frame"""
+    return DemandScorer(lexicon).score(df)
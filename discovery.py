@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from flavors import DEFAULT_LEXICON, FLAVOR_MAPPINGS, FlavorLexicon
+from tracing import traced
+
+DISCOVERY_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'flavors')
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+TITLE_RUN_PATTERN = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b")
+SENTENCE_START_PATTERN = re.compile(r"(?:^|[.!?]\s+)$")
+
+# Words that introduce a flavor name right before them ("Thandai flavor", "Red Velvet Cake protein")
+CUE_WORDS = {
+    'flavor', 'flavors', 'flavour', 'flavours', 'flavored', 'flavoured', 'protein', 'whey', 'shake', 'shakes',
+    'gainer', 'gummies', 'gummy', 'electrolytes', 'variant',
+}
+
+# Words that are never part of a flavor name
+STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'of', 'for', 'with', 'without', 'in', 'on', 'to', 'is', 'are', 'was', 'be',
+    'i', 'we', 'you', 'they', 'it', 'my', 'our', 'your', 'this', 'that', 'these', 'those', 'me', 'us',
+    'like', 'love', 'want', 'wish', 'need', 'try', 'had', 'have', 'has', 'get', 'give', 'make', 'made', 'add',
+    'would', 'could', 'should', 'will', 'can', 'do', 'does', 'don', 't', 's', 'why', 'what', 'how', 'so', 'too',
+    'very', 'more', 'less', 'most', 'much', 'some', 'any', 'all', 'no', 'not', 'only', 'just', 'also', 'same',
+    'new', 'old', 'real', 'natural', 'regular', 'plain', 'artificial', 'premium', 'better', 'best', 'good', 'great',
+    'amazing', 'boring', 'basic', 'sweet', 'sweetened', 'unique', 'authentic', 'traditional', 'seasonal', 'fun',
+    'indian', 'desi', 'american', 'south', 'north', 'brand', 'brands', 'whey', 'protein', 'flavor', 'flavors',
+    'flavour', 'flavours', 'taste', 'tastes', 'supplement', 'supplements', 'powder', 'product', 'quality', 'gym',
+    'shake', 'isolate', 'mass', 'gainer', 'pre', 'workout', 'post', 'mix', 'scoop', 'muscleblaze', 'myprotein',
+    'dymatize', 'optimum', 'nutrition', 'gold', 'standard', 'vitals', 'truebasics', 'on', 'iso', 'style',
+    'antioxidant', 'combo', 'version',
+}
+
+
+def _corpus_key(texts):
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Candidate flavor phrases
+def candidate_phrases(text, max_words=3):
+    """Lower-cased phrases in a text that look like flavor names.
+
+    Takes the words right before a cue word ("gulab jamun" in "Gulab Jamun
+    flavor") and Title Case runs ("Pina Colada"), trimmed of stop words.
+    """
+    if not isinstance(text, str):
+        return []
+    found = []
+    words = WORD_PATTERN.findall(text.lower())
+    for i, word in enumerate(words):
+        if word in CUE_WORDS:
+            phrase = []
+            for previous in reversed(words[max(0, i - max_words):i]):
+                if previous in STOP_WORDS or previous in CUE_WORDS:
+                    break
+                phrase.insert(0, previous)
+            if phrase:
+                found.append(' '.join(phrase))
+    for match in TITLE_RUN_PATTERN.finditer(text):
+        phrase = match.group(0).lower().split()
+        while phrase and phrase[0] in STOP_WORDS:
+            phrase.pop(0)
+        while phrase and phrase[-1] in STOP_WORDS:
+            phrase.pop()
+        # A lone capitalised word at the start of a sentence is just capitalisation
+        at_start = SENTENCE_START_PATTERN.search(text[:match.start()]) is not None
+        if phrase and len(phrase) <= max_words and not (len(phrase) == 1 and at_start) \
+                and not any(word in STOP_WORDS for word in phrase):
+            found.append(' '.join(phrase))
+    return list(dict.fromkeys(found))
+
+
+# Hashed TF-IDF over character n-grams
+class CharNgramVectorizer:
+    """Unit-length TF-IDF vectors of a phrase's character 3- and 4-grams, hashed into `dim` slots"""
+
+    def __init__(self, dim=1024, sizes=(3, 4), idf=None):
+        self.dim = dim
+        self.sizes = sizes
+        self.idf = np.asarray(idf, dtype=np.float32) if idf is not None else np.ones(dim, dtype=np.float32)
+
+    def _slots(self, phrase):
+        padded = f" {phrase} "
+        return [zlib.crc32(padded[i:i + n].encode('utf-8')) % self.dim
+                for n in self.sizes for i in range(len(padded) - n + 1)]
+
+    def fit(self, phrases):
+        """Set the IDF weights from a collection of phrases"""
+        df = np.zeros(self.dim, dtype=np.float32)
+        for phrase in phrases:
+            df[list(set(self._slots(phrase)))] += 1
+        self.idf = (np.log((1 + len(phrases)) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def transform(self, phrases):
+        vectors = np.zeros((len(phrases), self.dim), dtype=np.float32)
+        for row, phrase in enumerate(phrases):
+            slots, counts = np.unique(self._slots(phrase), return_counts=True)
+            vectors[row, slots] = counts
+        vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+# Approximate nearest-neighbour index
+class CosineLSHIndex:
+    """Random-hyperplane LSH over unit vectors.
+
+    Each vector gets `bands` x `bits` sign bits; vectors sharing any band
+    are candidates and the best cosine similarity among them wins. Buckets
+    hold at most `bucket_size` ids, so a lookup does bounded work.
+    """
+
+    def __init__(self, dim, bands=12, bits=8, bucket_size=16, seed=7):
+        self.bands = bands
+        self.bits = bits
+        self.bucket_size = bucket_size
+        self.planes = np.random.default_rng(seed).standard_normal((bands * bits, dim)).astype(np.float32)
+        self.powers = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets = [{} for _ in range(bands)]
+        self.vectors = np.zeros((64, dim), dtype=np.float32)
+        self.size = 0
+
+    def keys(self, vector):
+        """The band keys of a vector (pass them to nearest() and add() to hash it once)"""
+        signs = (self.planes @ vector > 0).reshape(self.bands, self.bits)
+        return (signs @ self.powers).tolist()
+
+    def add(self, vector, keys=None):
+        if self.size == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.zeros_like(self.vectors)])
+        item_id = self.size
+        self.vectors[item_id] = vector
+        self.size += 1
+        for band, key in enumerate(keys if keys is not None else self.keys(vector)):
+            bucket = self.buckets[band].setdefault(key, [])
+            if len(bucket) < self.bucket_size:
+                bucket.append(item_id)
+        return item_id
+
+    def nearest(self, vector, keys=None):
+        """(id, cosine) of the most similar indexed vector among the candidates, or (None, 0.0)"""
+        candidates = {item_id for band, key in enumerate(keys if keys is not None else self.keys(vector))
+                      for item_id in self.buckets[band].get(key, ())}
+        if not candidates:
+            return None, 0.0
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarities = self.vectors[ids] @ vector
+        best = int(np.argmax(similarities))
+        return int(ids[best]), float(similarities[best])
+
+
+# Flavor discovery
+class FlavorDiscovery:
+    """Cluster candidate flavor phrases into canonical flavors.
+
+    The hand-written FLAVOR_MAPPINGS seed the index, so spellings of a
+    known flavor join it. Every other phrase, most frequent first, joins
+    the nearest cluster when their cosine similarity is at least
+    `threshold` and otherwise starts a new cluster named after itself.
+    `assignments` remembers the cluster of every phrase seen, so known
+    phrases are assigned with one dict lookup and new ones with one index
+    query.
+    """
+
+    def __init__(self, threshold=0.6, min_count=1, max_new=40, vectorizer=None):
+        self.threshold = threshold
+        self.min_count = min_count
+        self.max_new = max_new
+        self.vectorizer = vectorizer or CharNgramVectorizer()
+        self.index = None
+        self.cluster_of = []
+        self.assignments = {}
+        self.counts = Counter()
+
+    def _reset_index(self):
+        self.index = CosineLSHIndex(self.vectorizer.dim)
+        self.cluster_of = []
+        for canonical, variants in FLAVOR_MAPPINGS.items():
+            for variant, vector in zip(variants, self.vectorizer.transform(variants)):
+                self.index.add(vector)
+                self.cluster_of.append(canonical)
+                self.assignments[variant] = canonical
+
+    def _place(self, phrase, vector):
+        keys = self.index.keys(vector)
+        item_id, similarity = self.index.nearest(vector, keys)
+        cluster = self.cluster_of[item_id] if item_id is not None and similarity >= self.threshold else phrase
+        self.index.add(vector, keys)
+        self.cluster_of.append(cluster)
+        self.assignments[phrase] = cluster
+        return cluster
+
+    @traced('flavors.discover')
+    def fit(self, texts):
+        """Extract candidate phrases from a corpus and cluster them"""
+        for text in texts:
+            self.counts.update(candidate_phrases(text))
+        phrases = [phrase for phrase, count in self.counts.most_common() if count >= self.min_count]
+        seeds = [variant for variants in FLAVOR_MAPPINGS.values() for variant in variants]
+        self.vectorizer.fit(seeds + phrases)
+        self._reset_index()
+        new = [phrase for phrase in phrases if phrase not in self.assignments]
+        for phrase, vector in zip(new, self.vectorizer.transform(new)):
+            self._place(phrase, vector)
+        return self
+
+    def assign(self, phrase):
+        """Canonical flavor for a phrase (cached; a new phrase is placed in its nearest cluster)"""
+        cluster = self.assignments.get(phrase)
+        if cluster is None:
+            if self.index is None:
+                self._reset_index()
+            cluster = self._place(phrase, self.vectorizer.transform([phrase])[0])
+        return cluster
+
+    def discovered(self):
+        """{canonical: [variants]} for the new clusters, most mentioned first (at most `max_new`).
+
+        Phrases that contain a known flavor ("strawberry milkshake") are
+        left to that flavor, so discovery never takes mentions away from it.
+        """
+        clusters = {}
+        for phrase, cluster in self.assignments.items():
+            if cluster not in FLAVOR_MAPPINGS and not DEFAULT_LEXICON.extract(phrase):
+                clusters.setdefault(cluster, []).append(phrase)
+        ranked = sorted(clusters, key=lambda cluster: sum(self.counts[p] for p in clusters[cluster]), reverse=True)
+        return {
+            clusters[cluster][0] if cluster not in clusters[cluster] else cluster:
+                sorted(clusters[cluster], key=lambda phrase: (phrase != cluster, phrase))
+            for cluster in ranked[:self.max_new]
+        }
+
+    def mappings(self):
+        """FLAVOR_MAPPINGS extended with the discovered flavors"""
+        mappings = dict(FLAVOR_MAPPINGS)
+        mappings.update(self.discovered())
+        return mappings
+
+    def lexicon(self):
+        """A FlavorLexicon over mappings(), usable wherever DEFAULT_LEXICON is"""
+        return FlavorLexicon(self.mappings())
+
+    def to_dict(self):
+        return {'threshold': self.threshold, 'min_count': self.min_count, 'max_new': self.max_new,
+                'idf': self.vectorizer.idf.round(4).tolist(), 'assignments': self.assignments,
+                'counts': dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        discovery = cls(data['threshold'], data['min_count'], data['max_new'],
+                        CharNgramVectorizer(idf=data['idf']))
+        discovery.counts = Counter(data['counts'])
+        discovery._reset_index()
+        phrases = [phrase for phrase in data['assignments'] if phrase not in discovery.assignments]
+        for phrase, vector in zip(phrases, discovery.vectorizer.transform(phrases)):
+            discovery.index.add(vector)
+            discovery.cluster_of.append(data['assignments'][phrase])
+        discovery.assignments.update(data['assignments'])
+        return discovery
+
+
+def discover_flavors(texts, cache_dir=DISCOVERY_CACHE_DIR, **options):
+    """FlavorDiscovery fitted on `texts`, cached on disk under the corpus hash"""
+    texts = list(texts)
+    key = _corpus_key(texts + [json.dumps(options, sort_keys=True)])
+    path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return FlavorDiscovery.from_dict(json.load(f))
+
+    discovery = FlavorDiscovery(**options).fit(texts)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(discovery.to_dict(), f)
+    return discovery
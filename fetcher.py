@@ -0,0 +1,116 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ratelimit import TokenBucket
+from tracing import span
+
+# Shared HTTP client settings; change them with configure_http()
+HTTP_CONFIG = {
+    'pool_connections': 10,
+    'pool_maxsize': 20,
+    'max_retries': 3,
+    'backoff_factor': 0.5,
+    'retry_statuses': (429, 503),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session(config):
+    """Create a Session whose adapters pool keep-alive connections per host"""
+    retry = Retry(
+        total=config['max_retries'],
+        backoff_factor=config['backoff_factor'],
+        status_forcelist=config['retry_statuses'],
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config['pool_connections'],
+        pool_maxsize=config['pool_maxsize'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled Session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(HTTP_CONFIG)
+        return _session
+
+
+def configure_http(**settings):
+    """Update pool sizes / retry policy and rebuild the shared Session"""
+    global _session
+    unknown = set(settings) - set(HTTP_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown HTTP settings: {', '.join(sorted(unknown))}")
+    with _session_lock:
+        HTTP_CONFIG.update(settings)
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def http_get(url, headers=None, **kwargs):
+    """GET through the shared pooled Session, retrying 429/503 with backoff"""
+    return get_session().get(url, headers=headers, **kwargs)
+
+
+# Thread-pooled fetch engine
+class FetchEngine:
+    """Fetch URLs in parallel, pacing each host with its own token bucket"""
+
+    def __init__(self, max_workers=6, requests_per_second=1.0, burst=2, timeout=15):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """Return the token bucket for the host of `url`"""
+        host = urlparse(url).netloc
+        with self.buckets_lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+            return self.buckets[host]
+
+    def get(self, url, headers=None, **kwargs):
+        """Rate-limited blocking GET"""
+        host = urlparse(url).netloc
+        with span('http.wait', host=host):
+            self.bucket_for(url).acquire()
+        kwargs.setdefault('timeout', self.timeout)
+        with span('http.get', host=host) as attrs:
+            response = http_get(url, headers=headers, **kwargs)
+            attrs['status'] = response.status_code
+        return response
+
+    def submit(self, url, headers=None, **kwargs):
+        """Schedule a rate-limited GET on the pool and return its future"""
+        return self.executor.submit(contextvars.copy_context().run, self.get, url, headers, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
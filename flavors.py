@@ -0,0 +1,168 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from tracing import traced
+
+# Canonical flavor -> spellings that should count as that flavor; a spelling counts for the first flavor listing it
+FLAVOR_MAPPINGS = {
+    'kesar pista': ['kesar pista', 'saffron pistachio', 'kesar', 'pista'],
+    'dark chocolate': ['dark chocolate', 'dark cocoa', 'dark choc'],
+    'mango lassi': ['mango lassi', 'lassi', 'mango'],
+    'masala chai': ['masala chai', 'chai', 'masala'],
+    'chocolate': ['chocolate', 'choco', 'cocoa'],
+    'vanilla': ['vanilla'],
+    'strawberry': ['strawberry', 'strawberries'],
+    'banana': ['banana'],
+    'coffee': ['coffee', 'mocha'],
+    'caramel': ['caramel'],
+    'mint': ['mint', 'peppermint'],
+    'berry': ['berry', 'berries', 'blueberry', 'blueberries', 'cranberry', 'cranberries'],
+    'coconut': ['coconut'],
+    'peanut butter': ['peanut butter', 'peanut'],
+    'orange': ['orange', 'citrus'],
+    'honey': ['honey'],
+    'watermelon': ['watermelon'],
+    'rose': ['rose', 'gulkand'],
+    'litchi': ['litchi', 'lychee'],
+    'butterscotch': ['butterscotch', 'toffee'],
+    'grape': ['grape']
+}
+
+
+# Compiled flavor lexicon
+class FlavorLexicon:
+    """Match every flavor variant with one word-bounded alternation regex.
+
+    Variants are tried longest first, so "dark chocolate" is reported as
+    dark chocolate only, and word boundaries stop "pista" from matching
+    inside unrelated words.
+    """
+
+    def __init__(self, mappings):
+        self.mappings = mappings
+        self.variant_to_flavor = {}
+        for canonical_flavor, variants in mappings.items():
+            for variant in variants:
+                self.variant_to_flavor.setdefault(variant.lower(), canonical_flavor)
+
+        alternation = '|'.join(
+            re.escape(variant)
+            for variant in sorted(self.variant_to_flavor, key=len, reverse=True)
+        )
+        self.pattern = re.compile(rf'\b({alternation})(?:s|es)?\b')
+
+    def extract(self, text):
+        """Canonical flavors mentioned in one text, once each, in order of mention"""
+        found_flavors = []
+        for match in self.pattern.finditer(text.lower() if isinstance(text, str) else ''):
+            flavor = self.variant_to_flavor[match.group(1)]
+            if flavor not in found_flavors:
+                found_flavors.append(flavor)
+        return found_flavors
+
+    def extract_many(self, texts):
+        """Canonical flavors per text for a whole corpus, scanned in a single pass"""
+        lowered = [text.lower() if isinstance(text, str) else '' for text in texts]
+        offsets = []
+        position = 0
+        for text in lowered:
+            offsets.append(position)
+            position += len(text) + 1
+
+        results = [[] for _ in lowered]
+        for match in self.pattern.finditer('\n'.join(lowered)):
+            found_flavors = results[bisect_right(offsets, match.start()) - 1]
+            flavor = self.variant_to_flavor[match.group(1)]
+            if flavor not in found_flavors:
+                found_flavors.append(flavor)
+        return results
+
+    def count(self, texts):
+        """Number of texts mentioning each canonical flavor"""
+        counts = Counter()
+        for found_flavors in self.extract_many(texts):
+            counts.update(found_flavors)
+        return counts
+
+
+DEFAULT_LEXICON = FlavorLexicon(FLAVOR_MAPPINGS)
+
+
+# Extract flavor mentions
+def extract_flavors(text):
+    """Extract and normalize flavor mentions"""
+    return DEFAULT_LEXICON.extract(text)
+
+
+@traced('flavors.extract')
+def extract_flavors_corpus(texts):
+    """Extract flavor mentions for every text in one pass"""
+    return DEFAULT_LEXICON.extract_many(list(texts))
+
+
+@traced('flavors.count')
+def count_flavors(texts):
+    """Count texts mentioning each canonical flavor across a corpus"""
+    return DEFAULT_LEXICON.count(list(texts))
+
+
+# Flavor index over a review DataFrame
+class FlavorIndex:
+    """Sparse document x flavor indicator matrix with per-source and per-day counts.
+
+    `matrix` has one row per DataFrame row (same index) and one Sparse[bool]
+    column per flavor; `by_source` and `by_day` count documents mentioning
+    each flavor; `totals` is sorted most-mentioned first.
+    """
+
+    def __init__(self, matrix, by_source, by_day, totals):
+        self.matrix = matrix
+        self.by_source = by_source
+        self.by_day = by_day
+        self.totals = totals
+
+    def top(self, n=15):
+        """(flavor, count) pairs for the n most mentioned flavors"""
+        return list(self.totals.head(n).items())
+
+    def mask(self, *flavors):
+        """Boolean row mask for documents mentioning any of `flavors`"""
+        columns = [flavor for flavor in flavors if flavor in self.matrix.columns]
+        if not columns:
+            return pd.Series(False, index=self.matrix.index)
+        return self.matrix[columns].sparse.to_dense().any(axis=1)
+
+
+@traced('flavors.index')
+def build_flavor_index(df, lexicon=DEFAULT_LEXICON):
+    """Index flavor mentions of a scrape_live_data / generate_sample_data frame"""
+    text = df['text'].reset_index(drop=True).fillna('').astype(str).str.lower()
+
+    matches = text.str.extractall(lexicon.pattern)
+    if len(matches):
+        pairs = pd.DataFrame({
+            'doc': matches.index.get_level_values(0).to_numpy(),
+            'flavor': matches[0].map(lexicon.variant_to_flavor).to_numpy(),
+        }).drop_duplicates()
+    else:
+        pairs = pd.DataFrame({'doc': pd.Series(dtype='int64'), 'flavor': pd.Series(dtype='object')})
+
+    flavors = [flavor for flavor in lexicon.mappings if flavor in set(pairs['flavor'])]
+    columns = {}
+    for flavor, docs in pairs.groupby('flavor', sort=False)['doc']:
+        column = np.zeros(len(text), dtype=bool)
+        column[docs.to_numpy()] = True
+        columns[flavor] = pd.arrays.SparseArray(column, fill_value=False)
+    matrix = pd.DataFrame({flavor: columns[flavor] for flavor in flavors}, index=df.index)
+
+    pairs['source'] = df['source'].to_numpy()[pairs['doc'].to_numpy()]
+    pairs['day'] = pd.to_datetime(df['created']).dt.normalize().to_numpy()[pairs['doc'].to_numpy()]
+    by_source = pd.crosstab(pairs['source'], pairs['flavor']).reindex(columns=flavors, fill_value=0)
+    by_day = pd.crosstab(pairs['day'], pairs['flavor']).reindex(columns=flavors, fill_value=0)
+    totals = pairs['flavor'].value_counts()
+
+    return FlavorIndex(matrix, by_source, by_day, totals)
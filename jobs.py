@@ -0,0 +1,136 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import Tracer, use_tracer
+
+# Job states; a job is done once it leaves 'queued'/'running'
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+
+# One background job
+class Job:
+    """State of one function call on a JobQueue, shared by its worker and the UI.
+
+    The function receives the Job as its first argument and reports through
+    it: set_stage() for the current progress line, notify() for status
+    messages (same signature as the scrapers' notify callbacks) and
+    add_item() for streamed analysis objects (an on_item callback). Its
+    return value lands in `result`, an exception in `error`. Spans recorded
+    while it runs go to the job's own `tracer`.
+    """
+
+    def __init__(self, job_id, name, key=None):
+        self.id = job_id
+        self.name = name
+        self.key = key
+        self.status = QUEUED
+        self.stage = None
+        self.messages = []
+        self.items = []
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.tracer = Tracer(name)
+        self.future = None
+
+    @property
+    def done(self):
+        return self.status not in (QUEUED, RUNNING)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def set_stage(self, stage):
+        self.stage = stage
+
+    def notify(self, level, message):
+        self.messages.append((level, message))
+
+    def add_item(self, section, item):
+        self.items.append((time.time() - (self.started or self.submitted), section, item))
+
+
+# In-process worker pool
+class JobQueue:
+    """Run functions on worker threads and keep their Jobs by id.
+
+    Scraping and Groq calls mostly wait on the network, so threads (shared
+    by every session of the server process) are enough. submit() with a
+    `key` returns the unfinished job already running under that key instead
+    of starting a second one (single flight), or one that finished
+    successfully less than `reuse_for` seconds ago, so identical requests
+    from concurrent sessions share one run and one result object. Finished
+    jobs are kept until `keep` newer ones have finished, so a UI that polls
+    by id can still collect the result.
+    """
+
+    def __init__(self, max_workers=4, keep=100):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.keep = keep
+        self.jobs = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, name=None, key=None, reuse_for=0, **kwargs):
+        """Queue fn(job, *args, **kwargs); returns its Job (or the job already covering `key`)"""
+        with self.lock:
+            if key is not None:
+                now = time.time()
+                for job in self.jobs.values():
+                    if job.key != key:
+                        continue
+                    if not job.done or (job.status == DONE and now - job.finished < reuse_for):
+                        return job
+            job = Job(f"{name or fn.__name__}-{next(self.ids)}", name or fn.__name__, key)
+            self.jobs[job.id] = job
+        job.future = self.pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        with self.lock:
+            if job.status == CANCELLED:
+                return
+            job.status = RUNNING
+            job.started = time.time()
+        try:
+            with use_tracer(job.tracer):
+                result = fn(job, *args, **kwargs)
+        except Exception as e:
+            job.finished = time.time()
+            job.error = e
+            job.status = FAILED
+        else:
+            job.finished = time.time()
+            job.result = result
+            job.status = DONE
+        self._prune()
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Drop a job that has not started yet; returns whether it was cancelled"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            job.status = CANCELLED
+            job.finished = time.time()
+        job.future.cancel()
+        return True
+
+    def active(self):
+        with self.lock:
+            return [job for job in self.jobs.values() if not job.done]
+
+    def _prune(self):
+        with self.lock:
+            finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.finished)
+            for job in finished[:-self.keep]:
+                del self.jobs[job.id]
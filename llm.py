@@ -0,0 +1,436 @@
+import contextvars
+import json
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_cache import analysis_cache_key
+from flavors import DEFAULT_LEXICON
+from ratelimit import TokenBucket
+from tracing import span
+
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
+CONFIDENCE_RANK = {'high': 3, 'medium': 2, 'low': 1}
+
+BRAND_GUIDELINES = {
+    'MuscleBlaze': "Hardcore gym supplements for serious athletes (Whey Protein, Mass Gainers, Pre-workout)",
+    'HK Vitals': "Wellness and lifestyle supplements for everyday health (Multivitamins, Omega-3, Immunity boosters)",
+    'TrueBasics': "Science-backed nutrition for holistic wellness (Targeted supplements, Functional nutrition)",
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def brand_guidelines(brand_context):
+    """Guideline lines for the selected brands only (all brands if none are recognised)"""
+    brand_list = ", ".join(brand_context) if isinstance(brand_context, list) else brand_context or ''
+    selected = [brand for brand in BRAND_GUIDELINES if brand.lower() in brand_list.lower()]
+    return "\n".join(f"- {brand}: {BRAND_GUIDELINES[brand]}" for brand in selected or BRAND_GUIDELINES)
+
+
+def build_prompt(data_text, brand_context):
+    """Fill the flavor-analysis prompt for a block of comments"""
+    # Format brand list for prompt
+    brand_list = ", ".join(brand_context) if isinstance(brand_context, list) else brand_context
+
+    return f"""You are a flavor innovation analyst for HealthKart's brands.
+
+IMPORTANT: Only analyze for these specific brands: {brand_list}
+
+Brand Guidelines:
+{brand_guidelines(brand_context)}
+
+Analyze these social media comments about supplement flavors:
+
+{data_text}
+
+Your task:
+1. Identify the top 5 most promising NEW flavor ideas - ONLY for the brands: {brand_list}
+2. Identify 5 ideas to REJECT and why
+3. Pick the #1 GOLDEN CANDIDATE with strongest market potential - MUST be from: {brand_list}
+
+CRITICAL: Only recommend flavors for {brand_list}. Do not suggest flavors for brands not in this list.
+
+For each recommendation:
+- Suggest which brand it fits FROM THIS LIST ONLY: {brand_list}
+- Explain WHY it works in ONE simple sentence (no technical jargon)
+- Rate confidence: High/Medium/Low
+
+Return ONLY valid JSON in this exact format:
+{{
+  "recommended": [
+    {{
+      "flavor": "Flavor Name",
+      "brand": "Brand Name",
+      "product_type": "Whey Protein/Gummies/Pre-workout/etc",
+      "why": "Simple one-sentence explanation",
+      "confidence": "High/Medium/Low",
+      "user_pain_point": "What problem this solves"
+    }}
+  ],
+  "rejected": [
+    {{
+      "flavor": "Flavor Name",
+      "reason": "Why this won't work"
+    }}
+  ],
+  "golden_candidate": {{
+    "flavor": "Flavor Name",
+    "brand": "Brand Name",
+    "product_type": "Product Type",
+    "why": "Compelling reason",
+    "market_opportunity": "Market insight"
+  }}
+}}"""
+
+
+def parse_analysis(response_text):
+    """Pull the JSON object out of a model response, ignoring text (and stray braces) around it"""
+    parser = AnalysisStreamParser()
+    parser.feed(response_text)
+    return parser.result()
+
+
+# Incremental parsing of a streamed analysis
+class AnalysisStreamParser:
+    """Emit each analysis card as soon as its JSON object is complete.
+
+    feed() takes response text as it streams and returns the newly closed
+    `(section, object)` pairs: every item of `recommended` and `rejected`
+    and the `golden_candidate` object. Text outside the root object is
+    ignored. Every top-level "{...}" that parses as a JSON object is a
+    candidate root; result() returns the longest, so braces in a preamble
+    ("Here is the analysis for {MuscleBlaze}:") or a trailing note do not
+    break the final parse.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.pos = 0
+        self.stack = []  # [opening char, start offset, section, current key]
+        self.in_string = False
+        self.escaped = False
+        self.string_start = None
+        self.last_string = None
+        self.root = None
+        self.root_span = None
+
+    def result(self):
+        """The parsed root object; raises JSONDecodeError when the text held none"""
+        if self.root is None:
+            return json.loads(self.text)
+        return self.root
+
+    def feed(self, delta):
+        self.text += delta
+        items = []
+        text = self.text
+        for pos in range(self.pos, len(text)):
+            char = text[pos]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start:pos]
+                continue
+            if not self.stack and char != '{':
+                continue
+            if char == '"':
+                self.in_string = True
+                self.string_start = pos + 1
+            elif char == ':' and self.stack[-1][0] == '{':
+                self.stack[-1][3] = self.last_string
+            elif char in '{[':
+                parent = self.stack[-1] if self.stack else None
+                section = None
+                if parent is not None:
+                    section = parent[3] if len(self.stack) == 1 else parent[2]
+                self.stack.append([char, pos, section, None])
+            elif char in '}]':
+                opening, start, section, _ = self.stack.pop()
+                if not self.stack:
+                    self._close_root(opening, start, pos + 1)
+                    continue
+                # A root-level object (golden_candidate) or an item of a root-level list
+                top_level = len(self.stack) == 1 or (len(self.stack) == 2 and self.stack[-1][0] == '[')
+                if opening == '{' and top_level and section is not None:
+                    try:
+                        items.append((section, json.loads(text[start:pos + 1])))
+                    except json.JSONDecodeError:
+                        pass
+        self.pos = len(text)
+        return items
+
+    def _close_root(self, opening, start, end):
+        if opening != '{' or (self.root_span is not None and end - start <= self.root_span[1] - self.root_span[0]):
+            return
+        try:
+            root = json.loads(self.text[start:end])
+        except json.JSONDecodeError:
+            return
+        self.root = root
+        self.root_span = (start, end)
+
+
+def _replay(analysis, on_item):
+    for section in ('golden_candidate', 'recommended', 'rejected'):
+        value = analysis.get(section)
+        for item in (value if isinstance(value, list) else [value] if value else []):
+            on_item(section, item)
+
+
+def request_analysis(client, data_text, brand_context, model=GROQ_MODEL, temperature=0.7, max_tokens=2000,
+                     cache=None, throttle=None, on_item=None):
+    """Run one analysis completion; raises on API or JSON errors.
+
+    With an AnalysisCache, identical prompt/model/temperature/brand requests
+    are answered from the cache instead of the API. Answers are stored
+    under the model that actually produced them (a ModelRouter may fail
+    over or hedge to another one), so a smaller model's answer is never
+    served for the primary model's key. `throttle` is called right before a
+    real API request (e.g. a rate limiter's acquire). With
+    `on_item(section, object)` the completion is streamed and each card is
+    handed over as soon as it is complete (cached results are replayed).
+    """
+    prompt = build_prompt(data_text, brand_context)
+    model = getattr(client, 'primary_model', model)
+    if cache is not None:
+        key = analysis_cache_key(prompt, model, temperature, brand_context, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            if on_item is not None:
+                _replay(cached, on_item)
+            return cached
+
+    if throttle is not None:
+        with span('llm.throttle'):
+            throttle()
+    with span('llm.request', model=model, stream=on_item is not None) as attrs:
+        analysis, answered_by = _complete(client, prompt, model, temperature, max_tokens, on_item)
+        attrs['answered_by'] = answered_by
+
+    if cache is not None:
+        cache.put(analysis_cache_key(prompt, answered_by, temperature, brand_context, max_tokens), analysis)
+    return analysis
+
+
+def _complete(client, prompt, model, temperature, max_tokens, on_item):
+    """One (optionally streamed) chat completion: (analysis dict, model that answered)"""
+    chat_completion = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=on_item is not None
+    )
+    if on_item is None:
+        analysis = parse_analysis(chat_completion.choices[0].message.content)
+        answered_by = getattr(chat_completion, 'model', None)
+    else:
+        parser = AnalysisStreamParser()
+        answered_by = None
+        for chunk in chat_completion:
+            answered_by = answered_by or getattr(chunk, 'model', None)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                for section, item in parser.feed(delta):
+                    on_item(section, item)
+        analysis = parser.result()
+    return analysis, answered_by or model
+
+
+def _comment_line(text, max_chars_per_text):
+    return f"- {text.strip()[:max_chars_per_text]}"
+
+
+# Single-call prompt packing
+def _information(review, flavors):
+    """How much a review is worth sending: flavor mentions first, then engagement"""
+    return 2.0 * len(flavors) + math.log1p(max(review.score, 0)) + 0.5 * math.log1p(max(review.comments, 0))
+
+
+def pack_reviews(reviews, token_budget=1500, max_chars_per_text=200, lexicon=DEFAULT_LEXICON):
+    """Pick the most informative reviews that fit `token_budget` as "- text" lines.
+
+    Reviews are ranked by flavor mentions, then score and comment count,
+    and taken round-robin across sources (best source first) so no single
+    source fills the budget. Lines that do not fit are skipped in favour of
+    shorter ones further down.
+    """
+    reviews = [review for review in reviews if isinstance(review.text, str) and review.text.strip()]
+    by_source = {}
+    for review, flavors in zip(reviews, lexicon.extract_many([review.text for review in reviews])):
+        by_source.setdefault(review.source, []).append((_information(review, flavors), review.text))
+    # Each queue is sorted worst-first so pop() takes its best review
+    queues = sorted((sorted(items) for items in by_source.values()), key=lambda queue: queue[-1], reverse=True)
+
+    lines = []
+    seen = set()
+    used = 0
+    while queues and used < token_budget:
+        for queue in queues:
+            _, text = queue.pop()
+            line = _comment_line(text, max_chars_per_text)
+            cost = estimate_tokens(line)
+            if line not in seen and used + cost <= token_budget:
+                seen.add(line)
+                lines.append(line)
+                used += cost
+        queues = [queue for queue in queues if queue]
+    return lines
+
+
+# Map step: split the corpus into token-budgeted batches
+def iter_chunks(texts, token_budget=2500, max_chars_per_text=200):
+    """Lazily group comments into "- text" blocks that each fit `token_budget`"""
+    lines = []
+    used = 0
+    for text in texts:
+        if not isinstance(text, str) or not text.strip():
+            continue
+        line = _comment_line(text, max_chars_per_text)
+        cost = estimate_tokens(line)
+        if lines and used + cost > token_budget:
+            yield "\n".join(lines)
+            lines = []
+            used = 0
+        lines.append(line)
+        used += cost
+    if lines:
+        yield "\n".join(lines)
+
+
+def chunk_texts(texts, token_budget=2500, max_chars_per_text=200):
+    """All chunks from iter_chunks() as a list"""
+    return list(iter_chunks(texts, token_budget, max_chars_per_text))
+
+
+# Reduce step: merge per-chunk analyses
+def _flavor_key(name):
+    return re.sub(r'\s*\(.*?\)', '', name or '').strip().lower()
+
+
+def merge_analyses(analyses, top_n=5):
+    """Merge chunk results: rank flavors by how often and how confidently they were picked"""
+    recommended = {}
+    scores = {}
+    for analysis in analyses:
+        for rec in analysis.get('recommended', []):
+            key = _flavor_key(rec.get('flavor'))
+            if not key:
+                continue
+            rank = CONFIDENCE_RANK.get(str(rec.get('confidence', '')).lower(), 1)
+            scores[key] = scores.get(key, 0) + rank
+            best = recommended.get(key)
+            if best is None or rank > CONFIDENCE_RANK.get(str(best.get('confidence', '')).lower(), 1):
+                recommended[key] = rec
+
+    golden_votes = {}
+    golden_by_key = {}
+    for analysis in analyses:
+        golden = analysis.get('golden_candidate') or {}
+        key = _flavor_key(golden.get('flavor'))
+        if key:
+            golden_votes[key] = golden_votes.get(key, 0) + 1
+            golden_by_key.setdefault(key, golden)
+
+    ranked = sorted(recommended, key=lambda key: (scores[key], golden_votes.get(key, 0)), reverse=True)
+
+    rejected = []
+    seen = set(ranked[:top_n])
+    for analysis in analyses:
+        for rej in analysis.get('rejected', []):
+            key = _flavor_key(rej.get('flavor'))
+            if key and key not in seen:
+                seen.add(key)
+                rejected.append(rej)
+
+    merged = {
+        'recommended': [recommended[key] for key in ranked[:top_n]],
+        'rejected': rejected[:top_n],
+    }
+    if golden_by_key:
+        best = max(golden_by_key, key=lambda key: (golden_votes[key], scores.get(key, 0)))
+        merged['golden_candidate'] = golden_by_key[best]
+    return merged
+
+
+def analyze_corpus(client, texts, brand_context, token_budget=2500, max_chars_per_text=200,
+                   max_concurrency=4, requests_per_minute=30, model=GROQ_MODEL, cache=None):
+    """Map-reduce analysis of the whole corpus.
+
+    `texts` may be any iterable, including a generator still being filled by
+    a scraper: chunks are cut and submitted as texts arrive. Chunks are
+    analyzed on at most `max_concurrency` threads, paced by a token bucket at
+    `requests_per_minute`, and a bounded semaphore holds back the producer
+    once 2 x `max_concurrency` chunks are waiting, so memory stays bounded.
+    Results are merged with merge_analyses(). Chunks found in `cache` skip
+    the API. Failed chunks are skipped; if every chunk fails the last error
+    is raised.
+    """
+    bucket = TokenBucket(requests_per_minute / 60.0, capacity=max_concurrency)
+    slots = threading.BoundedSemaphore(2 * max_concurrency)
+
+    def run(data_text):
+        try:
+            return request_analysis(client, data_text, brand_context, model=model, cache=cache,
+                                    throttle=bucket.acquire)
+        finally:
+            slots.release()
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        for chunk in iter_chunks(texts, token_budget, max_chars_per_text):
+            slots.acquire()
+            futures.append(pool.submit(contextvars.copy_context().run, run, chunk))
+
+    if not futures:
+        return None
+
+    analyses = []
+    last_error = None
+    for future in futures:
+        try:
+            analyses.append(future.result())
+        except Exception as e:
+            last_error = e
+
+    if not analyses:
+        raise last_error
+    if len(analyses) == 1:
+        return analyses[0]
+    return merge_analyses(analyses)
+
+
+# Keep only recommendations for the selected brands
+def filter_analysis_for_brands(analysis, brand_filter):
+    """Drop recommendations for other brands and re-pick the golden candidate if needed"""
+    if 'recommended' in analysis:
+        filtered_recs = []
+        for rec in analysis['recommended']:
+            if any(brand.lower() in rec.get('brand', '').lower() for brand in brand_filter):
+                filtered_recs.append(rec)
+        analysis['recommended'] = filtered_recs
+
+    # Filter golden candidate
+    if 'golden_candidate' in analysis:
+        golden_brand = analysis['golden_candidate'].get('brand', '')
+        if not any(brand.lower() in golden_brand.lower() for brand in brand_filter):
+            # Replace with first recommendation if golden doesn't match
+            if analysis.get('recommended'):
+                analysis['golden_candidate'] = {
+                    'flavor': analysis['recommended'][0].get('flavor'),
+                    'brand': analysis['recommended'][0].get('brand'),
+                    'product_type': analysis['recommended'][0].get('product_type'),
+                    'why': analysis['recommended'][0].get('why'),
+                    'market_opportunity': f"Strong demand from {analysis['recommended'][0].get('brand')} target audience"
+                }
+    return analysis
@@ -0,0 +1,181 @@
+import os
+import time
+from collections import Counter
+
+from analysis_cache import AnalysisCache
+from dedup import DuplicateFilter
+from flavors import DEFAULT_LEXICON
+from llm import analyze_corpus, filter_analysis_for_brands
+from records import ReviewTable, batched, reviews_from_frame
+from review_store import ReviewStore, refresh_amazon, refresh_reddit
+from router import build_router
+from sample_data import generate_competitor_reviews, generate_sample_data
+from tracing import Tracer, span, use_tracer
+from trends import TrendEngine
+
+
+# Stored history streamed back per source: at most HISTORY_RUNS times the
+# per-refresh limit, newest first
+HISTORY_RUNS = 10
+AMAZON_REVIEWS_PER_TERM = 15
+
+
+def _ignore(level, message):
+    pass
+
+
+# Streaming data collection
+def stream_reviews(data_sources, amazon_terms=None, reddit_subs=None, post_limit=20, store=None,
+                   force_refresh=False, notify=None, fallback_sources=None):
+    """Yield Review records for the selected sources as each one becomes available.
+
+    Each scraped source is refreshed into the review store and then streamed
+    back from it in batches, so no source is held in memory as a whole. Only
+    the newest HISTORY_RUNS refreshes' worth of items per term/subreddit
+    are streamed, so the corpus stays proportional to the per-source limits
+    however long the store has been collecting. The fetch of each source
+    is timed as a scrape.* span (the stored history read back is not).
+    Sources that were streamed canned fallback reviews are added to the
+    `fallback_sources` set, if given.
+    """
+    notify = notify or _ignore
+    store = store or ReviewStore()
+
+    if 'Amazon Reviews' in data_sources and amazon_terms:
+        fallback = []
+        with span('scrape.amazon', terms=len(amazon_terms)) as attrs:
+            added = attrs['added'] = refresh_amazon(store, amazon_terms, max_per_term=AMAZON_REVIEWS_PER_TERM,
+                                                    force=force_refresh, notify=notify, fallback=fallback)
+        notify('caption', f"Amazon: {added} new reviews stored")
+        sources = [f'Amazon ({term})' for term in amazon_terms]
+        yield from store.iter_reviews(sources, per_source=AMAZON_REVIEWS_PER_TERM * HISTORY_RUNS)
+        # Canned reviews stand in (unstored) only for terms with no real reviews at all
+        for review in fallback:
+            if not store.has_source(review.source):
+                if fallback_sources is not None:
+                    fallback_sources.add(review.source)
+                yield review
+
+    if 'Competitor Analysis' in data_sources:
+        with span('scrape.competitor'):
+            competitor = generate_competitor_reviews(max_reviews=30)
+        yield from reviews_from_frame(competitor, 'competitor')
+
+    if 'Reddit' in data_sources and reddit_subs:
+        with span('scrape.reddit', subreddits=len(reddit_subs)) as attrs:
+            added = attrs['added'] = refresh_reddit(store, reddit_subs, post_limit, force=force_refresh, notify=notify)
+        notify('caption', f"Reddit: {added} new posts stored")
+        yield from store.iter_reviews((f'r/{sub}' for sub in reddit_subs), per_source=post_limit * HISTORY_RUNS)
+
+
+# Combined data collection
+def collect_data(data_sources, amazon_terms=None, reddit_subs=None, post_limit=20, store=None,
+                 force_refresh=False, notify=None, fallback_sources=None):
+    """Refresh the selected sources into the review store and return them as one DataFrame.
+
+    Near-duplicate reviews are dropped; the per-source rates go to `notify`.
+    See stream_reviews() for `fallback_sources`.
+    """
+    duplicates = DuplicateFilter()
+    reviews = stream_reviews(data_sources, amazon_terms, reddit_subs, post_limit, store, force_refresh, notify,
+                             fallback_sources)
+    table = ReviewTable.from_reviews(duplicates.filter(reviews))
+    (notify or _ignore)('caption', duplicates.summary())
+    return table.to_frame()
+
+
+# Streaming flavor counting + LLM batching
+def analyze_stream(reviews, client=None, brand_context=None, cache=None, on_progress=None, batch_size=500,
+                   **llm_options):
+    """Count flavors and feed LLM chunks from a Review stream without holding the corpus.
+
+    Reviews are consumed in batches of `batch_size`: each batch is flavor-
+    counted in one lexicon pass and its texts flow straight into
+    analyze_corpus() (skipped when `client` is None). `on_progress(summary)`
+    is called after every batch with the running `rows`, `flavor_counts`,
+    `flavor_counts_by_source` and daily `trends` (a TrendEngine). Returns
+    that summary plus `analysis`.
+    """
+    summary = {'rows': 0, 'flavor_counts': Counter(), 'flavor_counts_by_source': {}, 'trends': TrendEngine(),
+               'analysis': None}
+
+    def texts():
+        for batch in batched(reviews, batch_size):
+            with span('flavors.count', rows=len(batch)):
+                found_flavors = DEFAULT_LEXICON.extract_many([review.text for review in batch])
+                for review, found in zip(batch, found_flavors):
+                    summary['flavor_counts'].update(found)
+                    summary['flavor_counts_by_source'].setdefault(review.source, Counter()).update(found)
+            with span('trends.update', rows=len(batch)):
+                summary['trends'].update([review.created for review in batch], found_flavors)
+            summary['rows'] += len(batch)
+            if on_progress is not None:
+                on_progress(summary)
+            for review in batch:
+                yield review.text
+
+    if client is None:
+        for _ in texts():
+            pass
+    else:
+        summary['analysis'] = analyze_corpus(client, texts(), brand_context, cache=cache, **llm_options)
+    return summary
+
+
+# Headless job runner
+def run_job(job, api_key=None, store_path=None, trace_path=None):
+    """Run scrape -> flavor extraction -> Groq analysis for one job config.
+
+    `job` holds `name`, `data_sources`, `amazon_terms`, `reddit_subs`,
+    `post_limit`, `brands` and `force_refresh`; an empty `data_sources` list
+    means the sample data. Returns a JSON-serialisable result with flavor
+    counts, flavors ranked by 7-day momentum (`trending`) and per-stage
+    `timings`; failures are reported in its `error` field rather than raised.
+    With `trace_path` the job's spans are also saved as a Chrome trace.
+    """
+    started = time.time()
+    brands = job.get('brands') or ["MuscleBlaze", "HK Vitals", "TrueBasics"]
+    result = {'job': job.get('name'), 'config': job, 'started': started, 'error': None}
+
+    tracer = Tracer(job.get('name') or 'job')
+    with use_tracer(tracer):
+        try:
+            api_key = api_key or os.environ.get('GROQ_API_KEY')
+            client = build_router(api_key) if api_key else None
+            cache = AnalysisCache() if client else None
+
+            duplicates = DuplicateFilter()
+            data_sources = job.get('data_sources') or []
+            reviews = stream_reviews(data_sources, job.get('amazon_terms'), job.get('reddit_subs'),
+                                     job.get('post_limit', 20), store=ReviewStore(store_path) if store_path else None,
+                                     force_refresh=job.get('force_refresh', False)) if data_sources else iter(())
+            with span('job.stream'):
+                summary = analyze_stream(duplicates.filter(reviews), client, brands, cache=cache)
+
+            result['used_sample_data'] = summary['rows'] == 0
+            if summary['rows'] == 0:
+                sample = reviews_from_frame(generate_sample_data(), 'sample')
+                summary = analyze_stream(duplicates.filter(sample), client, brands, cache=cache)
+
+            result['rows'] = summary['rows']
+            result['duplicate_rates'] = duplicates.rates()
+            result['flavor_counts'] = dict(summary['flavor_counts'].most_common())
+            result['flavor_counts_by_source'] = {
+                source: dict(counts.most_common()) for source, counts in summary['flavor_counts_by_source'].items()
+            }
+            result['trending'] = summary['trends'].momentum(n=15).round(3).reset_index().to_dict('records')
+
+            if client is None:
+                raise RuntimeError("GROQ_API_KEY is not set")
+            analysis = summary['analysis']
+            result['analysis'] = filter_analysis_for_brands(analysis, brands) if analysis else None
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+
+    result['seconds'] = round(time.time() - started, 3)
+    result['timings'] = {
+        name: {key: round(value, 4) for key, value in stats.items()} for name, stats in tracer.summary().items()
+    }
+    if trace_path:
+        tracer.save(trace_path)
+    return result
@@ -0,0 +1,93 @@
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+ROW_FIELDS = ('text', 'source', 'score', 'comments', 'created')
+
+
+# Typed review record
+@dataclass(slots=True)
+class Review:
+    """One review or post on its way from a scraper to analysis.
+
+    `kind` is the origin ('amazon', 'reddit', 'competitor', 'sample');
+    `parent` and `item_id` identify it there (ASIN + review id, subreddit +
+    post id) and are empty for generated data.
+    """
+    text: str
+    source: str
+    score: int = 0
+    comments: int = 0
+    created: datetime = field(default_factory=datetime.now)
+    kind: str = ''
+    parent: str = ''
+    item_id: str = ''
+
+    def as_row(self):
+        """The text/source/score/comments/created dict the DataFrames are built from"""
+        return {'text': self.text, 'source': self.source, 'score': self.score,
+                'comments': self.comments, 'created': self.created}
+
+
+# Columnar review table
+class ReviewTable:
+    """Column store for a corpus of reviews.
+
+    `source` is categorical (one copy of each label plus small integer
+    codes), `score`/`comments` are int32 and `created` is datetime64, so a
+    corpus costs a fraction of the equivalent list of row dicts. to_frame()
+    wraps the columns in a DataFrame without copying them.
+    """
+    __slots__ = ('text', 'source', 'score', 'comments', 'created')
+
+    def __init__(self, text, source, score, comments, created):
+        self.text = text
+        self.source = source
+        self.score = score
+        self.comments = comments
+        self.created = created
+
+    @classmethod
+    def from_reviews(cls, reviews):
+        """Build the columns from any iterable of Review records in one pass"""
+        text, created = [], []
+        codes, score, comments = array('i'), array('i'), array('i')
+        categories = {}
+        for review in reviews:
+            text.append(review.text)
+            codes.append(categories.setdefault(review.source, len(categories)))
+            score.append(review.score)
+            comments.append(review.comments)
+            created.append(review.created)
+        return cls(
+            np.array(text, dtype=object),
+            pd.Categorical.from_codes(np.asarray(codes, dtype=np.int32), categories=list(categories)),
+            np.asarray(score, dtype=np.int32),
+            np.asarray(comments, dtype=np.int32),
+            pd.to_datetime(created).to_numpy(),
+        )
+
+    def __len__(self):
+        return len(self.text)
+
+    def to_frame(self):
+        """The text/source/score/comments/created DataFrame, sharing this table's arrays"""
+        return pd.DataFrame({'text': self.text, 'source': self.source, 'score': self.score,
+                             'comments': self.comments, 'created': self.created}, copy=False)
+
+
+def reviews_from_frame(df, kind):
+    """Yield Review records for the rows of a text/source/score/comments/created DataFrame"""
+    for row in df[list(ROW_FIELDS)].itertuples(index=False):
+        yield Review(row.text, row.source, int(row.score), int(row.comments), row.created, kind)
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
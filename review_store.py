@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from records import Review, ReviewTable, batched
+from scrapers import iter_amazon, iter_reddit
+from tracing import traced
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'reviews.sqlite')
+
+
+def _item_id(review):
+    """The review's own id, or a hash of its text when the page had none"""
+    return review.item_id or hashlib.sha1(review.text.encode('utf-8')).hexdigest()
+
+
+def is_fallback(review):
+    """True for the canned reviews the Amazon scraper substitutes when it gets no real page"""
+    return bool(review.item_id) and review.item_id.startswith('fallback-')
+
+
+# Persistent review store
+class ReviewStore:
+    """SQLite store of scraped reviews and posts plus per-source high-water marks.
+
+    Amazon reviews are keyed by (ASIN, review id) and Reddit posts by
+    (subreddit, post id), so re-scraped items are never stored twice. Marks
+    remember when each term/subreddit was last refreshed, the ASINs found for
+    a term and the newest Reddit post seen.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.refresh_locks = {}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS reviews ('
+                'kind TEXT NOT NULL, parent TEXT NOT NULL, item_id TEXT NOT NULL, '
+                'text TEXT NOT NULL, source TEXT NOT NULL, score INTEGER, comments INTEGER, '
+                'created REAL NOT NULL, fetched REAL NOT NULL, '
+                'PRIMARY KEY (kind, parent, item_id))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS reviews_source ON reviews (source, created)')
+            conn.execute('CREATE INDEX IF NOT EXISTS reviews_item ON reviews (kind, item_id)')
+            # Canned fallback reviews stored by earlier versions are not data
+            conn.execute("DELETE FROM reviews WHERE item_id LIKE 'fallback-%'")
+            conn.execute('CREATE TABLE IF NOT EXISTS marks (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, reviews):
+        """Insert Review records not already stored; returns how many were new"""
+        now = time.time()
+        rows = [
+            (review.kind, review.parent, _item_id(review), review.text, review.source,
+             review.score, review.comments, review.created.timestamp(), now)
+            for review in reviews
+        ]
+        with self.lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            return conn.total_changes - before
+
+    def has_item(self, kind, item_id):
+        """Whether an item id is already stored for a kind ('amazon' or 'reddit')"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT 1 FROM reviews WHERE kind = ? AND item_id = ? LIMIT 1',
+                               (kind, item_id)).fetchone()
+        return row is not None
+
+    def stored_items(self, kind, item_ids):
+        """The subset of `item_ids` already stored for a kind, looked up over one connection"""
+        item_ids = list(dict.fromkeys(item_ids))
+        found = set()
+        with self._connect() as conn:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(item_ids), 500):
+                chunk = item_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                rows = conn.execute(f'SELECT item_id FROM reviews WHERE kind = ? AND item_id IN ({placeholders})',
+                                    (kind, *chunk))
+                found.update(item_id for item_id, in rows)
+        return found
+
+    def has_source(self, source):
+        with self._connect() as conn:
+            return conn.execute('SELECT 1 FROM reviews WHERE source = ? LIMIT 1', (source,)).fetchone() is not None
+
+    def get_mark(self, key, default=None):
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM marks WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_mark(self, key, value):
+        with self.lock, self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO marks VALUES (?, ?)', (key, json.dumps(value)))
+
+    @contextmanager
+    def refreshing(self, keys):
+        """Hold the refresh locks of these marks, so concurrent refreshes of a source wait for the first"""
+        with self.lock:
+            locks = [self.refresh_locks.setdefault(key, threading.Lock()) for key in sorted(set(keys))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def iter_reviews(self, sources, batch_size=1000, per_source=None, since=None):
+        """Stream stored Review records for the given source labels, oldest first.
+
+        `per_source` keeps only the newest that many records of each source
+        and `since` (UTC seconds) only records created after it, so the
+        stream stays bounded however much history the store holds.
+        """
+        sources = list(sources)
+        if not sources:
+            return
+        placeholders = ', '.join('?' for _ in sources)
+        query = (f'SELECT text, source, score, comments, created, kind, parent, item_id, rowid AS rid FROM reviews '
+                 f'WHERE source IN ({placeholders}) AND created >= ?')
+        params = [*sources, since if since is not None else float('-inf')]
+        if per_source is not None:
+            query = (f'SELECT * FROM (SELECT *, ROW_NUMBER() OVER '
+                     f'(PARTITION BY source ORDER BY created DESC, rid DESC) AS newest FROM ({query})) '
+                     f'WHERE newest <= ?')
+            params.append(per_source)
+        with self._connect() as conn:
+            cursor = conn.execute(f'{query} ORDER BY created, rid', params)
+            while rows := cursor.fetchmany(batch_size):
+                for text, source, score, comments, created, kind, parent, item_id, *_ in rows:
+                    yield Review(text, source, score, comments, datetime.fromtimestamp(created), kind, parent, item_id)
+
+    def load(self, sources):
+        """Stored records for the given source labels as a ReviewTable, oldest first"""
+        return ReviewTable.from_reviews(self.iter_reviews(sources))
+
+
+# Stored ids as a set-like object for the scrapers' skip_review_ids
+class _StoredIds:
+    def __init__(self, store, kind):
+        self.store = store
+        self.kind = kind
+
+    def __contains__(self, item_id):
+        return self.store.has_item(self.kind, item_id)
+
+    def intersection(self, item_ids):
+        return self.store.stored_items(self.kind, item_ids)
+
+
+def _is_stale(store, key, max_age, force, requested=None):
+    refreshed = store.get_mark(key, 0)
+    if requested is not None and refreshed >= requested:
+        return False  # refreshed by a concurrent call while this one waited
+    return force or time.time() - refreshed > max_age
+
+
+# Incremental refresh
+@traced('store.refresh_amazon')
+def refresh_amazon(store, search_terms, max_per_term=15, max_age=3600, asin_max_age=24 * 3600,
+                   force=False, engine=None, notify=None, fallback=None):
+    """Fetch only new Amazon reviews for terms not refreshed in the last `max_age` seconds.
+
+    ASINs found for a term are reused for `asin_max_age` seconds, so
+    steady-state runs skip the search page and request review pages sorted
+    by most recent, dropping reviews already in the store. Concurrent calls
+    for the same term scrape it once; the others wait and then skip it.
+    Canned fallback reviews for terms that could not be scraped are
+    appended to the `fallback` list (when given) instead of being stored.
+    Returns the number of reviews stored.
+    """
+    requested = time.time()
+    stale = [term for term in search_terms if _is_stale(store, f'amazon:{term}:refreshed', max_age, force)]
+    if not stale:
+        return 0
+    with store.refreshing(f'amazon:{term}:refreshed' for term in stale):
+        stale = [term for term in stale
+                 if _is_stale(store, f'amazon:{term}:refreshed', max_age, force, requested)]
+        if not stale:
+            return 0
+        return _refresh_amazon_terms(store, stale, max_per_term, asin_max_age, engine, notify, fallback)
+
+
+def _refresh_amazon_terms(store, stale, max_per_term, asin_max_age, engine, notify, fallback, batch_size=200):
+    """Scrape the given stale terms into the store batch by batch (their refresh locks held).
+
+    Fallback reviews are never stored and their terms are not marked
+    refreshed, so the next run tries them again.
+    """
+    known_asins = {}
+    for term in stale:
+        asins = store.get_mark(f'amazon:{term}:asins')
+        if asins and time.time() - asins['found'] <= asin_max_age:
+            known_asins[term] = asins['asins']
+
+    terms = {f'Amazon ({term})': term for term in stale}
+    found = {term: [] for term in stale}
+    failed = set()
+    added = 0
+    reviews = iter_amazon(stale, max_per_term=max_per_term, engine=engine, notify=notify, known_asins=known_asins,
+                          skip_review_ids=_StoredIds(store, 'amazon'), sort_recent=True)
+    for batch in batched(reviews, batch_size):
+        real = []
+        for review in batch:
+            if is_fallback(review):
+                failed.add(terms[review.source])
+                if fallback is not None:
+                    fallback.append(review)
+            else:
+                real.append(review)
+                found[terms[review.source]].append(review.parent)
+        added += store.add(real)
+
+    for term in stale:
+        if term in failed:
+            continue
+        if found[term] and term not in known_asins:
+            store.set_mark(f'amazon:{term}:asins', {'asins': list(dict.fromkeys(found[term])), 'found': time.time()})
+        store.set_mark(f'amazon:{term}:refreshed', time.time())
+    return added
+
+
+@traced('store.refresh_reddit')
+def refresh_reddit(store, subreddits, limit=50, max_age=3600, force=False, engine=None, notify=None):
+    """Fetch only Reddit posts newer than the stored high-water mark of each subreddit.
+
+    Subreddits seen before read the `new` listing and keep posts created
+    after their mark; first-time subreddits are seeded from `hot`.
+    Concurrent calls for the same subreddit fetch it once.
+    """
+    requested = time.time()
+    stale = [sub for sub in subreddits if _is_stale(store, f'reddit:{sub}:refreshed', max_age, force)]
+    if not stale:
+        return 0
+    with store.refreshing(f'reddit:{sub}:refreshed' for sub in stale):
+        stale = [sub for sub in stale if _is_stale(store, f'reddit:{sub}:refreshed', max_age, force, requested)]
+        if not stale:
+            return 0
+        return _refresh_subreddits(store, stale, limit, engine, notify)
+
+
+def _refresh_subreddits(store, stale, limit, engine, notify, batch_size=200):
+    """Fetch the given stale subreddits into the store batch by batch (their refresh locks held).
+
+    Only subreddits whose listing was fetched are marked refreshed; blocked,
+    rate-limited or unreadable ones are tried again on the next run.
+    """
+    newest = {sub: store.get_mark(f'reddit:{sub}:newest') for sub in stale}
+    seeded = [sub for sub in stale if newest[sub] is not None]
+    unseeded = [sub for sub in stale if newest[sub] is None]
+
+    fetched = set()
+    listings = []
+    if seeded:
+        listings.append(iter_reddit(seeded, limit, engine=engine, listing='new',
+                                    newer_than={sub: newest[sub] for sub in seeded}, notify=notify, fetched=fetched))
+    if unseeded:
+        listings.append(iter_reddit(unseeded, limit, engine=engine, listing='hot', notify=notify, fetched=fetched))
+
+    latest = {}
+    added = 0
+    for posts in listings:
+        for batch in batched(posts, batch_size):
+            for review in batch:
+                latest[review.parent] = max(latest.get(review.parent, 0), review.created.timestamp())
+            added += store.add(batch)
+
+    for sub in stale:
+        if sub in latest:
+            store.set_mark(f'reddit:{sub}:newest', max(latest[sub], newest[sub] or 0))
+        if sub in fetched:
+            store.set_mark(f'reddit:{sub}:refreshed', time.time())
+    return added
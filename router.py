@@ -0,0 +1,301 @@
+import contextvars
+import itertools
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from tracing import span
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, 64)
+
+# Largest model first: a 429 on one route fails over to the next, smaller one
+DEFAULT_MODELS = [
+    {'model': 'llama-3.3-70b-versatile', 'expected_latency': 8.0, 'cost_per_million_tokens': 0.79},
+    {'model': 'llama-3.1-8b-instant', 'expected_latency': 3.0, 'cost_per_million_tokens': 0.08},
+]
+
+
+def is_rate_limit(error):
+    """True for HTTP 429 / rate-limit errors from the Groq SDK or a compatible client"""
+    return getattr(error, 'status_code', None) == 429 or 'rate limit' in str(error).lower()
+
+
+def _has_content(chunk):
+    choices = getattr(chunk, 'choices', None)
+    return bool(choices and getattr(choices[0].delta, 'content', None))
+
+
+def _read_to_first_token(chunks):
+    """Chunks read from `chunks` up to and including the first one carrying content"""
+    head = []
+    for chunk in chunks:
+        head.append(chunk)
+        if _has_content(chunk):
+            break
+    return head
+
+
+def _discard(future):
+    """Close the stream of a hedged call that lost the race, once it finishes"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+# A streamed completion whose first token has been read already
+class _RoutedStream:
+    """Replays the chunks read up to the first token, then the rest, each stamped with the model"""
+
+    def __init__(self, stream, chunks, head, model):
+        self.stream = stream
+        self.chunks = chunks
+        self.head = head
+        self.model = model
+
+    def __iter__(self):
+        try:
+            for chunk in itertools.chain(self.head, self.chunks):
+                chunk.model = self.model
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        close = getattr(self.stream, 'close', None)
+        if close is not None:
+            close()
+
+
+def _retry_after(error, default):
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+# Per-model latency histogram
+class LatencyHistogram:
+    """Bucketed counts of all latencies plus a window of recent ones for percentiles"""
+
+    def __init__(self, window=200):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.recent.append(seconds)
+
+    def percentile(self, p):
+        """The p-th percentile (0-100) of recent latencies, or None before any"""
+        with self.lock:
+            recent = sorted(self.recent)
+        if not recent:
+            return None
+        return recent[min(len(recent) - 1, int(len(recent) * p / 100))]
+
+    def __len__(self):
+        return len(self.recent)
+
+    def buckets(self):
+        """{"<=0.5s": n, ..., ">64s": n}"""
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return dict(zip(labels, self.counts))
+
+
+# One model on one provider
+@dataclass
+class ModelRoute:
+    """A chat-completions client and model with its latency/cost profile and running stats.
+
+    `expected_latency` is the hedge threshold until `min_samples` latencies
+    have been seen; after that the observed p95 is used. `latency` holds
+    whole-response times and `first_token` the time to the first streamed
+    token, so streamed requests hedge on the latter.
+    """
+    client: object
+    model: str
+    provider: str = 'groq'
+    expected_latency: float = 8.0
+    cost_per_million_tokens: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    first_token: LatencyHistogram = field(default_factory=LatencyHistogram)
+    cooldown_until: float = 0.0
+    calls: int = 0
+    wins: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    hedges: int = 0
+    tokens: int = 0
+
+    @property
+    def name(self):
+        return f"{self.provider}:{self.model}"
+
+    def hedge_after(self, min_samples, stream=False):
+        latency = self.first_token if stream else self.latency
+        p95 = latency.percentile(95) if len(latency) >= min_samples else None
+        return p95 if p95 is not None else self.expected_latency
+
+
+# Latency-aware router with hedging and 429 failover
+class ModelRouter:
+    """Route chat completions across several models/providers.
+
+    Exposes `chat.completions.create(...)` like the Groq client, so it can be
+    passed anywhere a client is expected (the `model` argument is replaced
+    by each route's own). A request goes to the first route not cooling
+    down. If it is still running after that route's p95 latency, the same
+    request is hedged on the next route and the first answer wins. Errors
+    fail over to the next route, and a 429 also takes its route out of
+    rotation for `cooldown` seconds (or the server's Retry-After). Streamed
+    requests are hedged and fail over on their time to the first token; an
+    error after that reaches the caller, which has already seen part of the
+    answer. Every response (or streamed chunk) carries the `model` of the
+    route that answered, which may not be `primary_model` after a failover
+    or a won hedge.
+    """
+
+    def __init__(self, routes, hedge=True, min_samples=20, cooldown=30.0, max_workers=8):
+        if not routes:
+            raise ValueError("ModelRouter needs at least one route")
+        self.routes = list(routes)
+        self.hedge = hedge
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def primary_model(self):
+        """The model requests go to first when nothing is cooling down"""
+        return self.routes[0].model
+
+    def available(self):
+        """Routes in preference order, skipping those cooling down after a 429"""
+        now = time.monotonic()
+        ready = [route for route in self.routes if route.cooldown_until <= now]
+        return ready or sorted(self.routes, key=lambda route: route.cooldown_until)
+
+    def _call(self, route, request):
+        started = time.perf_counter()
+        try:
+            with span('llm.call', route=route.name):
+                response = route.client.chat.completions.create(**request, model=route.model)
+                if request.get('stream'):
+                    chunks = iter(response)
+                    head = _read_to_first_token(chunks)
+        except Exception as e:
+            with self.lock:
+                route.errors += 1
+                if is_rate_limit(e):
+                    route.rate_limited += 1
+                    route.cooldown_until = time.monotonic() + _retry_after(e, self.cooldown)
+            raise
+        if request.get('stream'):
+            route.first_token.record(time.perf_counter() - started)
+            return _RoutedStream(response, chunks, head, route.model)
+        route.latency.record(time.perf_counter() - started)
+        usage = getattr(response, 'usage', None)
+        with self.lock:
+            route.tokens += getattr(usage, 'total_tokens', 0) or 0
+        response.model = route.model
+        return response
+
+    def create(self, model=None, **request):
+        routes = self.available()
+        stream = bool(request.get('stream'))
+        pending = {}
+        launched = 0
+        hedge_at = None
+        last_error = None
+
+        def launch():
+            nonlocal launched, hedge_at
+            route = routes[launched]
+            launched += 1
+            with self.lock:
+                route.calls += 1
+            pending[self.pool.submit(contextvars.copy_context().run, self._call, route, request)] = route
+            if self.hedge and launched < len(routes):
+                hedge_at = time.monotonic() + route.hedge_after(self.min_samples, stream)
+            else:
+                hedge_at = None
+            return route
+
+        launch()
+        while pending:
+            timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slower than its p95: race the next route
+                route = launch()
+                with self.lock:
+                    route.hedges += 1
+                continue
+            for future in done:
+                route = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    if not pending and launched < len(routes):
+                        launch()
+                    continue
+                with self.lock:
+                    route.wins += 1
+                if stream:
+                    for loser in pending:
+                        loser.add_done_callback(_discard)
+                return response
+        raise last_error
+
+    def stats(self):
+        """Per-route counters, p50/p95 latency, p95 time to first token, histogram and estimated cost"""
+        return [
+            {
+                'route': route.name,
+                'calls': route.calls,
+                'wins': route.wins,
+                'errors': route.errors,
+                'rate_limited': route.rate_limited,
+                'hedges': route.hedges,
+                'p50': route.latency.percentile(50),
+                'p95': route.latency.percentile(95),
+                'first_token_p95': route.first_token.percentile(95),
+                'histogram': route.latency.buckets(),
+                'cost': route.tokens * route.cost_per_million_tokens / 1e6,
+            }
+            for route in self.routes
+        ]
+
+
+def build_router(api_key, models=DEFAULT_MODELS, **options):
+    """ModelRouter over Groq models (or any route spec carrying its own `client`).
+
+    Each spec holds `model` and optionally `provider`, `client`, `api_key`,
+    `base_url`, `expected_latency` and `cost_per_million_tokens`. Groq
+    clients are built without SDK retries so 429s reach the router at once.
+    """
+    routes = []
+    for spec in models:
+        client = spec.get('client')
+        if client is None:
+            from groq import Groq
+
+            client = Groq(api_key=spec.get('api_key', api_key), base_url=spec.get('base_url'), max_retries=0)
+        routes.append(ModelRoute(
+            client=client,
+            model=spec['model'],
+            provider=spec.get('provider', 'groq'),
+            expected_latency=spec.get('expected_latency', 8.0),
+            cost_per_million_tokens=spec.get('cost_per_million_tokens', 0.0),
+        ))
+    return ModelRouter(routes, **options)
@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+# Competitor product reviews
+def generate_competitor_reviews(max_reviews=30):
+    """Generate realistic reviews from competitor analysis"""
+
+    competitor_reviews = [
+        # Optimum Nutrition reviews
+        "ON Gold Standard is great but Double Rich Chocolate is getting boring",
+        "Why don't Indian brands make flavors like ON's Cake Batter?",
+        "ON has 20+ flavors, Indian brands need to step up",
+        "Rocky Road flavor from ON is amazing, wish desi brands had this",
+
+        # MyProtein reviews
+        "MyProtein's Salted Caramel is too sweet, need better options",
+        "They have Sticky Toffee Pudding flavor! Indian brands are so basic",
+        "MyProtein flavors are innovative, ours are stuck in chocolate-vanilla",
+
+        # Dymatize reviews
+        "Dymatize ISO 100 has Gourmet Chocolate, way better than regular chocolate",
+        "Birthday Cake flavor is so good, why don't we have fun flavors?",
+
+        # Indian market feedback
+        "All Indian protein brands taste the same - chocolate, vanilla, strawberry",
+        "Missing authentic Indian flavors in supplements",
+        "Would love to see masala chai or kesar pista protein",
+        "Tired of artificial fruity flavors, want real fruit extracts",
+        "Every brand has the same boring flavors, no innovation",
+
+        # Specific complaints
+        "Chocolate is too sweet in all Indian brands",
+        "Vanilla is bland and artificial tasting",
+        "Coffee flavor needs upgrade - try mocha or cappuccino",
+        "Mango flavor tastes like candy, not real mango",
+        "Strawberry milkshake is too artificial",
+
+        # Desires
+        "Want premium dessert flavors like tiramisu or cheesecake",
+        "Natural sweeteners would be great, stevia or monk fruit",
+        "Coconut flavors are underrated in India",
+        "Peanut butter banana combo would be perfect",
+        "Dark chocolate with less sweetness please",
+        "Seasonal flavors would be exciting - mango in summer would be very refreshing and cooling",
+        "Buttercotch toffee would be a hit",
+        "Rose or gulkand for traditional Indian taste",
+        "Kulfi flavor would be unique and Indian",
+        "Filter coffee for South Indian audience",
+    ]
+
+    data = []
+    for i, review in enumerate(competitor_reviews[:max_reviews]):
+        data.append({
+            'text': review,
+            'source': 'Market Research',
+            'score': 3 + (i % 3),  # 3-5 stars
+            'comments': (i % 5) + 1,
+            'created': datetime.now()
+        })
+
+    return pd.DataFrame(data)
+
+
+# Generate sample data
+def generate_sample_data():
+    """Generate realistic sample data"""
+    sample_comments = [
+        "I wish MuscleBlaze had a Kesar Pista protein flavor! Would buy instantly.",
+        "Why don't we have Dark Chocolate whey without the sweetness overload?",
+        "Mango Lassi flavor for summer would be amazing for post-workout",
+        "Blueberry gummies are trending but most brands make them too artificial",
+        "Coffee flavored protein is so boring, we need Masala Chai innovation",
+        "Watermelon electrolytes sound refreshing, perfect for Indian summers",
+        "Coconut Water flavor for hydration supplements please!",
+        "Rose Gulkand protein would be unique and very Indian",
+        "Chocolate mint is overdone, give us Chocolate Orange",
+        "Peanut Butter Banana combo for mass gainers would sell like crazy",
+        "Green Apple pre-workout tastes chemical, need natural alternatives",
+        "Litchi flavor is underrated for supplements",
+        "Strawberry Milkshake whey but make it less sweet",
+        "Salted Caramel is played out, try Butterscotch Toffee",
+        "Jeera flavor for digestive supplements would be authentic",
+        "Black Currant antioxidant gummies are missing from market",
+        "Vanilla is too plain, Vanilla Honey would add depth",
+        "Cranberry Orange for vitamin C supplements",
+        "Pistachio Almond for nut-based proteins",
+        "Tropical Punch with real fruit extracts not artificial",
+        "Cardamom Coffee for a desi twist on regular coffee protein",
+        "Alphonso Mango is superior to regular mango flavor during summer",
+        "Tender Coconut Water for authentic taste",
+        "Dark Chocolate with Sea Salt would be game-changing",
+        "Gulab Jamun flavor for post-workout indulgence",
+        "Cinnamon Roll protein shake sounds delicious",
+        "Mint Chocolate Chip like ice cream but protein",
+        "Caramel Apple for fall season launches",
+        "Watermelon would be very refreshing in the scorching summer."
+        "Lemon Cheesecake for dessert lovers",
+        "Pina Colada for tropical vibes",
+        "Tiramisu flavor would be so premium",
+        "Cookies and Cream is popular but make it better",
+        "Birthday Cake flavor for celebration",
+        "Maple Syrup with Pancake flavor",
+        "Hazelnut Praline for coffee shop vibes",
+        "Red Velvet Cake protein would sell out",
+        "Coconut Almond like Bounty chocolate",
+        "Mocha Frappe style protein",
+        "Banana Walnut Bread flavor",
+        "Cinnamon Sugar Donut protein",
+        "Apple Pie for American dessert lovers",
+        "Chocolate Peanut Butter Cup combo",
+        "Vanilla Bean with real specks",
+        "Matcha Green Tea for health conscious",
+        "Thandai flavor for festive season",
+        "Aam Panna for summer coolness",
+        "Kulfi flavor with cardamom notes",
+        "Badaam Milk traditional taste",
+        "Filter Coffee South Indian style",
+        "Jaggery sweetened natural protein"
+    ]
+
+    sources = ['r/fitness', 'r/supplements', 'r/nutrition', 'r/bodybuilding', 'r/gainit', 'r/workout']
+
+    # Spread over the last four weeks so the trend views have a timeline
+    now = datetime.now()
+    data = []
+    for i, comment in enumerate(sample_comments):
+        data.append({
+            'text': comment,
+            'source': sources[i % len(sources)],
+            'score': (i * 7 + 3) % 100 + 10,
+            'comments': (i * 3) % 50 + 5,
+            'created': now - timedelta(hours=(i * 97) % (24 * 28))
+        })
+
+    return pd.DataFrame(data)
+
+
+# Generate sample analysis for fallback
+def generate_sample_analysis():
+    """Generate sample analysis when API fails"""
+    return {
+        "recommended": [
+            {
+                "flavor": "Kesar Pista (Saffron Pistachio)",
+                "brand": "MuscleBlaze",
+                "product_type": "Whey Protein",
+                "why": "Users are requesting authentic Indian premium flavors that feel luxurious and unique",
+                "confidence": "High",
+                "user_pain_point": "Lack of Indian-inspired flavors in protein supplements"
+            },
+            {
+                "flavor": "Dark Cocoa",
+                "brand": "MuscleBlaze",
+                "product_type": "Whey Protein",
+                "why": "Multiple complaints that current chocolate flavors are too sweet and artificial",
+                "confidence": "High",
+                "user_pain_point": "Overly sweet chocolate protein causing taste fatigue"
+            },
+            {
+                "flavor": "Mango Lassi",
+                "brand": "HK Vitals",
+                "product_type": "Electrolyte Drink",
+                "why": "Popular summer flavor request that combines hydration with familiar taste",
+                "confidence": "Medium",
+                "user_pain_point": "Need refreshing summer flavors for post-workout hydration"
+            },
+            {
+                "flavor": "Masala Chai",
+                "brand": "TrueBasics",
+                "product_type": "Protein Powder",
+                "why": "Users want innovative Indian flavors that break from boring coffee and vanilla",
+                "confidence": "High",
+                "user_pain_point": "Repetitive flavor options in daily supplements"
+            },
+            {
+                "flavor": "Blueberry (Natural Extract)",
+                "brand": "HK Vitals",
+                "product_type": "Gummies",
+                "why": "Trending flavor but users complain most brands make it too artificial",
+                "confidence": "Medium",
+                "user_pain_point": "Artificial-tasting blueberry supplements"
+            }
+        ],
+        "rejected": [
+            {
+                "flavor": "Salted Caramel",
+                "reason": "Market is already oversaturated with this flavor; low differentiation opportunity"
+            },
+            {
+                "flavor": "Vanilla",
+                "reason": "Too plain and boring according to user feedback; needs enhancement like Vanilla Honey"
+            },
+            {
+                "flavor": "Green Apple (Artificial)",
+                "reason": "Users specifically complain about chemical taste in artificial green apple flavors"
+            },
+            {
+                "flavor": "Regular Coffee",
+                "reason": "Standard coffee flavor is oversaturated; users want innovative variants"
+            },
+            {
+                "flavor": "Strawberry",
+                "reason": "Generic strawberry without differentiation won't stand out in crowded market"
+            }
+        ],
+        "golden_candidate": {
+            "flavor": "Kesar Pista (Saffron Pistachio)",
+            "brand": "MuscleBlaze",
+            "product_type": "Biozyme Whey Protein",
+            "why": "Premium Indian flavor that doesn't exist in the market, highly requested by users who want authentic tastes",
+            "market_opportunity": "First-mover advantage in Indian fusion premium protein flavors with strong cultural resonance"
+        }
+    }
@@ -0,0 +1,324 @@
+import json
+import random
+import re
+import time
+from datetime import datetime
+
+import lxml.etree
+import lxml.html
+import requests
+
+from fetcher import FetchEngine
+from records import Review
+from tracing import traced
+
+AMAZON_BASE_URL = "https://www.amazon.in"
+REDDIT_BASE_URL = "https://www.reddit.com"
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+]
+
+
+def _ignore(level, message):
+    pass
+
+
+def amazon_headers():
+    """Browser-like headers with a random user agent to avoid blocking"""
+    return {
+        'User-Agent': random.choice(USER_AGENTS),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    }
+
+
+# Fallback data generator
+def generate_fallback_amazon_data(term, count=10):
+    """Generate realistic Amazon-style reviews as fallback"""
+    templates = [
+        f"Good {term} but the flavor options are very limited. Only chocolate and vanilla.",
+        f"Quality of this {term} is excellent but taste could be better. Too artificial.",
+        f"Been using this {term} for 2 months. Works great but gets boring with same flavors.",
+        f"Effective {term}. Wish they had more Indian flavors like mango or kesar pista.",
+        f"The {term} is too sweet for my liking. Need less sugar or natural sweeteners.",
+        f"Value for money is good but chocolate flavor is repetitive. Need variety.",
+        f"Mixability is perfect but I'm tired of vanilla. Want something innovative.",
+        f"Results are good with this {term} but fruit flavors taste very artificial.",
+        f"Decent {term} but vanilla is too plain. Vanilla honey would be much better.",
+        f"Works well but competitors have better flavor range. Need to innovate!",
+    ]
+
+    reviews = []
+    for i in range(min(count, len(templates))):
+        reviews.append(Review(
+            text=templates[i],
+            source=f'Amazon ({term})',
+            score=4 + (i % 2),
+            comments=0,
+            kind='amazon',
+            parent=f'Amazon ({term})',
+            item_id=f'fallback-{i}'
+        ))
+
+    return reviews
+
+
+# Amazon page parsers
+def _html_root(content):
+    """lxml tree for a page, or None when the body is empty (or only comments/an XML declaration)"""
+    if not content or not content.strip():
+        return None
+    try:
+        return lxml.html.fromstring(content)
+    except lxml.etree.ParserError:
+        return None
+
+
+def _text(element):
+    """Element text with each string stripped, like BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in element.itertext())
+
+
+REVIEW_DATE_PATTERN = re.compile(r'on\s+(.+)$')
+
+
+def _review_date(review_div):
+    """Date from "Reviewed in India on 12 March 2024" (or the US "March 12, 2024"), else now"""
+    date = review_div.xpath('.//span[@data-hook="review-date"]')
+    match = REVIEW_DATE_PATTERN.search(' '.join(date[0].itertext()).strip()) if date else None
+    if match:
+        for layout in ('%d %B %Y', '%B %d, %Y'):
+            try:
+                return datetime.strptime(match.group(1), layout)
+            except ValueError:
+                continue
+    return datetime.now()
+
+
+@traced('parse.amazon_search')
+def parse_search_asins(content, max_products=3):
+    """Return (product_count, first ASINs) from an Amazon search results page"""
+    root = _html_root(content)
+    if root is None:
+        return 0, []
+    products = root.xpath('//div[@data-component-type="s-search-result"]')
+    asins = [p.get('data-asin') for p in products if p.get('data-asin')]
+    return len(products), asins[:max_products]
+
+
+@traced('parse.amazon_reviews')
+def parse_review_page(content, term, limit=5, asin=None):
+    """Extract up to `limit` review records from an Amazon product-reviews page"""
+    root = _html_root(content)
+    if root is None:
+        return []
+    reviews = []
+    for review_div in root.xpath('//div[@data-hook="review"]')[:limit]:
+        try:
+            review_body = review_div.xpath('.//span[@data-hook="review-body"]')
+            if not review_body:
+                continue
+            rating = review_div.xpath('.//i[@data-hook="review-star-rating"]')
+            rating_text = _text(rating[0]) if rating else "5.0 out of 5 stars"
+            reviews.append(Review(
+                text=_text(review_body[0]),
+                source=f'Amazon ({term})',
+                score=int(float(rating_text.split()[0])),
+                comments=0,
+                created=_review_date(review_div),
+                kind='amazon',
+                parent=asin or '',
+                item_id=review_div.get('id') or ''
+            ))
+        except Exception:
+            continue
+    return reviews
+
+
+# Concurrent Amazon scraper
+def iter_amazon(search_terms, max_per_term=15, engine=None, base_url=AMAZON_BASE_URL,
+                products_per_term=3, notify=None, known_asins=None, skip_review_ids=None,
+                sort_recent=False):
+    """Scrape Amazon reviews for several search terms in parallel, yielding Review records.
+
+    Search pages for every term are requested at once; review pages for a
+    term are queued as soon as its search page arrives, and each term's
+    reviews are yielded as soon as its pages are parsed. Pacing comes from
+    the engine's per-host token bucket. `notify(level, message)` receives
+    status updates and is only ever called from the consuming thread.
+
+    For incremental runs, `known_asins` ({term: [asin, ...]}) skips the
+    search page for those terms, `skip_review_ids` drops reviews already
+    stored (a set, or anything with a set's intersection(), asked once per
+    page), and `sort_recent` asks Amazon for newest reviews first.
+    """
+    notify = notify or _ignore
+    known_asins = known_asins or {}
+    skip_review_ids = skip_review_ids or set()
+    own_engine = engine is None
+    engine = engine or FetchEngine()
+    review_query = '?sortBy=recent' if sort_recent else ''
+
+    try:
+        search_futures = []
+        for term in search_terms:
+            headers = amazon_headers()
+            if known_asins.get(term):
+                search_futures.append((term, headers, None))
+                continue
+            notify('info', f"Searching Amazon for '{term}'...")
+            search_url = f"{base_url}/s?k={term.replace(' ', '+')}"
+            search_futures.append((term, headers, engine.submit(search_url, headers=headers)))
+
+        # Queue review pages per term as search results come back
+        review_futures = []
+        for term, headers, future in search_futures:
+            if future is None:
+                asins = known_asins[term][:products_per_term]
+            else:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    notify('error', f"⚠️ Error scraping '{term}': {str(e)[:100]}")
+                    yield from generate_fallback_amazon_data(term, 10)
+                    continue
+
+                if response.status_code != 200:
+                    if response.status_code == 503:
+                        notify('warning', f"⚠️ Amazon temporarily unavailable for '{term}'")
+                    else:
+                        notify('warning', f"⚠️ Status {response.status_code} from Amazon. Using fallback.")
+                    yield from generate_fallback_amazon_data(term, 10)
+                    continue
+
+                product_total, asins = parse_search_asins(response.content, products_per_term)
+                if product_total == 0:
+                    notify('warning', f"⚠️ No products found for '{term}'. Using fallback data.")
+                    yield from generate_fallback_amazon_data(term, 10)
+                    continue
+                notify('success', f"✅ Found {product_total} products for '{term}'")
+
+            futures = [
+                (asin, engine.submit(f"{base_url}/product-reviews/{asin}/{review_query}", headers=headers))
+                for asin in asins
+            ]
+            review_futures.append((term, futures))
+
+        for term, futures in review_futures:
+            reviews = []
+            parsed = 0
+            for asin, future in futures:
+                if len(reviews) >= max_per_term:
+                    future.cancel()
+                    continue
+                try:
+                    review_response = future.result()
+                except Exception:
+                    continue
+                if review_response.status_code == 200:
+                    page = parse_review_page(review_response.content, term, asin=asin)
+                    parsed += len(page)
+                    stored = skip_review_ids.intersection(r.item_id for r in page)
+                    reviews.extend(r for r in page if r.item_id not in stored)
+            reviews = reviews[:max_per_term]
+
+            if reviews:
+                notify('success', f"✅ Scraped {len(reviews)} reviews for '{term}'")
+                yield from reviews
+            elif parsed:
+                notify('info', f"No new reviews for '{term}'")
+            else:
+                notify('warning', f"⚠️ Could not access reviews for '{term}'. Using fallback.")
+                yield from generate_fallback_amazon_data(term, 10)
+    finally:
+        if own_engine:
+            engine.close()
+
+
+# Reddit listing parser
+@traced('parse.reddit')
+def parse_reddit_listing(data, subreddit, newer_than=None):
+    """Review records for posts in a Reddit listing, optionally only those after `newer_than` (UTC seconds)"""
+    records = []
+    for post in data.get('data', {}).get('children', []):
+        post_data = post.get('data', {})
+        created_utc = post_data.get('created_utc', time.time())
+        if newer_than is not None and created_utc <= newer_than:
+            continue
+        text = post_data.get('title', '') + ' ' + post_data.get('selftext', '')
+
+        if text.strip():
+            records.append(Review(
+                text=text.strip(),
+                source=f"r/{subreddit}",
+                score=post_data.get('score', 0),
+                comments=post_data.get('num_comments', 0),
+                created=datetime.fromtimestamp(created_utc),
+                kind='reddit',
+                parent=subreddit,
+                item_id=post_data.get('id') or ''
+            ))
+    return records
+
+
+# Reddit scraper
+def iter_reddit(subreddits, limit=50, engine=None, base_url=REDDIT_BASE_URL, listing='hot',
+                newer_than=None, notify=None, fetched=None):
+    """Fetch a listing (hot/new) for each subreddit through the rate-limited engine, yielding Reviews.
+
+    `newer_than` ({subreddit: created_utc}) keeps only posts newer than the
+    last stored one. Subreddits whose listing was fetched and parsed are
+    added to the `fetched` set, if given.
+    """
+    notify = notify or _ignore
+    newer_than = newer_than or {}
+    own_engine = engine is None
+    engine = engine or FetchEngine(requests_per_second=0.5, burst=1)
+
+    try:
+        futures = []
+        for idx, subreddit in enumerate(subreddits):
+            url = f"{base_url}/r/{subreddit}/{listing}.json?limit={limit}"
+            headers = {
+                'User-Agent': USER_AGENTS[idx % len(USER_AGENTS)],
+                'Accept': 'application/json',
+                'Accept-Language': 'en-US,en;q=0.9',
+            }
+            futures.append((subreddit, engine.submit(url, headers=headers, allow_redirects=False)))
+
+        for subreddit, future in futures:
+            try:
+                response = future.result()
+            except requests.exceptions.Timeout:
+                notify('warning', f"⏱️ Timeout fetching r/{subreddit}")
+                continue
+            except Exception as e:
+                notify('warning', f"⚠️ Error from r/{subreddit}: {str(e)[:50]}")
+                continue
+
+            if response.status_code == 200:
+                try:
+                    data = response.json()
+                except json.JSONDecodeError:
+                    notify('warning', f"⚠️ Could not parse data from r/{subreddit}")
+                    continue
+                posts = parse_reddit_listing(data, subreddit, newer_than.get(subreddit))
+                if fetched is not None:
+                    fetched.add(subreddit)
+                notify('success', f"✅ Fetched {len(posts)} posts from r/{subreddit}")
+                yield from posts
+            elif response.status_code == 403:
+                notify('error', f"🚫 Access forbidden to r/{subreddit}. Reddit may be blocking requests.")
+            elif response.status_code == 429:
+                notify('warning', f"⏱️ Rate limited on r/{subreddit}. Using cached data.")
+            else:
+                notify('warning', f"⚠️ Status {response.status_code} from r/{subreddit}")
+    finally:
+        if own_engine:
+            engine.close()
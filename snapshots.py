@@ -0,0 +1,346 @@
+"""Precomputed analysis snapshots.
+
+    python snapshots.py [--every 3600]
+
+A snapshot is the complete result of one app configuration (data source,
+brands, analysis depth): the review frame, flavor index, trends, demand
+scores, word-cloud PNG and the LLM analysis. The app loads the snapshot
+matching its sidebar instead of redoing the scrape and the Groq call,
+and rebuilds it in the background once it is older than its max age.
+Run this module to (re)build the snapshots of DEFAULT_CONFIGS ahead of
+time, once or every --every seconds; GROQ_API_KEY is read from the
+environment.
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from demand import DemandScorer
+from flavors import DEFAULT_LEXICON, build_flavor_index
+from jobs import JobQueue
+from llm import analyze_corpus, filter_analysis_for_brands, pack_reviews, request_analysis
+from records import reviews_from_frame
+from tracing import traced
+from trends import TrendEngine
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'snapshots')
+
+# Bump when the files written by SnapshotStore.save() change
+SNAPSHOT_FORMAT = 1
+
+# Seconds before a snapshot is rebuilt in the background
+MAX_AGE = {'sample': 24 * 3600, 'live': 3600}
+
+ALL_BRANDS = ["MuscleBlaze", "HK Vitals", "TrueBasics"]
+
+# The sidebar defaults, and each brand on its own
+DEFAULT_CONFIGS = [{'source': 'sample', 'brands': ALL_BRANDS}] + [
+    {'source': 'sample', 'brands': [brand]} for brand in ALL_BRANDS
+]
+
+
+def snapshot_config(source='sample', brands=ALL_BRANDS, depth='quick', context_budget=1500, discover=True,
+                    data_sources=(), amazon_terms=(), reddit_subs=(), post_limit=20):
+    """Normalised configuration dict; equal configurations give equal snapshot keys"""
+    config = {'source': source, 'brands': sorted(brands), 'depth': depth,
+              'context_budget': context_budget if depth == 'quick' else None, 'discover': bool(discover)}
+    if source == 'live':
+        config.update({'data_sources': sorted(data_sources),
+                       'amazon_terms': sorted(amazon_terms) if 'Amazon Reviews' in data_sources else [],
+                       'reddit_subs': sorted(reddit_subs) if 'Reddit' in data_sources else [],
+                       'post_limit': post_limit if 'Reddit' in data_sources else None})
+    return config
+
+
+def snapshot_key(config):
+    payload = json.dumps({'format': SNAPSHOT_FORMAT, 'config': snapshot_config(**config)}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+
+# Configuration fields that set how the loaded data is analyzed, not which data is loaded
+ANALYSIS_FIELDS = ('brands', 'depth', 'context_budget')
+
+
+def data_key(config):
+    """Key of the data part of a configuration (what is scraped and counted, not how it is analyzed)"""
+    config = snapshot_config(**config)
+    data = {name: value for name, value in config.items() if name not in ANALYSIS_FIELDS}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()[:20]
+
+
+@traced('flavors.views')
+def flavor_views(df, discover=True):
+    """(flavor_index, trends, demand) for a review frame, with discovered flavors when `discover`"""
+    lexicon = DEFAULT_LEXICON
+    if discover:
+        from discovery import discover_flavors
+
+        lexicon = discover_flavors(df['text'].tolist()).lexicon()
+    return build_flavor_index(df, lexicon), TrendEngine.from_frame(df, lexicon=lexicon), DemandScorer(lexicon).score(df)
+
+
+# One configuration's results
+class Snapshot:
+    """Everything the results page shows for one configuration"""
+
+    def __init__(self, config, frame, analysis, word_cloud_png, flavor_index, trends, demand, created=None):
+        self.config = config
+        self.frame = frame
+        self.analysis = analysis
+        self.word_cloud_png = word_cloud_png
+        self.flavor_index = flavor_index
+        self.trends = trends
+        self.demand = demand
+        self.created = created if created is not None else time.time()
+
+    def age(self):
+        return time.time() - self.created
+
+    def is_stale(self):
+        return self.age() > MAX_AGE.get(self.config['source'], 3600)
+
+
+# Versioned snapshot files
+class SnapshotStore:
+    """Snapshots on disk, one directory per configuration key.
+
+    Each save writes a new generation directory and then atomically points
+    the key's `current` file at it, so readers never see a half-written
+    snapshot; the previous generation is kept for readers still using it.
+    Numeric columns are .npy files opened memory-mapped, texts one
+    NUL-separated UTF-8 file split in a single call, and the derived views
+    a pickle.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, keep=2):
+        self.root = root
+        self.keep = keep
+
+    def _dir(self, config):
+        return os.path.join(self.root, snapshot_key(config))
+
+    @traced('snapshot.save')
+    def save(self, snapshot):
+        base = self._dir(snapshot.config)
+        generation = f"{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        path = os.path.join(base, generation)
+        os.makedirs(path)
+
+        frame = snapshot.frame
+        source = pd.Categorical(frame['source'].astype(str))
+        with open(os.path.join(path, 'text.bin'), 'wb') as f:
+            f.write('\0'.join(text.replace('\0', ' ') for text in frame['text'].fillna('').astype(str)).encode('utf-8'))
+        np.save(os.path.join(path, 'source.npy'), source.codes.astype(np.int32))
+        np.save(os.path.join(path, 'score.npy'), frame['score'].to_numpy(dtype=np.int32))
+        np.save(os.path.join(path, 'comments.npy'), frame['comments'].to_numpy(dtype=np.int32))
+        np.save(os.path.join(path, 'created.npy'),
+                pd.to_datetime(frame['created']).to_numpy().astype('datetime64[ns]').view(np.int64))
+        with open(os.path.join(path, 'views.pkl'), 'wb') as f:
+            pickle.dump((snapshot.flavor_index, snapshot.trends, snapshot.demand), f, protocol=pickle.HIGHEST_PROTOCOL)
+        if snapshot.word_cloud_png is not None:
+            with open(os.path.join(path, 'wordcloud.png'), 'wb') as f:
+                f.write(snapshot.word_cloud_png)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'format': SNAPSHOT_FORMAT, 'config': snapshot.config, 'created': snapshot.created,
+                       'rows': len(frame), 'sources': [str(label) for label in source.categories],
+                       'analysis': snapshot.analysis}, f)
+
+        pointer = os.path.join(base, f'current.{generation}.tmp')
+        with open(pointer, 'w') as f:
+            f.write(generation)
+        os.replace(pointer, os.path.join(base, 'current'))
+        self._prune(base)
+        return path
+
+    def _prune(self, base):
+        generations = sorted((name for name in os.listdir(base) if os.path.isdir(os.path.join(base, name))),
+                             key=lambda name: int(name.split('-')[0]))
+        for name in generations[:-self.keep]:
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+    @traced('snapshot.load')
+    def load(self, config):
+        """The current Snapshot for `config`, or None if there is none (or it is unreadable)"""
+        base = self._dir(config)
+        try:
+            with open(os.path.join(base, 'current')) as f:
+                path = os.path.join(base, f.read().strip())
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta['format'] != SNAPSHOT_FORMAT:
+                return None
+
+            with open(os.path.join(path, 'text.bin'), 'rb') as f:
+                data = f.read()
+            text = data.decode('utf-8').split('\0') if meta['rows'] else []
+            codes = np.load(os.path.join(path, 'source.npy'), mmap_mode='r')
+            frame = pd.DataFrame({
+                'text': text,
+                'source': pd.Categorical.from_codes(codes, categories=meta['sources']),
+                'score': np.load(os.path.join(path, 'score.npy'), mmap_mode='r'),
+                'comments': np.load(os.path.join(path, 'comments.npy'), mmap_mode='r'),
+                'created': np.load(os.path.join(path, 'created.npy'), mmap_mode='r').view('datetime64[ns]'),
+            }, copy=False)
+            with open(os.path.join(path, 'views.pkl'), 'rb') as f:
+                flavor_index, trends, demand = pickle.load(f)
+            png_path = os.path.join(path, 'wordcloud.png')
+            png = None
+            if os.path.exists(png_path):
+                with open(png_path, 'rb') as f:
+                    png = f.read()
+        except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        return Snapshot(meta['config'], frame, meta['analysis'], png, flavor_index, trends, demand, meta['created'])
+
+
+# Headless snapshot build
+@traced('snapshot.build')
+def build_snapshot(config, client, cache=None, review_store=None):
+    """Run the whole app pipeline for `config`; returns a Snapshot, or None if the analysis failed.
+
+    Raises RuntimeError when a live configuration got no real data
+    (nothing scraped, or canned fallback reviews for some source), so a
+    stand-in is never saved as that configuration's snapshot.
+    """
+    import visuals
+    from sample_data import generate_sample_data
+
+    config = snapshot_config(**config)
+    if config['source'] == 'live':
+        from pipeline import collect_data
+
+        fallback_sources = set()
+        df = collect_data(config['data_sources'], config['amazon_terms'], config['reddit_subs'],
+                          config['post_limit'] or 20, store=review_store, fallback_sources=fallback_sources)
+        if len(df) == 0:
+            raise RuntimeError("no live data collected")
+        if fallback_sources:
+            raise RuntimeError(f"fallback data for {', '.join(sorted(fallback_sources))}")
+    else:
+        df = generate_sample_data()
+
+    flavor_index, trends, demand = flavor_views(df, config['discover'])
+    png = visuals.word_cloud_png(df['text'].tolist())
+    analysis = run_analysis(config, df, client, cache)
+    if not analysis:
+        return None
+    analysis = filter_analysis_for_brands(analysis, config['brands'])
+    return Snapshot(config, df, analysis, png, flavor_index, trends, demand)
+
+
+def run_analysis(config, df, client, cache=None, on_item=None, on_stage=None):
+    """Groq analysis of `df` at the configured depth (raises on API or JSON errors)"""
+    if config['depth'] == 'quick':
+        lines = pack_reviews(reviews_from_frame(df, ''), token_budget=config['context_budget'])
+        if on_stage is not None:
+            on_stage(f"Sending {len(lines)} of {len(df)} comments (~{config['context_budget']} token budget)")
+        return request_analysis(client, "\n".join(lines), config['brands'], cache=cache, on_item=on_item)
+    if on_stage is not None:
+        on_stage(f"Analyzing all {len(df)} comments in parallel chunks")
+    return analyze_corpus(client, df['text'].tolist(), config['brands'], cache=cache)
+
+
+# Asynchronous refresh
+class SnapshotRefresher:
+    """Rebuild snapshots as background jobs, at most one build per configuration at a time.
+
+    A build that raises or returns None is a failure: the configuration is
+    not rebuilt again for `retry_after` seconds, doubling with each further
+    failure up to `max_retry_after`, so a stale snapshot whose rebuild keeps
+    failing (e.g. a blocked scrape) does not queue a build on every page load.
+    """
+
+    def __init__(self, store=None, queue=None, retry_after=300, max_retry_after=6 * 3600):
+        self.store = store or SnapshotStore()
+        self.queue = queue or JobQueue(max_workers=1)
+        self.retry_after = retry_after
+        self.max_retry_after = max_retry_after
+        self.failures = {}
+        self.lock = threading.Lock()
+
+    def retry_at(self, config):
+        """Time before which `config` is not rebuilt after a failure (0 when it has not failed)"""
+        with self.lock:
+            return self.failures.get(snapshot_key(config), (0, 0.0))[1]
+
+    def _failed(self, key):
+        with self.lock:
+            count = self.failures.get(key, (0, 0.0))[0] + 1
+            delay = min(self.retry_after * 2 ** (count - 1), self.max_retry_after)
+            self.failures[key] = (count, time.time() + delay)
+
+    def refresh(self, config, build):
+        """Queue `build()` (returning a Snapshot or None) for `config`; returns its Job, or None while backing off"""
+        key = snapshot_key(config)
+        if time.time() < self.retry_at(config):
+            return None
+
+        def run(job):
+            job.set_stage("Rebuilding snapshot")
+            try:
+                snapshot = build()
+                if snapshot is not None:
+                    self.store.save(snapshot)
+            except Exception:
+                self._failed(key)
+                raise
+            if snapshot is None:
+                self._failed(key)
+                return False
+            with self.lock:
+                self.failures.pop(key, None)
+            return True
+
+        return self.queue.submit(run, name='snapshot.refresh', key=('snapshot', key))
+
+
+def build_defaults(api_key, store=None, configs=DEFAULT_CONFIGS):
+    """Build and save the snapshot of every configuration in `configs`; returns {key: status}"""
+    from analysis_cache import AnalysisCache
+    from router import build_router
+
+    store = store or SnapshotStore()
+    client = build_router(api_key)
+    cache = AnalysisCache()
+    statuses = {}
+    for config in configs:
+        key = snapshot_key(config)
+        started = time.perf_counter()
+        try:
+            snapshot = build_snapshot(config, client, cache)
+            statuses[key] = 'analysis failed' if snapshot is None else f"saved to {store.save(snapshot)}"
+        except Exception as e:
+            statuses[key] = f"{type(e).__name__}: {e}"
+        print(f"[{key}] {json.dumps(snapshot_config(**config))} {time.perf_counter() - started:.1f}s - "
+              f"{statuses[key]}", file=sys.stderr)
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute FlavorScout snapshots for the common configurations")
+    parser.add_argument('--every', type=float, default=None, help="rebuild every this many seconds")
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get('GROQ_API_KEY')
+    if not api_key:
+        parser.error("GROQ_API_KEY is not set")
+    store = SnapshotStore(args.dir)
+    while True:
+        statuses = build_defaults(api_key, store)
+        if args.every is None:
+            return 0 if all(status.startswith('saved') for status in statuses.values()) else 1
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
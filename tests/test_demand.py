@@ -0,0 +1,77 @@
+"""DemandScorer: phrase matching, per-mention polarity and parity with FlavorLexicon"""
+import pandas as pd
+import pytest
+
+from demand import DemandScorer, PhraseMatcher
+from flavors import DEFAULT_LEXICON
+from sample_data import generate_sample_data
+
+
+def frame(*texts, source='r/Fitness'):
+    return pd.DataFrame({'text': list(texts), 'source': source, 'score': 0, 'comments': 0})
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return DemandScorer()
+
+
+def test_phrase_matcher_prefers_the_longest_phrase():
+    matcher = PhraseMatcher({'mango': 0, 'mango lassi': 1, 'lassi': 2, 'too sweet': 3})
+    rows, labels, first, last, clauses = matcher.match(["Mango lassi is too sweet", "mango, then lassi"])
+    found = sorted(zip(rows.tolist(), labels.tolist(), first.tolist(), last.tolist()))
+    assert found == [(0, 1, 0, 1), (0, 3, 3, 4), (1, 0, 5, 5), (1, 2, 7, 7)]
+    # The comma starts a new clause between "mango" and "lassi"
+    assert clauses[labels == 0][0] != clauses[labels == 2][0]
+
+
+def test_complaint_and_request_attach_to_their_own_flavors(scorer):
+    flavors = scorer.score(frame("Chocolate is too sweet, I wish MuscleBlaze had Kesar Pista")).flavors
+    assert flavors.loc['kesar pista', ['mentions', 'request', 'praise', 'complaint']].tolist() == [1, 1, 0, 0]
+    assert flavors.loc['chocolate', ['mentions', 'request', 'praise', 'complaint']].tolist() == [1, 0, 0, 1]
+    assert flavors.loc['kesar pista', 'demand'] > 0 == flavors.loc['chocolate', 'demand']
+    assert flavors.index[0] == 'kesar pista'
+
+
+def test_brand_named_in_the_review_shares_its_mentions(scorer):
+    scores = scorer.score(frame("I wish MuscleBlaze had Kesar Pista", "kesar pista please"))
+    assert scores.for_brand('MuscleBlaze') == [('kesar pista', 1.6)]
+    assert scores.by_brand.loc['kesar pista', '(no brand)'] == pytest.approx(1.6)
+
+
+def test_cue_in_the_next_sentence_reaches_a_nearby_mention(scorer):
+    flavors = scorer.score(frame("Mango. Love it!")).flavors
+    assert flavors.loc['mango lassi', 'praise'] == 1
+
+
+@pytest.mark.parametrize('text, flavor', [
+    ("more mangoes please", 'mango lassi'),
+    ("fresh strawberries", 'strawberry'),
+    ("two coffees", 'coffee'),
+    ("Saffron Pistachio would be great", 'kesar pista'),
+    ("dark chocolate and peanut butter cups", 'dark chocolate'),
+    ("dark chocolate and peanut butter cups", 'peanut butter'),
+])
+def test_plural_and_multi_word_variants(scorer, text, flavor):
+    assert scorer.score(frame(text)).flavors.loc[flavor, 'mentions'] == 1
+
+
+def test_multi_word_variant_is_not_also_its_shorter_flavor(scorer):
+    flavors = scorer.score(frame("dark chocolate only")).flavors
+    assert flavors.index.tolist() == ['dark chocolate']
+
+
+def test_mentions_match_the_lexicon_counts(scorer):
+    df = generate_sample_data()
+    assert scorer.score(df).flavors['mentions'].to_dict() == dict(DEFAULT_LEXICON.count(df['text'].tolist()))
+
+    texts = [f"I want {variant}{suffix} now, not {variant} again"
+             for variant in DEFAULT_LEXICON.variant_to_flavor for suffix in ('', 's', 'es')]
+    assert scorer.score(frame(*texts)).flavors['mentions'].to_dict() == dict(DEFAULT_LEXICON.count(texts))
+
+
+def test_batches_give_the_same_scores():
+    df = generate_sample_data()
+    whole = DemandScorer().score(df).flavors
+    batched = DemandScorer(batch_size=7).score(df).flavors
+    pd.testing.assert_frame_equal(whole.sort_index(), batched.sort_index())
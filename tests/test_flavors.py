@@ -0,0 +1,69 @@
+"""FlavorLexicon matching: longest variant first, plurals, word boundaries"""
+import pandas as pd
+import pytest
+
+from flavors import DEFAULT_LEXICON, FlavorLexicon, build_flavor_index, count_flavors, extract_flavors
+
+
+@pytest.mark.parametrize('text, flavors', [
+    ("Dark chocolate is the best", ['dark chocolate']),
+    ("masala chai please", ['masala chai']),
+    ("Mango lassi or plain mango", ['mango lassi']),
+    ("kesar pista and saffron pistachio", ['kesar pista']),
+    ("peanut butter cups", ['peanut butter']),
+])
+def test_longest_variant_wins(text, flavors):
+    assert extract_flavors(text) == flavors
+
+
+@pytest.mark.parametrize('text, flavors', [
+    ("bananas and grapes", ['banana', 'grape']),
+    ("mangoes!", ['mango lassi']),
+    ("fresh strawberries", ['strawberry']),
+    ("blueberries, cranberries and berries", ['berry']),
+    ("two coffees", ['coffee']),
+])
+def test_plurals(text, flavors):
+    assert extract_flavors(text) == flavors
+
+
+@pytest.mark.parametrize('text', [
+    "rosemary and prose", "a minted coin", "the orangery", "pistachios", "strawberry", "chaise lounge",
+])
+def test_variants_only_match_whole_words(text):
+    assert 'rose' not in extract_flavors(text)
+    assert 'mint' not in extract_flavors(text)
+    assert 'orange' not in extract_flavors(text)
+    assert 'kesar pista' not in extract_flavors(text)
+    assert 'berry' not in extract_flavors(text)
+    assert 'masala chai' not in extract_flavors(text)
+
+
+def test_a_spelling_counts_for_one_flavor():
+    assert extract_flavors("butterscotch or toffee") == ['butterscotch']
+    assert extract_flavors("caramel") == ['caramel']
+
+
+def test_mentions_are_deduplicated_in_order():
+    assert extract_flavors("Vanilla, VANILLA, then Mango and vanilla") == ['vanilla', 'mango lassi']
+    assert extract_flavors(None) == []
+
+
+def test_corpus_helpers_agree_with_extract():
+    texts = ["Chocolate and vanilla", None, "", "dark choc", "chocolate again", "mint\nchocolate"]
+    assert DEFAULT_LEXICON.extract_many(texts) == [extract_flavors(text) for text in texts]
+    assert count_flavors(texts) == {'chocolate': 3, 'vanilla': 1, 'dark chocolate': 1, 'mint': 1}
+
+
+def test_custom_lexicon():
+    lexicon = FlavorLexicon({'thandai': ['thandai'], 'aam panna': ['aam panna', 'aam']})
+    assert lexicon.extract("Aam panna and thandai") == ['aam panna', 'thandai']
+
+
+def test_flavor_index_totals_match_counts():
+    texts = ["Chocolate and vanilla", "dark chocolate", "chocolate, chocolate", "bananas", "nothing here"]
+    df = pd.DataFrame({'text': texts, 'source': ['r/x'] * 5, 'score': 0, 'comments': 0,
+                       'created': pd.Timestamp('2024-03-01')})
+    index = build_flavor_index(df)
+    assert dict(index.top()) == dict(count_flavors(texts))
+    assert index.mask('banana').tolist() == [False, False, False, True, False]
@@ -0,0 +1,111 @@
+"""JobQueue: results, single flight per key, reuse and cancellation"""
+import threading
+import time
+
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+from tracing import span
+
+
+def wait(job, timeout=5):
+    job.future.result(timeout=timeout)
+    return job
+
+
+def blocker(queue):
+    """Submit a job that holds a worker until the returned event is set"""
+    release = threading.Event()
+    job = queue.submit(lambda job: release.wait(5), name='blocker')
+    while job.status != RUNNING:
+        time.sleep(0.001)
+    return job, release
+
+
+def test_result_messages_and_spans():
+    def work(job, x, y=1):
+        job.set_stage("adding")
+        job.notify('caption', "halfway")
+        job.add_item('recommended', {'flavor': 'Mango Lassi'})
+        with span('work.add'):
+            return x + y
+
+    job = wait(JobQueue().submit(work, 2, y=3))
+    assert (job.status, job.result, job.error) == (DONE, 5, None)
+    assert job.name == 'work' and job.stage == "adding"
+    assert job.messages == [('caption', "halfway")]
+    assert [item[1:] for item in job.items] == [('recommended', {'flavor': 'Mango Lassi'})]
+    assert 'work.add' in job.tracer.summary()
+    assert job.elapsed() >= 0
+
+
+def test_exception_fails_the_job():
+    def work(job):
+        raise ValueError("no data")
+
+    job = wait(JobQueue().submit(work))
+    assert job.status == FAILED and job.done
+    assert isinstance(job.error, ValueError)
+
+
+def test_same_key_shares_one_unfinished_job():
+    queue = JobQueue()
+    calls = []
+    release = threading.Event()
+
+    def work(job):
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    first = queue.submit(work, key=('load', 'sample'))
+    second = queue.submit(work, key=('load', 'sample'))
+    other = queue.submit(work, key=('load', 'live'))
+    assert second is first and other is not first
+    release.set()
+    assert wait(first).result and wait(other).result
+    assert len(calls) == 2
+
+
+def test_finished_job_reused_only_within_reuse_for():
+    queue = JobQueue()
+    first = wait(queue.submit(lambda job: object(), key='k'))
+    assert queue.submit(lambda job: object(), key='k', reuse_for=60) is first
+    again = wait(queue.submit(lambda job: object(), key='k', reuse_for=0))
+    assert again is not first and again.result is not first.result
+
+
+def test_failed_job_is_not_reused():
+    def work(job):
+        raise RuntimeError("blocked")
+
+    queue = JobQueue()
+    failed = wait(queue.submit(work, key='k'))
+    assert queue.submit(lambda job: 1, key='k', reuse_for=60) is not failed
+
+
+def test_cancel_drops_a_queued_job_only():
+    queue = JobQueue(max_workers=1)
+    running, release = blocker(queue)
+    ran = []
+    queued = queue.submit(lambda job: ran.append(1), key='k')
+    assert queued.status == QUEUED
+
+    assert queue.cancel(queued.id)
+    assert queued.status == CANCELLED and queued.done
+    assert not queue.cancel(running.id)
+    assert not queue.cancel('missing-1') and not queue.cancel(None)
+    # A cancelled job no longer covers its key
+    replacement = queue.submit(lambda job: 'again', key='k')
+    assert replacement is not queued
+
+    release.set()
+    assert wait(replacement).result == 'again'
+    assert wait(running).status == DONE
+    assert ran == []
+    assert queue.active() == []
+
+
+def test_finished_jobs_are_pruned_to_keep():
+    queue = JobQueue(max_workers=1, keep=2)
+    jobs = [wait(queue.submit(lambda job: None)) for _ in range(4)]
+    assert queue.get(jobs[0].id) is None and queue.get(jobs[1].id) is None
+    assert queue.get(jobs[3].id) is jobs[3]
@@ -0,0 +1,168 @@
+"""Map-reduce analysis: merge_analyses() and analyze_corpus() against a fake client"""
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from llm import AnalysisStreamParser, analyze_corpus, chunk_texts, merge_analyses, parse_analysis, request_analysis
+
+# Comment prefix -> the flavor a chunk containing it recommends, and with what confidence
+FLAVORS = {'mango': ('Mango Lassi', 'High'), 'kesar': ('Kesar Pista', 'Medium'), 'coffee': ('Cold Coffee', 'Low')}
+
+
+def rec(flavor, confidence='Medium', brand='MuscleBlaze'):
+    return {'flavor': flavor, 'brand': brand, 'confidence': confidence}
+
+
+class FakeClient:
+    """Answers each chunk with the FLAVORS found in its comments; chunks mentioning `fail` raise"""
+
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.prompts = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **request):
+        prompt = messages[0]['content']
+        with self.lock:
+            self.prompts.append(prompt)
+        if any(f"- {word}" in prompt for word in self.fail):
+            raise RuntimeError("Error code: 500 - upstream error")
+        recommended = [rec(flavor, confidence) for word, (flavor, confidence) in FLAVORS.items()
+                       if f"- {word}" in prompt]
+        analysis = {'recommended': recommended, 'rejected': [{'flavor': 'Bubblegum', 'reason': 'Too sweet'}],
+                    'golden_candidate': recommended[0] if recommended else {}}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(analysis)))],
+                               model=model)
+
+
+TEXTS = ["mango lassi please"] * 6 + ["kesar pista would be great"] * 2 + ["coffee is fine"] * 3
+
+
+def run(client, texts=TEXTS):
+    return analyze_corpus(client, texts, ['MuscleBlaze'], token_budget=12, requests_per_minute=60_000)
+
+
+def test_merge_ranks_by_summed_confidence():
+    merged = merge_analyses([
+        {'recommended': [rec('Mango Lassi', 'Low'), rec('Kesar Pista', 'High')]},
+        {'recommended': [rec('Mango Lassi (Alphonso)', 'High')]},
+        {'recommended': [rec('mango lassi', 'Medium')]},
+    ])
+    assert [r['flavor'] for r in merged['recommended']] == ['Mango Lassi (Alphonso)', 'Kesar Pista']
+
+
+def test_merge_golden_by_votes_and_rejected_without_recommended():
+    merged = merge_analyses([
+        {'recommended': [rec('Kesar Pista')], 'golden_candidate': rec('Kesar Pista'),
+         'rejected': [{'flavor': 'Mango Lassi', 'reason': 'Overdone'}]},
+        {'recommended': [rec('Mango Lassi')], 'golden_candidate': rec('Mango Lassi (Alphonso)'),
+         'rejected': [{'flavor': 'Bubblegum'}, {'flavor': 'bubblegum'}]},
+        {'recommended': [rec('Mango Lassi')], 'golden_candidate': rec('Mango Lassi')},
+    ])
+    assert merged['golden_candidate']['flavor'] == 'Mango Lassi (Alphonso)'
+    assert [r['flavor'] for r in merged['rejected']] == ['Bubblegum']
+
+
+def test_merge_keeps_top_n():
+    merged = merge_analyses([{'recommended': [rec(f"Flavor {i}") for i in range(8)]}], top_n=3)
+    assert len(merged['recommended']) == 3
+    assert 'golden_candidate' not in merged
+
+
+def test_analyze_corpus_merges_every_chunk():
+    client = FakeClient()
+    analysis = run(client)
+    assert len(client.prompts) == len(chunk_texts(TEXTS, token_budget=12)) > 1
+    # Summed confidence over the chunks: mango 3 x High, kesar 2 x Medium, coffee 2 x Low
+    assert [r['flavor'] for r in analysis['recommended']] == ['Mango Lassi', 'Kesar Pista', 'Cold Coffee']
+    assert analysis['golden_candidate']['flavor'] == 'Mango Lassi'
+
+
+def test_analyze_corpus_reads_a_generator():
+    assert run(FakeClient(), (text for text in TEXTS)) == run(FakeClient())
+
+
+def test_analyze_corpus_single_chunk_is_returned_as_is():
+    analysis = run(FakeClient(), ["kesar pista would be great"])
+    assert analysis['recommended'] == [rec('Kesar Pista', 'Medium')]
+
+
+def test_analyze_corpus_skips_failed_chunks():
+    analysis = run(FakeClient(fail=['coffee']))
+    assert [r['flavor'] for r in analysis['recommended']] == ['Mango Lassi', 'Kesar Pista']
+
+
+def test_analyze_corpus_raises_when_every_chunk_fails():
+    with pytest.raises(RuntimeError, match="500"):
+        run(FakeClient(fail=list(FLAVORS)))
+
+
+def test_analyze_corpus_without_text_is_none():
+    client = FakeClient()
+    assert run(client, ["", "   ", None]) is None
+    assert client.prompts == []
+
+
+# Streamed responses
+ANALYSIS = {
+    'recommended': [rec('Choco {Lava}', 'High'), rec('Kesar "Royal" Pista')],
+    'rejected': [{'flavor': 'Bubblegum', 'reason': 'Too sweet } and [artificial'}],
+    'golden_candidate': rec('Mango Lassi', 'High'),
+}
+PREAMBLE = "Here is the analysis for {MuscleBlaze}:\n```json\n"
+TRAILER = "\n```\nNote: {brand} names are case-sensitive. }"
+
+
+def feed_in_pieces(text, size):
+    parser = AnalysisStreamParser()
+    items = []
+    for start in range(0, len(text), size):
+        items += [(start, item) for item in parser.feed(text[start:start + size])]
+    return parser, items
+
+
+@pytest.mark.parametrize('size', [1, 7, 10_000])
+def test_stream_parser_emits_each_card_once_complete(size):
+    text = json.dumps(ANALYSIS, indent=2)
+    parser, items = feed_in_pieces(text, size)
+    assert [item for _, item in items] == [
+        ('recommended', ANALYSIS['recommended'][0]), ('recommended', ANALYSIS['recommended'][1]),
+        ('rejected', ANALYSIS['rejected'][0]), ('golden_candidate', ANALYSIS['golden_candidate']),
+    ]
+    if size == 1:
+        # A card arrives with the delta holding its closing brace, not with the one inside its string
+        assert items[0][0] == text.index('}', text.index('"brand"'))
+    assert parser.result() == ANALYSIS
+
+
+@pytest.mark.parametrize('size', [1, 5, 10_000])
+def test_stream_parser_ignores_text_and_braces_around_the_object(size):
+    text = PREAMBLE + json.dumps(ANALYSIS) + TRAILER
+    parser, items = feed_in_pieces(text, size)
+    assert len(items) == 4
+    assert parser.result() == ANALYSIS
+    assert text[slice(*parser.root_span)] == json.dumps(ANALYSIS)
+    assert parse_analysis(text) == ANALYSIS
+
+
+def test_parse_analysis_without_an_object_raises():
+    with pytest.raises(json.JSONDecodeError):
+        parse_analysis("Sorry, I can't help with {that}.")
+
+
+def test_streamed_request_renders_cards_and_parses_around_prose():
+    text = PREAMBLE + json.dumps(ANALYSIS) + TRAILER
+
+    def create(model, stream, **request):
+        assert stream
+        return iter(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 9]))],
+                                    model=model)
+                    for i in range(0, len(text), 9))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    cards = []
+    assert request_analysis(client, "- mango", ['MuscleBlaze'], on_item=lambda *card: cards.append(card)) == ANALYSIS
+    assert [section for section, _ in cards] == ['recommended', 'recommended', 'rejected', 'golden_candidate']
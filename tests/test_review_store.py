@@ -0,0 +1,82 @@
+"""ReviewStore refreshes against a fake fetch engine"""
+import json
+import os
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+from records import Review
+from review_store import ReviewStore, _StoredIds, refresh_amazon, refresh_reddit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+with open(os.path.join(FIXTURES, 'reddit_listing.json'), 'rb') as f:
+    LISTING = f.read()
+
+
+class FakeEngine:
+    """FetchEngine stand-in: the first `routes` pattern found in a URL gives its (status, body)"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.urls = []
+
+    def submit(self, url, headers=None, **kwargs):
+        self.urls.append(url)
+        status, body = next((reply for pattern, reply in self.routes.items() if pattern in url), (404, b''))
+        future = Future()
+        future.set_result(SimpleNamespace(status_code=status, content=body, json=lambda: json.loads(body)))
+        return future
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ReviewStore(str(tmp_path / 'reviews.sqlite'))
+
+
+def refreshed(store, key):
+    return store.get_mark(key) is not None
+
+
+def test_only_fetched_subreddits_are_marked_refreshed(store):
+    engine = FakeEngine({'/r/fitness/': (200, LISTING), '/r/blocked/': (403, b''), '/r/limited/': (429, b''),
+                         '/r/garbled/': (200, b'<html>not json</html>')})
+    added = refresh_reddit(store, ['fitness', 'blocked', 'limited', 'garbled'], limit=100, engine=engine)
+    assert added == 100
+    assert refreshed(store, 'reddit:fitness:refreshed')
+    assert not any(refreshed(store, f'reddit:{sub}:refreshed') for sub in ('blocked', 'limited', 'garbled'))
+
+    # The failed ones are tried again at once; the fetched one waits for max_age
+    engine.urls.clear()
+    refresh_reddit(store, ['fitness', 'blocked', 'limited', 'garbled'], limit=100, engine=engine)
+    assert sorted(url.split('/')[4] for url in engine.urls) == ['blocked', 'garbled', 'limited']
+
+
+def test_seeded_subreddits_read_new_posts_only(store):
+    engine = FakeEngine({'/r/fitness/': (200, LISTING)})
+    refresh_reddit(store, ['fitness'], limit=100, engine=engine)
+    assert refresh_reddit(store, ['fitness'], limit=100, engine=engine, force=True) == 0
+    assert engine.urls[-1].endswith('/r/fitness/new.json?limit=100')
+
+
+def test_stored_items_looks_up_many_ids_at_once(store):
+    reviews = [Review(f"review {i}", 'Amazon (whey protein)', 5, 0, kind='amazon', parent='B01', item_id=f'R{i}')
+               for i in range(1200)]
+    store.add(reviews)
+    wanted = [f'R{i}' for i in range(0, 2400, 2)]
+    assert store.stored_items('amazon', wanted) == {f'R{i}' for i in range(0, 1200, 2)}
+    assert store.stored_items('reddit', wanted) == set()
+    ids = _StoredIds(store, 'amazon')
+    assert ids.intersection(['R1', 'R1', 'X']) == {'R1'} and 'R5' in ids and 'X' not in ids
+
+
+def test_failed_amazon_terms_are_neither_stored_nor_marked(store):
+    engine = FakeEngine({'/s?k=whey': (503, b'')})
+    fallback = []
+    assert refresh_amazon(store, ['whey protein'], engine=engine, fallback=fallback) == 0
+    assert len(fallback) == 10 and not store.has_source('Amazon (whey protein)')
+    assert not refreshed(store, 'amazon:whey protein:refreshed')
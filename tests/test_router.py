@@ -0,0 +1,211 @@
+"""ModelRouter failover and hedging against fake backends"""
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from analysis_cache import AnalysisCache, analysis_cache_key
+from llm import build_prompt, request_analysis
+from router import ModelRoute, ModelRouter
+
+ANALYSIS = {'recommended': [], 'rejected': [], 'golden_candidate': {'flavor': 'Mango Lassi'}}
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("Error code: 429 - rate limit reached")
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after else {})
+
+
+class FakeClient:
+    """Chat-completions stand-in that sleeps `delay` seconds, or raises `error`, on every call"""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.models = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, **request):
+        with self.lock:
+            self.models.append(model)
+        if self.error is not None:
+            raise self.error
+        time.sleep(self.delay)
+        message = SimpleNamespace(content=json.dumps(ANALYSIS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=100),
+                               model=model)
+
+
+class StreamingClient:
+    """Streams the analysis in three chunks after `first_delay` seconds, raising `error` before the first
+    content chunk or, with `error_after_first`, once it has been sent"""
+
+    def __init__(self, first_delay=0.0, error=None, error_after_first=False):
+        self.first_delay = first_delay
+        self.error = error
+        self.error_after_first = error_after_first
+        self.closed = threading.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, stream, **request):
+        assert stream
+        return self.chunks()
+
+    def chunks(self):
+        try:
+            yield chunk(None)
+            time.sleep(self.first_delay)
+            if self.error is not None and not self.error_after_first:
+                raise self.error
+            text = json.dumps(ANALYSIS)
+            yield chunk(text[:10])
+            if self.error is not None:
+                raise self.error
+            yield chunk(text[10:])
+        finally:
+            self.closed.set()
+
+
+def chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], model=None)
+
+
+def make_router(large, small, large_latency=1.0, **options):
+    return ModelRouter([ModelRoute(large, 'large', provider='fake', expected_latency=large_latency),
+                        ModelRoute(small, 'small', provider='fake', expected_latency=1.0)], **options)
+
+
+def ask(router):
+    return router.chat.completions.create(model='ignored', messages=[{'role': 'user', 'content': 'hi'}])
+
+
+def ask_streamed(router):
+    stream = router.chat.completions.create(model='ignored', messages=[{'role': 'user', 'content': 'hi'}],
+                                            stream=True)
+    chunks = list(stream)
+    return ''.join(c.choices[0].delta.content or '' for c in chunks), {c.model for c in chunks}
+
+
+def stats(router):
+    return {entry['route']: entry for entry in router.stats()}
+
+
+def test_primary_answers_when_healthy():
+    large, small = FakeClient(), FakeClient()
+    router = make_router(large, small)
+    assert ask(router).model == 'large'
+    assert (large.models, small.models) == (['large'], [])
+    assert router.primary_model == 'large'
+
+
+def test_rate_limit_fails_over_and_cools_down():
+    large, small = FakeClient(error=RateLimitError()), FakeClient()
+    router = make_router(large, small, cooldown=60)
+    assert ask(router).model == 'small'
+    # Cooling down: the next request skips the rate-limited route entirely
+    assert ask(router).model == 'small'
+    assert large.models == ['large']
+    assert stats(router)['fake:large']['rate_limited'] == 1
+    assert [route.model for route in router.available()] == ['small']
+
+
+def test_rate_limit_cooldown_follows_retry_after():
+    router = make_router(FakeClient(error=RateLimitError(retry_after='120')), FakeClient(), cooldown=1)
+    ask(router)
+    assert router.routes[0].cooldown_until - time.monotonic() == pytest.approx(120, abs=1)
+
+
+def test_other_errors_fail_over_without_cooldown():
+    large, small = FakeClient(error=RuntimeError("Error code: 500")), FakeClient()
+    router = make_router(large, small)
+    assert ask(router).model == 'small'
+    assert stats(router)['fake:large']['errors'] == 1
+    assert [route.model for route in router.available()] == ['large', 'small']
+
+
+def test_every_route_failing_raises_the_last_error():
+    router = make_router(FakeClient(error=RateLimitError()), FakeClient(error=RuntimeError("Error code: 500")))
+    with pytest.raises(RuntimeError, match="500"):
+        ask(router)
+
+
+def test_slow_primary_is_hedged_and_the_first_answer_wins():
+    large, small = FakeClient(delay=1.0), FakeClient(delay=0.01)
+    router = make_router(large, small, large_latency=0.05)
+    started = time.perf_counter()
+    assert ask(router).model == 'small'
+    assert time.perf_counter() - started < 0.5
+    assert stats(router)['fake:small']['hedges'] == 1
+    assert stats(router)['fake:small']['wins'] == 1
+
+
+def test_no_hedge_when_disabled():
+    large, small = FakeClient(delay=0.2), FakeClient()
+    router = make_router(large, small, large_latency=0.01, hedge=False)
+    assert ask(router).model == 'large'
+    assert small.models == []
+
+
+def test_hedge_threshold_moves_to_observed_p95():
+    large, small = FakeClient(delay=0.02), FakeClient()
+    router = make_router(large, small, large_latency=5.0, min_samples=3)
+    for _ in range(3):
+        assert ask(router).model == 'large'
+    assert router.routes[0].hedge_after(3) == pytest.approx(0.02, abs=0.05)
+
+    # Far below the 5s expected latency, but well past the observed p95
+    large.delay = 1.0
+    started = time.perf_counter()
+    assert ask(router).model == 'small'
+    assert time.perf_counter() - started < 0.5
+
+
+def test_failover_answer_is_cached_under_the_model_that_gave_it(tmp_path):
+    router = make_router(FakeClient(error=RateLimitError()), FakeClient())
+    cache = AnalysisCache(str(tmp_path / 'analysis.sqlite'))
+    assert request_analysis(router, "- mango lassi please", ['MuscleBlaze'], cache=cache) == ANALYSIS
+
+    prompt = build_prompt("- mango lassi please", ['MuscleBlaze'])
+    assert cache.get(analysis_cache_key(prompt, 'small', 0.7, ['MuscleBlaze'], 2000)) == ANALYSIS
+    assert cache.get(analysis_cache_key(prompt, 'large', 0.7, ['MuscleBlaze'], 2000)) is None
+
+
+def test_streamed_first_token_latency_is_recorded():
+    router = make_router(StreamingClient(), StreamingClient())
+    text, models = ask_streamed(router)
+    assert json.loads(text) == ANALYSIS
+    assert models == {'large'}
+    assert stats(router)['fake:large']['first_token_p95'] is not None
+    assert len(router.routes[0].first_token) == 1 and len(router.routes[0].latency) == 0
+
+
+def test_streamed_slow_first_token_is_hedged():
+    large, small = StreamingClient(first_delay=0.5), StreamingClient()
+    router = make_router(large, small, large_latency=0.05)
+    started = time.perf_counter()
+    text, models = ask_streamed(router)
+    assert time.perf_counter() - started < 0.3
+    assert json.loads(text) == ANALYSIS and models == {'small'}
+    assert stats(router)['fake:small']['hedges'] == 1
+    # The losing stream is closed once its first token arrives
+    assert large.closed.wait(2)
+
+
+def test_streamed_error_before_first_token_fails_over():
+    router = make_router(StreamingClient(error=RuntimeError("Error code: 500")), StreamingClient())
+    text, models = ask_streamed(router)
+    assert json.loads(text) == ANALYSIS and models == {'small'}
+    assert stats(router)['fake:large']['errors'] == 1
+
+
+def test_streamed_error_after_first_token_reaches_the_caller():
+    router = make_router(StreamingClient(error=RuntimeError("connection reset"), error_after_first=True),
+                         StreamingClient())
+    with pytest.raises(RuntimeError, match="connection reset"):
+        ask_streamed(router)
@@ -0,0 +1,122 @@
+"""iter_amazon() against a local HTTP stub serving the saved fixture pages"""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from fetcher import HTTP_CONFIG, FetchEngine, configure_http
+from scrapers import iter_amazon, parse_review_page, parse_search_asins
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+SEARCH_PAGE = fixture('amazon_search.html')
+REVIEW_PAGE = fixture('amazon_reviews.html')
+ASINS = parse_search_asins(SEARCH_PAGE)[1]
+REVIEW_IDS = [review.item_id for review in parse_review_page(REVIEW_PAGE, 'whey protein')]
+
+
+class StubAmazonHandler(BaseHTTPRequestHandler):
+    """Search terms pick the answer: 'down' is a 503, 'empty' an empty page, 'noreviews' has no review pages"""
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        url = urlparse(self.path)
+        term = parse_qs(url.query).get('k', [''])[0]
+        if url.path == '/s' and term == 'down':
+            self.reply(503, b'')
+        elif url.path == '/s' and term == 'empty':
+            self.reply(200, b'')
+        elif url.path == '/s':
+            self.reply(200, SEARCH_PAGE)
+        elif url.path.startswith('/product-reviews/') and 'noreviews' not in self.server.paths[0]:
+            self.reply(200, REVIEW_PAGE)
+        else:
+            self.reply(404, b'')
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    # No urllib3 retries/backoff on the stub's 503s
+    saved = dict(HTTP_CONFIG)
+    configure_http(max_retries=0)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubAmazonHandler)
+    server.paths = []
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    configure_http(**saved)
+
+
+def scrape(server, terms, **options):
+    messages = []
+    engine = FetchEngine(requests_per_second=1000, burst=100, timeout=5)
+    with engine:
+        reviews = list(iter_amazon(terms, engine=engine, base_url=f"http://127.0.0.1:{server.server_port}",
+                                   notify=lambda level, message: messages.append((level, message)), **options))
+    return reviews, messages
+
+
+def test_reviews_from_the_first_products_up_to_max_per_term(server):
+    reviews, messages = scrape(server, ['whey protein'], max_per_term=12)
+    assert len(reviews) == 12
+    assert {review.source for review in reviews} == {'Amazon (whey protein)'}
+    assert [review.parent for review in reviews] == [ASINS[0]] * 5 + [ASINS[1]] * 5 + [ASINS[2]] * 2
+    assert not any(review.item_id.startswith('fallback-') for review in reviews)
+    assert ('success', "✅ Found 48 products for 'whey protein'") in messages
+    assert sorted(path for path in server.paths if path.startswith('/product-reviews/')) == \
+        sorted(f"/product-reviews/{asin}/" for asin in ASINS)
+
+
+def test_each_term_is_scraped(server):
+    reviews, _ = scrape(server, ['whey protein', 'mass gainer'], products_per_term=1, sort_recent=True)
+    assert [review.source for review in reviews] == ['Amazon (whey protein)'] * 5 + ['Amazon (mass gainer)'] * 5
+    assert f"/product-reviews/{ASINS[0]}/?sortBy=recent" in server.paths
+
+
+@pytest.mark.parametrize('term, warning', [
+    ('down', "⚠️ Amazon temporarily unavailable for 'down'"),
+    ('empty', "⚠️ No products found for 'empty'. Using fallback data."),
+    ('noreviews', "⚠️ Could not access reviews for 'noreviews'. Using fallback."),
+])
+def test_failed_pages_fall_back_to_canned_reviews(server, term, warning):
+    reviews, messages = scrape(server, [term])
+    assert len(reviews) == 10
+    assert all(review.item_id.startswith('fallback-') and review.source == f'Amazon ({term})' for review in reviews)
+    assert ('warning', warning) in messages
+
+
+def test_skip_review_ids_drops_stored_reviews(server):
+    reviews, _ = scrape(server, ['whey protein'], skip_review_ids=set(REVIEW_IDS[:2]))
+    assert len(reviews) == 9
+    assert not {review.item_id for review in reviews} & set(REVIEW_IDS[:2])
+
+
+def test_only_stored_reviews_is_not_a_fallback(server):
+    reviews, messages = scrape(server, ['whey protein'], skip_review_ids=set(REVIEW_IDS))
+    assert reviews == []
+    assert ('info', "No new reviews for 'whey protein'") in messages
+
+
+def test_known_asins_skip_the_search_page(server):
+    reviews, _ = scrape(server, ['whey protein'], known_asins={'whey protein': ['B000000001']})
+    assert [review.parent for review in reviews] == ['B000000001'] * 5
+    assert server.paths == ['/product-reviews/B000000001/']
@@ -0,0 +1,151 @@
+"""SnapshotStore round-trips and the SnapshotRefresher's single flight and backoff"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from jobs import DONE, FAILED, JobQueue
+from sample_data import generate_sample_data
+from snapshots import (ANALYSIS_FIELDS, Snapshot, SnapshotRefresher, SnapshotStore, data_key, flavor_views,
+                       snapshot_config, snapshot_key)
+
+ANALYSIS = {'recommended': [{'flavor': 'Kesar Pista', 'brand': 'MuscleBlaze', 'confidence': 'High'}],
+            'rejected': [], 'golden_candidate': {'flavor': 'Kesar Pista', 'brand': 'MuscleBlaze'}}
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return generate_sample_data()
+
+
+def make_snapshot(frame, config=None, **options):
+    config = config or snapshot_config()
+    return Snapshot(config, frame, ANALYSIS, b'\x89PNG fake', *flavor_views(frame, discover=False), **options)
+
+
+def generations(store, config):
+    base = os.path.join(store.root, snapshot_key(config))
+    return sorted(name for name in os.listdir(base) if os.path.isdir(os.path.join(base, name)))
+
+
+def test_save_load_round_trip(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path))
+    saved = make_snapshot(frame)
+    store.save(saved)
+
+    loaded = store.load(snapshot_config())
+    assert loaded.config == saved.config and loaded.created == saved.created
+    assert loaded.analysis == ANALYSIS and loaded.word_cloud_png == b'\x89PNG fake'
+    assert loaded.frame['text'].tolist() == frame['text'].tolist()
+    assert loaded.frame['source'].astype(str).tolist() == frame['source'].astype(str).tolist()
+    assert loaded.frame['score'].tolist() == frame['score'].tolist()
+    assert loaded.frame['comments'].tolist() == frame['comments'].tolist()
+    assert (loaded.frame['created'] == pd.to_datetime(frame['created'])).all()
+    pd.testing.assert_frame_equal(loaded.demand.flavors, saved.demand.flavors)
+    assert loaded.flavor_index.top(5) == saved.flavor_index.top(5)
+
+
+def test_round_trip_of_an_empty_frame_without_png(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path))
+    empty = frame.head(0)
+    store.save(Snapshot(snapshot_config(), empty, ANALYSIS, None, *flavor_views(empty, discover=False)))
+    loaded = store.load(snapshot_config())
+    assert len(loaded.frame) == 0 and loaded.word_cloud_png is None
+
+
+def test_load_only_matches_the_same_configuration(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path))
+    store.save(make_snapshot(frame))
+    assert store.load(snapshot_config(brands=['HK Vitals'])) is None
+    # Equal configurations in a different order share the snapshot
+    assert store.load(snapshot_config(brands=['TrueBasics', 'MuscleBlaze', 'HK Vitals'])) is not None
+
+
+def test_saves_keep_the_newest_generations(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path), keep=2)
+    config = snapshot_config()
+    for created in (1.0, 2.0, 3.0):
+        store.save(make_snapshot(frame, created=created))
+    assert len(generations(store, config)) == 2
+    assert store.load(config).created == 3.0
+
+
+def test_unreadable_or_other_format_loads_as_none(tmp_path, frame):
+    store = SnapshotStore(str(tmp_path))
+    config = snapshot_config()
+    path = store.save(make_snapshot(frame))
+
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({**meta, 'format': meta['format'] + 1}, f)
+    assert store.load(config) is None
+
+    store.save(make_snapshot(frame))
+    with open(os.path.join(store.save(make_snapshot(frame)), 'views.pkl'), 'wb') as f:
+        f.write(b'not a pickle')
+    assert store.load(config) is None
+
+
+def test_staleness_follows_the_source(frame):
+    assert not make_snapshot(frame, created=time.time() - 7200).is_stale()
+    assert make_snapshot(frame, snapshot_config(source='live'), created=time.time() - 7200).is_stale()
+
+
+def test_data_key_leaves_out_the_analysis_fields():
+    loaded = snapshot_config()
+    session = snapshot_config(brands=['MuscleBlaze'], depth='full')
+    assert data_key(loaded) == data_key(session)
+    assert data_key(loaded) != data_key(snapshot_config(discover=False))
+    # The data part of one configuration with the analysis fields of another is that other configuration
+    assert snapshot_key({**loaded, **{name: session[name] for name in ANALYSIS_FIELDS}}) == snapshot_key(session)
+
+
+def test_refresher_saves_a_built_snapshot_once_per_configuration(tmp_path, frame):
+    refresher = SnapshotRefresher(SnapshotStore(str(tmp_path)), JobQueue(max_workers=2))
+    release = threading.Event()
+    builds = []
+
+    def build():
+        builds.append(1)
+        release.wait(5)
+        return make_snapshot(frame)
+
+    job = refresher.refresh(snapshot_config(), build)
+    assert refresher.refresh(snapshot_config(), build) is job
+    release.set()
+    job.future.result(timeout=5)
+    assert (job.status, job.result, len(builds)) == (DONE, True, 1)
+    assert refresher.store.load(snapshot_config()) is not None
+
+
+def test_refresher_backs_off_after_failed_builds(tmp_path, frame):
+    refresher = SnapshotRefresher(SnapshotStore(str(tmp_path)), retry_after=0.2, max_retry_after=0.3)
+    config = snapshot_config(source='live', data_sources=['Reddit'], reddit_subs=['fitness'])
+
+    def blocked():
+        raise RuntimeError("no live data collected")
+
+    job = refresher.refresh(config, blocked)
+    job.future.result(timeout=5)
+    assert job.status == FAILED
+    assert refresher.refresh(config, blocked) is None
+    # Other configurations are unaffected
+    assert refresher.refresh(snapshot_config(), lambda: None) is not None
+
+    # Retried after retry_after; a build giving no snapshot also counts as a failure, with a longer wait
+    time.sleep(0.25)
+    job = refresher.refresh(config, lambda: None)
+    job.future.result(timeout=5)
+    assert job.result is False
+    time.sleep(0.25)
+    assert refresher.refresh(config, blocked) is None
+
+    time.sleep(0.1)
+    job = refresher.refresh(config, lambda: make_snapshot(frame, config))
+    job.future.result(timeout=5)
+    assert job.result is True and refresher.retry_at(config) == 0
+    assert refresher.store.load(config) is not None
@@ -0,0 +1,90 @@
+"""TrendEngine bucketing, rolling windows and momentum ranking"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from trends import TrendEngine
+
+FLAVORS = ['mango', 'coffee', 'vanilla']
+DAY = datetime(2026, 3, 10, 12)
+
+
+def days(*offsets):
+    return [DAY + timedelta(days=offset) for offset in offsets]
+
+
+def test_update_grows_across_new_buckets():
+    engine = TrendEngine('day', FLAVORS)
+    engine.update(days(0, 0.25), [['mango'], ['mango', 'coffee']])
+    assert len(engine) == 1
+    assert engine.counts.tolist() == [[2, 1, 0]]
+
+    # A later bucket pads the gap with empty days
+    engine.update(days(2), [['coffee']])
+    assert len(engine) == 3
+    assert engine.counts.tolist() == [[2, 1, 0], [0, 0, 0], [0, 1, 0]]
+    assert engine.documents.tolist() == [2, 0, 1]
+
+    # An earlier bucket moves the origin back and keeps what was counted
+    origin = engine.origin
+    engine.update(days(-1, 1), [['vanilla', 'unknown'], []])
+    assert engine.origin == origin - 1
+    assert engine.counts.tolist() == [[0, 0, 1], [2, 1, 0], [0, 0, 0], [0, 1, 0]]
+    assert engine.documents.tolist() == [1, 2, 1, 1]
+    assert engine.rolling(window=1).index[0] == pd.Timestamp(DAY.date() - timedelta(days=1))
+
+
+def test_hourly_buckets():
+    engine = TrendEngine('hour', FLAVORS).update(
+        [DAY, DAY + timedelta(minutes=30), DAY + timedelta(hours=3)], [['mango'], ['mango'], ['coffee']])
+    assert len(engine) == 4
+    assert engine.counts[:, 0].tolist() == [2, 0, 0, 0]
+
+
+def test_rolling_matches_a_pandas_rolling_sum():
+    rng = np.random.default_rng(7)
+    offsets = rng.integers(0, 30, size=300)
+    found = [[FLAVORS[i]] for i in rng.integers(0, len(FLAVORS), size=300)]
+    engine = TrendEngine('day', FLAVORS).update(days(*offsets.tolist()), found)
+
+    rolling = engine.rolling(window=7)
+    daily = pd.DataFrame(engine.counts, index=rolling.index, columns=FLAVORS)
+    expected = daily.rolling(7, min_periods=1).sum().astype(np.int64)
+    pd.testing.assert_frame_equal(rolling, expected)
+    assert engine.velocity(window=7).iloc[-1].tolist() == (rolling.iloc[-1] - rolling.iloc[-8]).tolist()
+
+
+def test_rolling_until_cuts_or_extends_the_range():
+    engine = TrendEngine('day', FLAVORS).update(days(0, 1, 2), [['mango'], ['mango'], ['mango']])
+    assert engine.rolling(window=2, until=DAY + timedelta(days=1))['mango'].tolist() == [1, 2]
+    assert engine.rolling(window=2, until=DAY + timedelta(days=4))['mango'].tolist() == [1, 2, 2, 1, 0]
+
+
+def test_momentum_ranks_by_velocity_over_noise():
+    # mango: 40 -> 60 over two weeks; coffee: 1 -> 3; vanilla: 10 -> 5; nothing for a fourth flavor
+    engine = TrendEngine('day', FLAVORS + ['banana'])
+    for flavor, previous, current in [('mango', 40, 60), ('coffee', 1, 3), ('vanilla', 10, 5)]:
+        engine.update(days(*[0] * previous + [7] * current), [[flavor]] * (previous + current))
+
+    table = engine.momentum(window=7)
+    assert table.index.tolist() == ['mango', 'coffee', 'vanilla']
+    assert table.loc['mango', ['current', 'previous', 'velocity']].tolist() == [60, 40, 20]
+    assert table.loc['mango', 'momentum'] == np.float64(20 / np.sqrt(101))
+    assert table.loc['vanilla', 'velocity'] == -5
+    assert engine.momentum(window=7, n=1).index.tolist() == ['mango']
+
+    # Up to the first week only, everything is rising from nothing
+    early = engine.momentum(window=7, until=DAY)
+    assert early['previous'].tolist() == [0, 0, 0]
+    assert early.index.tolist() == ['mango', 'vanilla', 'coffee']
+
+
+def test_from_frame_counts_lexicon_flavors():
+    df = pd.DataFrame({
+        'text': ["mango lassi please", "more mango lassi and coffee", "nothing here"],
+        'created': days(0, 1, 1),
+    })
+    engine = TrendEngine.from_frame(df)
+    assert engine.documents.tolist() == [1, 2]
+    assert engine.rolling(window=2).iloc[-1][['mango lassi', 'coffee']].tolist() == [2, 1]
@@ -0,0 +1,150 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('tracer', default=None)
+
+
+# Timing spans for one run
+class Tracer:
+    """Collect named timing spans (with attributes) from every thread of one run.
+
+    Spans are recorded through the module-level span() while the tracer is
+    active (see use_tracer()). Worker threads pick it up when their task is
+    submitted with contextvars.copy_context().run. The trace can be
+    summarised per span name or exported in Chrome trace-event JSON (open in
+    chrome://tracing or ui.perfetto.dev).
+    """
+
+    def __init__(self, name='run'):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+        self.lock = threading.Lock()
+        self.profile_text = None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block; the yielded dict can be filled with more attributes"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            duration = time.perf_counter() - start
+            with self.lock:
+                self.spans.append((name, start - self.started, duration, threading.current_thread().name, attrs))
+
+    @contextmanager
+    def profiling(self, kind='cprofile', limit=40):
+        """Profile the block with cProfile or pyinstrument (optional dependency) into `profile_text`"""
+        if kind == 'pyinstrument':
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                self.profile_text = profiler.output_text()
+            return
+
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            self.profile_text = out.getvalue()
+
+    def merge(self, other):
+        """Add the spans of another tracer from this process (e.g. a background job's) to this one"""
+        offset = other.started - self.started
+        with other.lock:
+            spans = [(name, start + offset, duration, thread, attrs)
+                     for name, start, duration, thread, attrs in other.spans]
+        with self.lock:
+            self.spans.extend(spans)
+
+    def summary(self):
+        """{span name: {count, total, max}} in seconds, slowest total first"""
+        totals = {}
+        with self.lock:
+            spans = list(self.spans)
+        for name, _, duration, _, _ in spans:
+            entry = totals.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['max'] = max(entry['max'], duration)
+        return dict(sorted(totals.items(), key=lambda item: item[1]['total'], reverse=True))
+
+    def to_chrome_trace(self):
+        """The spans as Chrome trace-event JSON (complete "X" events, microseconds)"""
+        pid = os.getpid()
+        with self.lock:
+            spans = list(self.spans)
+        threads = {thread: tid for tid, thread in enumerate(dict.fromkeys(span[3] for span in spans))}
+        events = [
+            {'name': name, 'ph': 'X', 'ts': round(start * 1e6), 'dur': round(duration * 1e6),
+             'pid': pid, 'tid': threads[thread], 'args': attrs}
+            for name, start, duration, thread, attrs in spans
+        ]
+        events += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread}}
+            for thread, tid in threads.items()
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'run': self.name}}
+
+    def to_json(self):
+        return json.dumps(self.to_chrome_trace(), default=str)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Make `tracer` receive the spans recorded in this context"""
+    token = _current.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current.reset(token)
+
+
+def current_tracer():
+    return _current.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Record a span on the active tracer; a no-op when none is active"""
+    tracer = _current.get()
+    if tracer is None:
+        yield attrs
+        return
+    with tracer.span(name, **attrs) as attrs:
+        yield attrs
+
+
+def traced(name):
+    """Decorator form of span()"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+from flavors import DEFAULT_LEXICON
+from tracing import traced
+
+# Bucket width in seconds
+BUCKET_SECONDS = {'hour': 3600, 'day': 86400}
+
+
+def _epoch_seconds(created):
+    """Integer seconds for datetimes, a datetime64 array or a datetime Series (naive = local wall time)"""
+    return np.asarray(pd.to_datetime(created), dtype='datetime64[s]').astype(np.int64)
+
+
+# Time-bucketed flavor counts
+class TrendEngine:
+    """Per-flavor mention counts in fixed hourly or daily buckets.
+
+    `counts` is an int32 (bucket x flavor) array starting at bucket number
+    `origin` (bucket numbers count from the epoch), and `documents` holds
+    the number of documents per bucket. update() adds a batch of documents
+    in place, so the engine can follow a stream without revisiting old
+    records; the array only grows when a batch reaches a new bucket.
+    Rolling windows, velocity and acceleration are computed over the whole
+    array at once from its cumulative sum.
+    """
+
+    def __init__(self, bucket='day', flavors=None):
+        if bucket not in BUCKET_SECONDS:
+            raise ValueError(f"bucket must be one of {sorted(BUCKET_SECONDS)}")
+        self.bucket = bucket
+        self.width = BUCKET_SECONDS[bucket]
+        self.flavors = list(flavors if flavors is not None else DEFAULT_LEXICON.mappings)
+        self.flavor_ids = {flavor: i for i, flavor in enumerate(self.flavors)}
+        self.origin = None
+        self.counts = np.zeros((0, len(self.flavors)), dtype=np.int32)
+        self.documents = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _cover(self, first, last):
+        """Grow the arrays so buckets first..last exist"""
+        if self.origin is None:
+            self.origin = first
+        before = max(0, self.origin - first)
+        after = max(0, last - (self.origin + len(self.documents) - 1))
+        if before or after:
+            self.counts = np.pad(self.counts, ((before, after), (0, 0)))
+            self.documents = np.pad(self.documents, (before, after))
+            self.origin -= before
+
+    def update(self, created, found_flavors):
+        """Add documents given their timestamps and the canonical flavors each one mentions"""
+        if not len(created):
+            return self
+        buckets = _epoch_seconds(created) // self.width
+        self._cover(int(buckets.min()), int(buckets.max()))
+        rows = buckets - self.origin
+        self.documents += np.bincount(rows, minlength=len(self.documents)).astype(np.int32)
+
+        ids = [self.flavor_ids.get(flavor, -1) for found in found_flavors for flavor in found]
+        if ids:
+            lengths = np.fromiter((len(found) for found in found_flavors), dtype=np.int64, count=len(rows))
+            ids = np.array(ids, dtype=np.int64)
+            flat = (np.repeat(rows, lengths) * len(self.flavors) + ids)[ids >= 0]
+            self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape).astype(np.int32)
+        return self
+
+    def update_reviews(self, reviews, lexicon=DEFAULT_LEXICON):
+        """Add a batch of Review records, extracting their flavors in one lexicon pass"""
+        reviews = list(reviews)
+        return self.update([review.created for review in reviews],
+                           lexicon.extract_many([review.text for review in reviews]))
+
+    @classmethod
+    @traced('trends.build')
+    def from_frame(cls, df, bucket='day', lexicon=DEFAULT_LEXICON):
+        """Engine over a text/source/score/comments/created DataFrame"""
+        engine = cls(bucket, flavors=list(lexicon.mappings))
+        return engine.update(df['created'], lexicon.extract_many(df['text'].tolist()))
+
+    def _through(self, until):
+        """Counts up to the bucket containing `until` (default: the last bucket with data)"""
+        if until is None or self.origin is None:
+            return self.counts
+        last = int(_epoch_seconds([until])[0] // self.width) - self.origin
+        if last < 0:
+            return self.counts[:0]
+        if last >= len(self.counts):
+            return np.pad(self.counts, ((0, last + 1 - len(self.counts)), (0, 0)))
+        return self.counts[:last + 1]
+
+    @staticmethod
+    def _rolling(counts, window):
+        cumulative = np.zeros((len(counts) + 1, counts.shape[1]), dtype=np.int64)
+        np.cumsum(counts, axis=0, out=cumulative[1:])
+        ends = np.arange(1, len(counts) + 1)
+        return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+    @staticmethod
+    def _lag(values, window):
+        lagged = np.zeros_like(values)
+        if window < len(values):
+            lagged[window:] = values[:-window]
+        return lagged
+
+    def rolling(self, window=7, until=None):
+        """Mentions per flavor in the trailing `window` buckets ending at each bucket"""
+        return self._frame(self._rolling(self._through(until), window))
+
+    def velocity(self, window=7, until=None):
+        """Change of the rolling count versus the previous, non-overlapping window"""
+        rolling = self._rolling(self._through(until), window)
+        return self._frame(rolling - self._lag(rolling, window))
+
+    def acceleration(self, window=7, until=None):
+        """Change of the velocity versus the previous window"""
+        rolling = self._rolling(self._through(until), window)
+        velocity = rolling - self._lag(rolling, window)
+        return self._frame(velocity - self._lag(velocity, window))
+
+    def _frame(self, values):
+        start = np.datetime64(int(self.origin or 0) * self.width, 's')
+        index = start + np.arange(len(values)) * np.timedelta64(self.width, 's')
+        return pd.DataFrame(values, index=pd.DatetimeIndex(index, name='bucket'), columns=self.flavors)
+
+    @traced('trends.momentum')
+    def momentum(self, window=7, until=None, n=None):
+        """Flavors ranked by how fast their mentions are rising.
+
+        Compares the last `window` buckets (up to `until`) with the window
+        before: `velocity` is the difference, `acceleration` the change in
+        velocity, and `momentum` the velocity divided by its Poisson noise
+        (sqrt of current + previous mentions), so a jump from 40 to 60
+        outranks one from 1 to 3. Flavors with no mentions in either window
+        are left out.
+        """
+        counts = self._through(until)
+        windows = np.zeros((3, len(self.flavors)), dtype=np.int64)
+        for k in range(3):
+            end = len(counts) - k * window
+            if end > 0:
+                windows[k] = counts[max(0, end - window):end].sum(axis=0)
+        current, previous, before = windows
+        velocity = current - previous
+        acceleration = velocity - (previous - before)
+        table = pd.DataFrame({
+            'current': current,
+            'previous': previous,
+            'velocity': velocity,
+            'acceleration': acceleration,
+            'momentum': velocity / np.sqrt(current + previous + 1),
+        }, index=pd.Index(self.flavors, name='flavor'))
+        table = table[(table['current'] + table['previous']) > 0]
+        table = table.sort_values(['momentum', 'acceleration', 'current'], ascending=False)
+        return table.head(n) if n else table
@@ -0,0 +1,120 @@
+import hashlib
+import io
+import os
+import random
+import re
+from collections import Counter
+
+import pandas as pd
+import plotly.express as px
+from wordcloud import STOPWORDS, WordCloud
+
+from tracing import traced
+
+WORD_CLOUD_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'wordclouds')
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+
+
+# Word cloud of the whole corpus
+def corpus_hash(texts):
+    """Stable content hash of a list of texts"""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def word_frequencies(texts, max_docs=20000, seed=0):
+    """Token counts for the word cloud, from a deterministic sample of at most `max_docs` texts"""
+    texts = [text for text in texts if isinstance(text, str)]
+    if max_docs and len(texts) > max_docs:
+        texts = random.Random(seed).sample(texts, max_docs)
+
+    counts = Counter()
+    for text in texts:
+        counts.update(token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS)
+    return counts
+
+
+@traced('trendwall.wordcloud')
+def word_cloud_png(texts, max_docs=20000, max_words=200, cache_dir=WORD_CLOUD_CACHE_DIR):
+    """PNG bytes of a word cloud for `texts`, or None if there is too little text.
+
+    Built with generate_from_frequencies() and cached on disk under the
+    corpus hash, so an unchanged corpus is never rendered twice.
+    """
+    path = os.path.join(cache_dir, f"{corpus_hash(texts)}-{max_docs}-{max_words}.png")
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    frequencies = word_frequencies(texts, max_docs)
+    if sum(len(word) * count for word, count in frequencies.items()) <= 100:
+        return None
+
+    wordcloud = WordCloud(
+        width=1200, height=600,
+        background_color='white',
+        colormap='viridis',
+        max_words=max_words
+    ).generate_from_frequencies(frequencies)
+
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format='PNG', optimize=True)
+    png = buffer.getvalue()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(png)
+    return png
+
+
+# Top flavor bar chart
+@traced('trendwall.chart')
+def flavor_bar_chart(flavor_counts, title='Top Flavor Keywords (Normalized)', label='Count'):
+    """Horizontal Plotly bar chart of (flavor, value) pairs"""
+    # Capitalize for better display
+    flavor_df = pd.DataFrame(
+        [(flavor.title(), count) for flavor, count in flavor_counts],
+        columns=['Flavor', label]
+    )
+
+    fig = px.bar(
+        flavor_df,
+        x=label,
+        y='Flavor',
+        orientation='h',
+        title=title,
+        color=label,
+        color_continuous_scale='Viridis',
+        text=label
+    )
+    fig.update_traces(textposition='outside')
+    fig.update_layout(
+        height=500,
+        showlegend=False,
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig
+
+
+# Rolling mentions of the fastest-rising flavors
+@traced('trendwall.momentum_chart')
+def flavor_momentum_chart(rolling, window=7):
+    """Plotly line chart of a (bucket x flavor) frame of rolling mention counts"""
+    import plotly.graph_objects as go
+
+    # One trace per flavor (px.line's color grouping breaks on pandas 3)
+    fig = go.Figure([
+        go.Scatter(x=rolling.index, y=rolling[flavor], mode='lines', name=flavor.title())
+        for flavor in rolling.columns
+    ])
+    fig.update_layout(
+        title=f'Rising Flavors ({window}-bucket rolling mentions)',
+        height=450,
+        yaxis_title='Mentions',
+        legend_title_text='Flavor'
+    )
+    return fig